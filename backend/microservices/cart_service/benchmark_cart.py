@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latência do Cart Service
+
+Mede GET /carrinho/{usuario_id} com cache quente (leitura servida pelo Redis)
+e com cache frio (chave removida antes de cada requisição, leitura pelo
+PostgreSQL) e imprime p50/p95/p99.
+
+Uso:
+    uvicorn main:app --port 8003   # em outro terminal
+    python benchmark_cart.py [--requests 2000] [--usuario-id 1]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from typing import Callable, List, Optional
+
+import redis
+import requests
+
+BASE_URL = "http://localhost:8003/api/v1"
+REDIS_URL = "redis://localhost:6379/2"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentil por interpolação linear"""
+    ordered = sorted(samples)
+    pos = (len(ordered) - 1) * pct / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def measure(session: requests.Session, url: str, count: int, before: Optional[Callable[[], None]] = None) -> List[float]:
+    """Executar count requisições e retornar latências em ms"""
+    timings = []
+    for _ in range(count):
+        if before:
+            before()
+        started = time.perf_counter()
+        response = session.get(url)
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+        timings.append(elapsed)
+    return timings
+
+
+def report(title: str, timings: List[float]) -> None:
+    """Imprimir percentis de uma série"""
+    print(
+        f"{title:<28} n={len(timings):<6} "
+        f"p50={statistics.median(timings):7.2f}ms "
+        f"p95={percentile(timings, 95):7.2f}ms "
+        f"p99={percentile(timings, 99):7.2f}ms"
+    )
+
+
+def main() -> int:
+    """Executar o benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark de GET /carrinho/{usuario_id}")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--redis-url", default=REDIS_URL)
+    parser.add_argument("--usuario-id", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    url = f"{args.base_url}/carrinho/{args.usuario_id}"
+    session = requests.Session()  # keep-alive: mede o serviço, não o handshake TCP
+    redis_client = redis.from_url(args.redis_url)
+    cart_key = f"cart:h:{args.usuario_id}"
+
+    # Aquecimento (cria o carrinho e popula o cache)
+    measure(session, url, 50)
+
+    print("=" * 80)
+    print(f"GET {url}")
+    print("=" * 80)
+    report("cache quente (Redis)", measure(session, url, args.requests))
+    report(
+        "cache frio (PostgreSQL)",
+        measure(session, url, max(1, args.requests // 4), before=lambda: redis_client.delete(cart_key))
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except requests.exceptions.ConnectionError:
+        print("\n❌ ERRO: Não foi possível conectar ao Cart Service")
+        print("   Execute: uvicorn main:app --port 8003\n")
+        sys.exit(1)
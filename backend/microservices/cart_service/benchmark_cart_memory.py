@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória do cache de carrinhos no Redis
+
+Grava N carrinhos sintéticos em cada formato — JSON (formato anterior,
+cart:user:{id}) e hash compacto (cart:h:{id}) — e compara used_memory,
+bytes por carrinho e a codificação interna do Redis (listpack/hashtable).
+
+Use um Redis descartável: as chaves são criadas sob o prefixo bench:
+e removidas ao final.
+
+Uso:
+    python benchmark_cart_memory.py [--carts 1000000] [--items 3] [--redis-url redis://localhost:6379/15]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+
+import redis
+
+from services.redis_service import encode_cart
+
+REDIS_URL = "redis://localhost:6379/15"
+PIPELINE_SIZE = 1000
+
+
+def make_cart(usuario_id: int, items: int) -> Dict[str, Any]:
+    """Carrinho sintético no formato de CartService._serialize_cart"""
+    now = datetime.utcnow().isoformat()
+    itens = []
+    for livro_id in random.sample(range(1, 50000), items):
+        preco = Decimal(random.randint(1990, 19990)) / 100
+        quantidade = random.randint(1, 3)
+        itens.append({
+            "id": random.randint(1, 10_000_000),
+            "livro_id": livro_id,
+            "quantidade": quantidade,
+            "preco_unitario": preco,
+            "subtotal": preco * quantidade,
+            "data_criacao": now,
+            "data_atualizacao": now
+        })
+    return {
+        "id": usuario_id,
+        "usuario_id": usuario_id,
+        "ativo": True,
+        "versao": random.randint(1, 50),
+        "itens": itens,
+        "total_itens": sum(item["quantidade"] for item in itens),
+        "valor_total": sum((item["subtotal"] for item in itens), Decimal("0.00")),
+        "data_criacao": now,
+        "data_atualizacao": now
+    }
+
+
+def write_json(pipe: redis.client.Pipeline, key: str, cart: Dict[str, Any]) -> None:
+    """Formato anterior: documento JSON completo com SETEX"""
+    pipe.set(key, json.dumps(cart, default=str), ex=86400)
+
+
+def write_hash(pipe: redis.client.Pipeline, key: str, cart: Dict[str, Any]) -> None:
+    """Formato atual: hash compacto"""
+    fields = encode_cart(cart)
+    pipe.hset(key, mapping=dict(zip(fields[::2], fields[1::2])))
+    pipe.expire(key, 86400)
+
+
+def used_memory(client: redis.Redis) -> int:
+    """used_memory do servidor em bytes"""
+    return int(client.info("memory")["used_memory"])
+
+
+def cleanup(client: redis.Redis, pattern: str) -> None:
+    """Remover chaves do benchmark"""
+    batch: List[str] = []
+    for key in client.scan_iter(match=pattern, count=PIPELINE_SIZE):
+        batch.append(key)
+        if len(batch) >= PIPELINE_SIZE:
+            client.unlink(*batch)
+            batch = []
+    if batch:
+        client.unlink(*batch)
+
+
+def run(client: redis.Redis, title: str, prefix: str, writer: Callable, carts: int, items: int) -> None:
+    """Gravar carrinhos em um formato e imprimir o consumo de memória"""
+    random.seed(42)  # mesmos carrinhos nos dois formatos
+    cleanup(client, f"{prefix}*")
+    before = used_memory(client)
+    started = time.perf_counter()
+
+    pipe = client.pipeline(transaction=False)
+    for usuario_id in range(1, carts + 1):
+        writer(pipe, f"{prefix}{usuario_id}", make_cart(usuario_id, items))
+        if usuario_id % PIPELINE_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
+
+    elapsed = time.perf_counter() - started
+    total = used_memory(client) - before
+    sample = f"{prefix}1"
+    print(
+        f"{title:<22} total={total / 2**20:9.1f} MiB  "
+        f"por carrinho={total / carts:6.0f} B  "
+        f"MEMORY USAGE={client.memory_usage(sample)} B  "
+        f"encoding={client.object('encoding', sample)}  "
+        f"({elapsed:.0f}s)"
+    )
+    cleanup(client, f"{prefix}*")
+
+
+def main() -> int:
+    """Executar o benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark de memória do cache de carrinhos")
+    parser.add_argument("--redis-url", default=REDIS_URL)
+    parser.add_argument("--carts", type=int, default=1_000_000)
+    parser.add_argument("--items", type=int, default=3, help="Itens por carrinho")
+    args = parser.parse_args()
+
+    client = redis.from_url(args.redis_url, decode_responses=True)
+    client.ping()
+
+    print("=" * 100)
+    print(f"{args.carts} carrinhos com {args.items} itens — {args.redis_url}")
+    print("=" * 100)
+    run(client, "JSON (cart:user)", "bench:cart:user:", write_json, args.carts, args.items)
+    run(client, "hash (cart:h)", "bench:cart:h:", write_hash, args.carts, args.items)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except redis.ConnectionError:
+        print("\n❌ ERRO: Não foi possível conectar ao Redis\n")
+        sys.exit(1)
@@ -16,6 +16,13 @@ class Settings(BaseSettings):
     # Redis Configuration (for cart session caching)
     redis_url: str = "redis://localhost:6379/2"
     redis_ttl: int = 86400  # 24 hours in seconds
+    redis_max_connections: int = 50  # connection pool size per worker process
+    redis_pool_timeout: float = 1.0  # seconds to wait for a free pooled connection
+    redis_socket_timeout: float = 1.0  # seconds
+    redis_connect_timeout: float = 1.0  # seconds
+    redis_breaker_failure_threshold: int = 3  # consecutive failures that open the circuit
+    redis_breaker_cooldown: float = 5.0  # seconds open before a half-open trial
+    redis_health_interval: float = 2.0  # seconds between background PINGs
     
     # CORS Configuration
     allowed_origins: list = ["http://localhost:3000", "http://localhost:5173"]
@@ -23,6 +30,7 @@ class Settings(BaseSettings):
     # Environment
     environment: str = "development"
     debug: bool = True
+    db_statement_header: bool = False  # X-DB-Statements response header (load tests)
     
     # API Configuration
     api_prefix: str = "/api/v1"
@@ -33,9 +41,46 @@ class Settings(BaseSettings):
     catalog_service_url: str = "http://localhost:8002"
     auth_service_url: str = "http://localhost:8001"
     
+    # Catalog lookups (price/stock)
+    catalog_timeout: float = 2.0  # seconds
+    catalog_cache_ttl: int = 60  # seconds a price/stock entry is reused locally
+    catalog_cache_max_entries: int = 10000
+    catalog_batch_window_ms: int = 2  # concurrent lookups within this window share one request
+    catalog_batch_max_ids: int = 200  # IDs per catalog request
+    
     # Cart Configuration
     max_quantity_per_item: int = 99
     cart_expiration_days: int = 30
+    max_batch_operations: int = 50
+    guest_cart_ttl: int = 604800  # 7 days; guest carts live only in Redis
+    
+    # Abandoned-cart sweeper (expires carts idle longer than cart_expiration_days)
+    cart_sweeper_enabled: bool = True
+    cart_sweeper_delete: bool = True  # False: only deactivate (items are kept)
+    cart_sweeper_interval: int = 3600  # seconds between passes
+    cart_sweeper_batch_size: int = 500  # carts per transaction
+    cart_sweeper_pause: float = 0.5  # seconds between batches
+    cart_sweeper_lock_timeout_ms: int = 2000
+    cart_sweeper_peak_hours: str = "8-23"  # local hours when the sweeper stays idle ("" = never)
+    
+    # Cart Store
+    # "database": PostgreSQL is authoritative, Redis is a write-through cache
+    # "redis": live carts are Redis hashes persisted by the write-behind worker
+    cart_store_mode: str = "database"
+    write_behind_interval: int = 3  # seconds between flushes
+    write_behind_batch_size: int = 500  # journal entries per batch
+    write_behind_claim_idle_ms: int = 30000  # replay entries pending longer than this
+    write_behind_stream_maxlen: int = 100000
+    
+    # Saved-for-later and wishlist lists (Redis sorted sets persisted periodically)
+    saved_items_max: int = 200  # books per list
+    saved_items_page_size: int = 20
+    saved_items_persist_interval: int = 30  # seconds between persistence passes
+    saved_items_persist_batch_size: int = 500  # lists per transaction
+    
+    # Cart activity events (Redis Stream cart:events)
+    cart_events_enabled: bool = True
+    cart_events_maxlen: int = 100000  # approximate cap (MAXLEN ~)
     
     @validator("redis_ttl")
     def validate_redis_ttl(cls, v):
@@ -49,6 +94,12 @@ class Settings(BaseSettings):
             raise ValueError("Max quantity per item must be between 1 and 999")
         return v
     
+    @validator("cart_store_mode")
+    def validate_cart_store_mode(cls, v):
+        if v not in ("database", "redis"):
+            raise ValueError("Cart store mode must be 'database' or 'redis'")
+        return v
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
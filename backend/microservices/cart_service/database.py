@@ -3,7 +3,9 @@
 # Implementa RNF1.1 para performance
 
 import os
-from sqlalchemy import create_engine
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
@@ -20,6 +22,30 @@ engine = create_engine(
     echo=settings.debug
 )
 
+# Contagem de statements SQL por requisição (testes de carga, diagnóstico de N+1)
+_statement_counter: ContextVar[Optional[List[int]]] = ContextVar("statement_counter", default=None)
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    """Increment the statement counter of the current request, if any"""
+    counter = _statement_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def start_statement_count() -> List[int]:
+    """
+    Start counting SQL statements in the current context
+    
+    Returns:
+        Single-element list holding the running count (shared with child tasks)
+    """
+    counter = [0]
+    _statement_counter.set(counter)
+    return counter
+
+
 # Criar sessão do banco
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
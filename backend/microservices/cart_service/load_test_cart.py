@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do Cart Service
+
+Simula milhares de usuários concorrentes executando visualizar/adicionar/
+atualizar/remover contra um Cart Service local e imprime, por endpoint,
+vazão (req/s), p50/p95/p99 e statements SQL por requisição (cabeçalho
+X-DB-Statements). Um catálogo stub é servido em processo, de modo que só
+PostgreSQL e Redis locais são necessários (o SQL do serviço usa ON CONFLICT,
+RETURNING e SKIP LOCKED do PostgreSQL, e o store usa scripts Lua do Redis).
+
+Uso:
+    # sobe o serviço (uvicorn) apontando para o catálogo stub
+    python load_test_cart.py --start-service [--users 2000] [--actions 20]
+
+    # serviço já em execução (DB_STATEMENT_HEADER=true, CATALOG_SERVICE_URL=stub)
+    python load_test_cart.py --base-url http://localhost:8003/api/v1
+
+    # baseline e detecção de regressão (sai com código 1 se p99 piorar)
+    python load_test_cart.py --start-service --save baseline.json
+    python load_test_cart.py --start-service --compare baseline.json --max-regression 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+API_PREFIX = "/api/v1"
+
+# Mistura de operações de um usuário típico (pesos relativos)
+ACTION_WEIGHTS = {"view": 50, "add": 25, "update": 15, "remove": 10}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentil por interpolação linear"""
+    ordered = sorted(samples)
+    pos = (len(ordered) - 1) * pct / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+# ========== Catálogo stub ==========
+
+class CatalogStubHandler(BaseHTTPRequestHandler):
+    """Responde /livros/disponibilidade com preço e estoque fixos"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != f"{API_PREFIX}/livros/disponibilidade":
+            self.send_error(404)
+            return
+        ids = [int(value) for value in parse_qs(url.query).get("ids", [])]
+        body = json.dumps([
+            {"id": livro_id, "preco": f"{10 + livro_id % 90}.90", "estoque": 10_000, "ativo": True}
+            for livro_id in ids
+        ]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_catalog_stub(port: int) -> ThreadingHTTPServer:
+    """Servir o catálogo stub em uma thread"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), CatalogStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ========== Serviço ==========
+
+def start_service(args: argparse.Namespace) -> subprocess.Popen:
+    """Subir o Cart Service com uvicorn apontando para o catálogo stub"""
+    env = dict(os.environ)
+    env.update({
+        "CATALOG_SERVICE_URL": f"http://127.0.0.1:{args.catalog_port}",
+        "DB_STATEMENT_HEADER": "true",
+        "DEBUG": "false",
+        "CART_SWEEPER_ENABLED": "false",
+    })
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    if args.redis_url:
+        env["REDIS_URL"] = args.redis_url
+
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--port", str(args.port),
+            "--workers", str(args.workers),
+            "--log-level", "warning",
+        ],
+        cwd=SERVICE_DIR,
+        env=env,
+    )
+
+
+def wait_until_healthy(base_url: str, timeout: float = 30.0) -> None:
+    """Aguardar GET /health responder"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Cart Service não respondeu em {timeout:.0f}s")
+
+
+# ========== Carga ==========
+
+@dataclass
+class EndpointStats:
+    """Amostras de um endpoint"""
+    latencies: List[float] = field(default_factory=list)
+    statements: List[int] = field(default_factory=list)
+    errors: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+
+
+class LoadTest:
+    """Usuários simulados em laço fechado, com limite de requisições em voo"""
+
+    def __init__(self, base_url: str, args: argparse.Namespace):
+        self.base_url = base_url
+        self.args = args
+        self.stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, path: str, **kwargs) -> Optional[dict]:
+        """Executar uma requisição e registrar latência e statements"""
+        async with self.semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+            except httpx.HTTPError:
+                self.stats[endpoint].errors[0] += 1
+                return None
+            elapsed = (time.perf_counter() - started) * 1000
+
+        stats = self.stats[endpoint]
+        stats.latencies.append(elapsed)
+        if "X-DB-Statements" in response.headers:
+            stats.statements.append(int(response.headers["X-DB-Statements"]))
+        if response.status_code >= 400:
+            # 404 em update/remove de item já removido faz parte da mistura
+            stats.errors[response.status_code] += 1
+            return None
+        return response.json()
+
+    async def user(self, client: httpx.AsyncClient, usuario_id: int) -> None:
+        """Sessão de um usuário: ações sorteadas sobre os próprios itens"""
+        rng = random.Random(usuario_id)
+        actions = list(ACTION_WEIGHTS)
+        weights = list(ACTION_WEIGHTS.values())
+        itens: List[int] = []
+
+        for _ in range(self.args.actions):
+            action = rng.choices(actions, weights)[0]
+            if action in ("update", "remove") and not itens:
+                action = "add"
+
+            if action == "view":
+                await self.request(client, "GET /carrinho", "GET", f"/carrinho/{usuario_id}")
+            elif action == "add":
+                livro_id = rng.randint(1, self.args.books)
+                if await self.request(
+                    client, "POST /add", "POST", f"/carrinho/{usuario_id}/add",
+                    json={"livro_id": livro_id, "quantidade": 1}
+                ) is not None and livro_id not in itens:
+                    itens.append(livro_id)
+            elif action == "update":
+                livro_id = rng.choice(itens)
+                await self.request(
+                    client, "PUT /update", "PUT", f"/carrinho/{usuario_id}/update/{livro_id}",
+                    json={"quantidade": rng.randint(1, 5)}
+                )
+            else:
+                livro_id = itens.pop(rng.randrange(len(itens)))
+                await self.request(client, "DELETE /remove", "DELETE", f"/carrinho/{usuario_id}/remove/{livro_id}")
+
+            if self.args.think_ms:
+                await asyncio.sleep(rng.uniform(0, self.args.think_ms) / 1000)
+
+    async def run(self) -> float:
+        """Executar todos os usuários; retorna a duração em segundos"""
+        limits = httpx.Limits(max_connections=self.args.concurrency, max_keepalive_connections=self.args.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=30.0) as client:
+            first = self.args.first_user_id
+            started = time.perf_counter()
+            await asyncio.gather(*(self.user(client, first + i) for i in range(self.args.users)))
+            elapsed = time.perf_counter() - started
+
+            if self.args.cleanup:
+                await asyncio.gather(*(
+                    self.request(client, "cleanup", "DELETE", f"/carrinho/{first + i}/clear")
+                    for i in range(self.args.users)
+                ))
+                self.stats.pop("cleanup", None)
+        return elapsed
+
+
+# ========== Relatório ==========
+
+def summarize(stats: Dict[str, EndpointStats], elapsed: float) -> Dict[str, dict]:
+    """Resumo por endpoint (ms, req/s, statements)"""
+    summary = {}
+    for endpoint, data in sorted(stats.items()):
+        if not data.latencies:
+            continue
+        summary[endpoint] = {
+            "requests": len(data.latencies),
+            "rps": len(data.latencies) / elapsed,
+            "p50": percentile(data.latencies, 50),
+            "p95": percentile(data.latencies, 95),
+            "p99": percentile(data.latencies, 99),
+            "max": max(data.latencies),
+            "errors": dict(data.errors),
+            "statements_avg": sum(data.statements) / len(data.statements) if data.statements else None,
+            "statements_max": max(data.statements) if data.statements else None,
+        }
+    return summary
+
+
+def report(summary: Dict[str, dict], elapsed: float) -> None:
+    """Imprimir tabela por endpoint"""
+    total = sum(row["requests"] for row in summary.values())
+    print(f"\n{total} requisições em {elapsed:.1f}s ({total / elapsed:.0f} req/s)\n")
+    print(f"{'endpoint':<16} {'n':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'sql/req':>8} {'erros':>6}")
+    for endpoint, row in summary.items():
+        statements = f"{row['statements_avg']:.1f}" if row["statements_avg"] is not None else "-"
+        errors = sum(row["errors"].values())
+        print(
+            f"{endpoint:<16} {row['requests']:>7} {row['rps']:>8.0f} "
+            f"{row['p50']:>6.1f}ms {row['p95']:>6.1f}ms {row['p99']:>6.1f}ms {row['max']:>6.1f}ms "
+            f"{statements:>8} {errors:>6}"
+        )
+
+
+def compare(summary: Dict[str, dict], baseline: Dict[str, dict], max_regression: float) -> List[str]:
+    """Regressões de p99 e de statements por requisição em relação ao baseline"""
+    regressions = []
+    for endpoint, row in summary.items():
+        base = baseline.get(endpoint)
+        if not base:
+            continue
+        if row["p99"] > base["p99"] * (1 + max_regression):
+            regressions.append(f"{endpoint}: p99 {base['p99']:.1f}ms -> {row['p99']:.1f}ms")
+        if row["statements_avg"] is not None and base.get("statements_avg") is not None \
+                and row["statements_avg"] > base["statements_avg"] + 0.5:
+            regressions.append(
+                f"{endpoint}: statements/req {base['statements_avg']:.1f} -> {row['statements_avg']:.1f}"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga do Cart Service")
+    parser.add_argument("--base-url", default=None, help="Serviço já em execução (ex.: http://localhost:8003/api/v1)")
+    parser.add_argument("--start-service", action="store_true", help="Subir o serviço com uvicorn")
+    parser.add_argument("--port", type=int, default=8013, help="Porta do serviço com --start-service")
+    parser.add_argument("--workers", type=int, default=1, help="Workers uvicorn com --start-service")
+    parser.add_argument("--catalog-port", type=int, default=8092, help="Porta do catálogo stub")
+    parser.add_argument("--database-url", default=None, help="DATABASE_URL do serviço iniciado")
+    parser.add_argument("--redis-url", default=None, help="REDIS_URL do serviço iniciado")
+    parser.add_argument("--users", type=int, default=2000, help="Usuários simulados")
+    parser.add_argument("--actions", type=int, default=20, help="Ações por usuário")
+    parser.add_argument("--concurrency", type=int, default=200, help="Requisições simultâneas em voo")
+    parser.add_argument("--books", type=int, default=500, help="Livros distintos sorteados")
+    parser.add_argument("--think-ms", type=float, default=0, help="Pausa máxima entre ações (ms)")
+    parser.add_argument("--first-user-id", type=int, default=900_000, help="Primeiro usuario_id simulado")
+    parser.add_argument("--no-cleanup", dest="cleanup", action="store_false", help="Manter os carrinhos criados")
+    parser.add_argument("--save", default=None, help="Gravar o resumo em JSON (baseline)")
+    parser.add_argument("--compare", default=None, help="Comparar com um baseline JSON")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Piora relativa de p99 tolerada")
+    args = parser.parse_args()
+
+    if not args.start_service and not args.base_url:
+        parser.error("informe --base-url ou --start-service")
+
+    catalog = start_catalog_stub(args.catalog_port)
+    process = None
+    try:
+        if args.start_service:
+            process = start_service(args)
+            base_url = f"http://127.0.0.1:{args.port}{API_PREFIX}"
+        else:
+            base_url = args.base_url.rstrip("/")
+        wait_until_healthy(base_url)
+
+        print(
+            f"{args.users} usuários x {args.actions} ações, "
+            f"{args.concurrency} requisições simultâneas contra {base_url}"
+        )
+        load_test = LoadTest(base_url, args)
+        elapsed = asyncio.run(load_test.run())
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+        catalog.shutdown()
+
+    summary = summarize(load_test.stats, elapsed)
+    report(summary, elapsed)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nResumo gravado em {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(summary, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressões:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nSem regressões em relação ao baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,20 @@
 # Microserviço responsável pelo carrinho de compras
 # Implementa arquitetura limpa com separação de responsabilidades
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from config import settings
-from database import create_tables
+from database import create_tables, start_statement_count
 from routes import router
+from services.redis_service import redis_service
+from services.write_behind_service import write_behind_service
+from services.catalog_client import catalog_client
+from services.cart_sweeper_service import cart_sweeper_service
+from services.saved_items_service import saved_items_persister
+from metrics import metrics_service, DB_STATEMENTS
 
 
 # Create FastAPI application
@@ -29,6 +36,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def count_db_statements(request: Request, call_next):
+    """Count SQL statements per request (metric and optional X-DB-Statements header)"""
+    counter = start_statement_count()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    if route is not None:
+        DB_STATEMENTS.observe(counter[0], route=f"{request.method} {route.path}")
+    if settings.db_statement_header:
+        response.headers["X-DB-Statements"] = str(counter[0])
+    return response
+
+
 # Include API routes
 app.include_router(router, prefix=settings.api_prefix)
 
@@ -38,15 +58,32 @@ async def startup_event():
     """Initialize application on startup"""
     # Create database tables
     create_tables()
+    redis_service.start_health_probe()
+    if settings.cart_store_mode == "redis":
+        write_behind_service.start()
+    if settings.cart_sweeper_enabled:
+        cart_sweeper_service.start()
+    saved_items_persister.start()
     print("Cart Service started successfully!")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on application shutdown"""
+    cart_sweeper_service.stop()
+    saved_items_persister.stop()
+    write_behind_service.stop()
+    redis_service.stop_health_probe()
+    await catalog_client.close()
     print("Cart Service shutting down...")
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (per worker process)"""
+    return PlainTextResponse(metrics_service.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Migração do cache de carrinhos: JSON (cart:user:{id}) -> hash compacto (cart:h:{id})
+
+O serviço só lê as chaves novas; sem esta migração os carrinhos antigos são
+recarregados do PostgreSQL no primeiro acesso e as chaves JSON expiram com o
+TTL. A migração evita esse pico de cache misses após o deploy: converte cada
+chave (preservando o TTL, sem sobrescrever um hash já gravado pelo serviço) e
+remove a chave antiga com UNLINK.
+
+Uso:
+    python migrate_cart_cache.py [--batch 500] [--dry-run]
+"""
+
+import argparse
+import json
+import sys
+
+from config import settings
+from services.redis_service import encode_cart, redis_service
+
+LEGACY_PATTERN = "cart:user:*"
+LEGACY_PREFIX = "cart:user:"
+
+# Convert only if the hash does not exist yet (the service may have written a newer cart)
+# KEYS[1] = hash key; ARGV[1] = ttl in ms; ARGV[2..] = field/value pairs
+CONVERT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('PEXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+def main() -> int:
+    """Executar a migração"""
+    parser = argparse.ArgumentParser(description="Migrar cache de carrinhos para hashes compactos")
+    parser.add_argument("--batch", type=int, default=500, help="Chaves por SCAN/pipeline")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas contar as chaves")
+    args = parser.parse_args()
+
+    client = redis_service.redis_client
+    if client is None or not redis_service.is_connected():
+        print(f"❌ Redis indisponível em {settings.redis_url}")
+        return 1
+    convert = client.register_script(CONVERT_SCRIPT)
+
+    scanned = converted = skipped = 0
+    for keys in batched(client.scan_iter(match=LEGACY_PATTERN, count=args.batch), args.batch):
+        scanned += len(keys)
+        if args.dry_run:
+            continue
+
+        # Um round trip para ler todas as chaves do lote
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+            pipe.pttl(key)
+        results = pipe.execute()
+
+        pipe = client.pipeline(transaction=False)
+        for key, payload, ttl in zip(keys, results[::2], results[1::2]):
+            if payload is None:
+                continue
+            try:
+                cart_data = json.loads(payload)
+                fields = encode_cart(cart_data)
+            except (ValueError, KeyError, TypeError, ArithmeticError) as e:
+                print(f"   Chave {key} ignorada: {e}")
+                skipped += 1
+                continue
+            usuario_id = int(key[len(LEGACY_PREFIX):])
+            ttl_ms = ttl if ttl and ttl > 0 else settings.redis_ttl * 1000
+            convert(keys=[redis_service.cart_keys(usuario_id)[0]], args=[ttl_ms, *fields], client=pipe)
+            converted += 1
+        pipe.unlink(*keys)
+        pipe.execute()
+
+    action = "encontradas" if args.dry_run else "migradas"
+    print(f"✅ {scanned} chaves {action} ({converted} convertidas, {skipped} ignoradas)")
+    return 0
+
+
+def batched(iterable, size):
+    """Agrupar um iterável em listas de até size elementos"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,7 @@
 # Define as entidades Carrinho, ItemCarrinho e cálculos
 # Implementa o modelo de domínio conforme diagrama UML
 
-from sqlalchemy import Column, Integer, DateTime, Boolean, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Numeric, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -16,22 +16,21 @@ class Carrinho(Base):
     id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, nullable=False)  # Referência externa
     ativo = Column(Boolean, default=True)
+    versao = Column(Integer, nullable=False, default=0, server_default="0")  # Incrementada a cada alteração
+    total_itens = Column(Integer, nullable=False, default=0, server_default="0")  # Mantido a cada alteração de itens
+    valor_total = Column(Numeric(10, 2), nullable=False, default=0, server_default="0")  # Mantido a cada alteração de itens
     data_criacao = Column(DateTime, default=func.now())
-    data_atualizacao = Column(DateTime, default=func.now(), onupdate=func.now())
+    data_atualizacao = Column(DateTime, default=func.now(), onupdate=func.now(), index=True)  # Varredura de carrinhos abandonados
     
     # Relacionamentos (apenas dentro do mesmo microserviço)
     itens = relationship("ItemCarrinho", back_populates="carrinho", cascade="all, delete-orphan")
-    
-    @property
-    def total_itens(self):
-        return sum(item.quantidade for item in self.itens)
-    
-    @property
-    def valor_total(self):
-        return sum(item.preco_unitario * item.quantidade for item in self.itens)
 
 class ItemCarrinho(Base):
     __tablename__ = "itens_carrinho"
+    __table_args__ = (
+        # Um item por livro em cada carrinho (alvo do upsert ON CONFLICT)
+        UniqueConstraint("carrinho_id", "livro_id", name="uq_itens_carrinho_carrinho_livro"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     carrinho_id = Column(Integer, ForeignKey("carrinhos.id"), nullable=False)
@@ -46,4 +45,18 @@ class ItemCarrinho(Base):
     
     @property
     def subtotal(self):
-        return self.preco_unitario * self.quantidade
\ No newline at end of file
+        return self.preco_unitario * self.quantidade
+
+class ItemSalvo(Base):
+    __tablename__ = "itens_salvos"
+    __table_args__ = (
+        # Um registro por livro em cada lista do usuário (também indexa a busca por usuario_id)
+        UniqueConstraint("usuario_id", "lista", "livro_id", name="uq_itens_salvos_usuario_lista_livro"),
+    )
+    
+    # Cópia persistente das listas mantidas no Redis (gravada periodicamente)
+    id = Column(Integer, primary_key=True, index=True)
+    usuario_id = Column(Integer, nullable=False)  # Referência externa
+    lista = Column(String(20), nullable=False)  # "salvos" (para depois) ou "desejos"
+    livro_id = Column(Integer, nullable=False)  # Referência externa
+    data_criacao = Column(DateTime, nullable=False)  # Momento em que o livro foi salvo (UTC)
\ No newline at end of file
@@ -1,4 +1,5 @@
 # Repositories package initialization
-from .cart_repository import CartRepository
+from .cart_repository import CartRepository, VersionConflictError
+from .saved_items_repository import SavedItemsRepository
 
-__all__ = ["CartRepository"]
+__all__ = ["CartRepository", "VersionConflictError", "SavedItemsRepository"]
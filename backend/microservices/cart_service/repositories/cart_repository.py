@@ -1,14 +1,36 @@
 # Cart Repository - Data access layer for cart operations
 # Implements repository pattern for cart data access
 
-from typing import Optional, List
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from typing import Optional, List, Dict, Any, Tuple, NamedTuple
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_, func, update, delete, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, timedelta
 from decimal import Decimal
 
 from models import Carrinho, ItemCarrinho
 
 
+class VersionConflictError(Exception):
+    """Raised when a cart no longer has the version a conditional mutation expected"""
+
+
+class CartTotals(NamedTuple):
+    """Cart columns as left by an item mutation"""
+    versao: int
+    total_itens: int
+    valor_total: Decimal
+    data_atualizacao: datetime
+
+
+class LineChange(NamedTuple):
+    """Result of a single-item mutation"""
+    quantidade: int  # 0 if the item was removed
+    preco_unitario: Decimal
+    totals: CartTotals
+
+
 class CartRepository:
     """Repository for cart data operations"""
     
@@ -31,11 +53,13 @@ class CartRepository:
         self.db.add(db_cart)
         self.db.commit()
         self.db.refresh(db_cart)
+        # A new cart has no items: serializing it must not lazy-load them
+        set_committed_value(db_cart, "itens", [])
         return db_cart
     
-    def get_cart_by_id(self, cart_id: int) -> Optional[Carrinho]:
+    def get_cart_with_items(self, cart_id: int) -> Optional[Carrinho]:
         """
-        Get cart by ID
+        Get cart by ID with its items eagerly loaded (one joined SELECT)
         
         Args:
             cart_id: Cart ID
@@ -43,58 +67,64 @@ class CartRepository:
         Returns:
             Cart instance or None if not found
         """
-        return self.db.query(Carrinho).filter(Carrinho.id == cart_id).first()
+        return self.db.query(Carrinho).options(
+            joinedload(Carrinho.itens)
+        ).filter(Carrinho.id == cart_id).execution_options(populate_existing=True).one_or_none()
     
-    def get_active_cart_by_user(self, usuario_id: int) -> Optional[Carrinho]:
+    def get_active_cart_by_user(self, usuario_id: int, with_items: bool = False) -> Optional[Carrinho]:
         """
         Get active cart for a user
         
         Args:
             usuario_id: User ID
+            with_items: Load the items in the same query (joined load)
             
         Returns:
             Active cart instance or None if not found
         """
-        return self.db.query(Carrinho).filter(
+        query = self.db.query(Carrinho).filter(
             and_(Carrinho.usuario_id == usuario_id, Carrinho.ativo == True)
-        ).first()
+        )
+        if with_items:
+            query = query.options(joinedload(Carrinho.itens))
+        return query.first()
     
-    def get_or_create_cart(self, usuario_id: int) -> Carrinho:
+    def get_or_create_cart(self, usuario_id: int, with_items: bool = False) -> Carrinho:
         """
         Get active cart for user or create if doesn't exist
         
         Args:
             usuario_id: User ID
+            with_items: Load the items in the same query (joined load)
             
         Returns:
             Cart instance
         """
-        cart = self.get_active_cart_by_user(usuario_id)
+        cart = self.get_active_cart_by_user(usuario_id, with_items)
         if not cart:
             cart = self.create_cart(usuario_id)
         return cart
     
-    def deactivate_cart(self, cart_id: int) -> bool:
+    def _load_aggregate(self, cart_id: int) -> Carrinho:
         """
-        Deactivate a cart (set ativo = False)
+        Load the cart with its items in the current transaction and detach it
+        
+        Called by mutations right before commit: the caller gets the updated
+        aggregate from one joined SELECT, and the commit cannot expire it.
         
         Args:
             cart_id: Cart ID
             
         Returns:
-            True if successful, False otherwise
+            Detached cart instance with items loaded
         """
-        cart = self.get_cart_by_id(cart_id)
-        if not cart:
-            return False
-        
-        cart.ativo = False
-        self.db.commit()
-        return True
+        cart = self.get_cart_with_items(cart_id)
+        self.db.expunge(cart)
+        return cart
     
-    def clear_cart(self, cart_id: int) -> bool:
+    def deactivate_cart(self, cart_id: int) -> bool:
         """
-        Remove all items from cart
+        Deactivate a cart (set ativo = False) with a single UPDATE
         
         Args:
             cart_id: Cart ID
@@ -102,167 +132,445 @@ class CartRepository:
         Returns:
             True if successful, False otherwise
         """
-        cart = self.get_cart_by_id(cart_id)
-        if not cart:
-            return False
+        updated = self.db.query(Carrinho).filter(Carrinho.id == cart_id).update(
+            {Carrinho.ativo: False},
+            synchronize_session=False
+        )
+        self.db.commit()
+        return bool(updated)
+    
+    def _bump(self, cart_id: int, expected_version: Optional[int] = None) -> bool:
+        """
+        Increment cart version in the current transaction (no commit)
         
-        # Delete all items
-        self.db.query(ItemCarrinho).filter(
-            ItemCarrinho.carrinho_id == cart_id
-        ).delete()
+        Item mutations bump first, so the cart row lock serializes
+        concurrent writers of the same cart. With expected_version the
+        bump is a compare-and-set: nothing is read or locked beforehand.
         
-        self.db.commit()
-        return True
+        Returns:
+            True if the cart exists
+            
+        Raises:
+            VersionConflictError: If the cart is not at expected_version (transaction rolled back)
+        """
+        query = self.db.query(Carrinho).filter(Carrinho.id == cart_id)
+        if expected_version is not None:
+            query = query.filter(Carrinho.versao == expected_version)
+        updated = query.update(
+            {
+                Carrinho.versao: Carrinho.versao + 1,
+                Carrinho.data_atualizacao: func.now()
+            },
+            synchronize_session=False
+        )
+        if expected_version is not None and not updated:
+            self.db.rollback()
+            raise VersionConflictError(cart_id)
+        return bool(updated)
     
-    # ========== Cart Item Operations ==========
+    def _sync_totals(self, cart_id: int) -> CartTotals:
+        """Recompute total_itens/valor_total in the current transaction (no commit)"""
+        items = select(ItemCarrinho).where(ItemCarrinho.carrinho_id == cart_id).subquery()
+        row = self.db.execute(
+            update(Carrinho).where(Carrinho.id == cart_id).values(
+                total_itens=select(
+                    func.coalesce(func.sum(items.c.quantidade), 0)
+                ).scalar_subquery(),
+                valor_total=select(
+                    func.coalesce(func.sum(items.c.quantidade * items.c.preco_unitario), 0)
+                ).scalar_subquery()
+            ).returning(
+                Carrinho.versao, Carrinho.total_itens, Carrinho.valor_total, Carrinho.data_atualizacao
+            )
+        ).one()
+        return CartTotals(*row)
     
-    def add_item(self, carrinho_id: int, livro_id: int, quantidade: int, preco_unitario: Decimal) -> ItemCarrinho:
+    def get_cart_totals(self, usuario_id: int) -> Optional[Tuple[int, Decimal, int, int]]:
         """
-        Add item to cart
+        Get stored totals of the user's active cart (no item rows loaded)
         
         Args:
-            carrinho_id: Cart ID
-            livro_id: Book ID
-            quantidade: Quantity
-            preco_unitario: Unit price
+            usuario_id: User ID
             
         Returns:
-            Created cart item instance
+            Tuple of (total_itens, valor_total, versao, id) or None if no active cart
         """
-        db_item = ItemCarrinho(
-            carrinho_id=carrinho_id,
-            livro_id=livro_id,
-            quantidade=quantidade,
-            preco_unitario=preco_unitario
-        )
-        self.db.add(db_item)
-        self.db.commit()
-        self.db.refresh(db_item)
-        return db_item
+        return self.db.query(Carrinho.total_itens, Carrinho.valor_total, Carrinho.versao, Carrinho.id).filter(
+            and_(Carrinho.usuario_id == usuario_id, Carrinho.ativo == True)
+        ).first()
     
-    def get_item_by_id(self, item_id: int) -> Optional[ItemCarrinho]:
+    def replace_cart_items(self, cart_data: Dict[str, Any]) -> bool:
         """
-        Get cart item by ID
+        Persist a live cart snapshot (write-behind) in a single transaction
+        
+        The cart row is locked and the snapshot is applied only if its
+        ``versao`` is newer than the stored one, so replays and concurrent
+        flushers are idempotent.
         
         Args:
-            item_id: Item ID
+            cart_data: Live cart dictionary (id, versao, itens)
             
         Returns:
-            Cart item instance or None if not found
+            True if applied, False if stale or cart no longer active
         """
-        return self.db.query(ItemCarrinho).filter(ItemCarrinho.id == item_id).first()
+        # Cart row locked and items loaded in one query (FOR UPDATE OF the cart only)
+        cart = self.db.query(Carrinho).options(
+            joinedload(Carrinho.itens)
+        ).filter(
+            Carrinho.id == cart_data["id"]
+        ).with_for_update(of=Carrinho).one_or_none()
+        
+        if not cart or not cart.ativo or (cart.versao or 0) >= cart_data["versao"]:
+            self.db.rollback()
+            return False
+        
+        wanted = {item["livro_id"]: item for item in cart_data["itens"]}
+        for item in list(cart.itens):
+            target = wanted.pop(item.livro_id, None)
+            if target is None:
+                cart.itens.remove(item)
+            elif item.quantidade != target["quantidade"] or item.preco_unitario != target["preco_unitario"]:
+                item.quantidade = target["quantidade"]
+                item.preco_unitario = target["preco_unitario"]
+        
+        for livro_id, target in wanted.items():
+            cart.itens.append(ItemCarrinho(
+                livro_id=livro_id,
+                quantidade=target["quantidade"],
+                preco_unitario=target["preco_unitario"]
+            ))
+        
+        cart.versao = cart_data["versao"]
+        cart.total_itens = cart_data["total_itens"]
+        cart.valor_total = cart_data["valor_total"]
+        cart.data_atualizacao = func.now()
+        self.db.commit()
+        return True
     
-    def get_item_by_book(self, carrinho_id: int, livro_id: int) -> Optional[ItemCarrinho]:
+    def clear_cart(self, cart_id: int, expected_version: Optional[int] = None) -> Optional[Carrinho]:
         """
-        Get cart item by cart ID and book ID
+        Remove all items from cart, bumping its version, in one transaction
         
         Args:
-            carrinho_id: Cart ID
-            livro_id: Book ID
+            cart_id: Cart ID
+            expected_version: Only clear if the cart is at this version
             
         Returns:
-            Cart item instance or None if not found
+            Updated cart (detached, items loaded) or None if not found
+            
+        Raises:
+            VersionConflictError: If the cart is not at expected_version
         """
-        return self.db.query(ItemCarrinho).filter(
-            and_(
-                ItemCarrinho.carrinho_id == carrinho_id,
-                ItemCarrinho.livro_id == livro_id
-            )
-        ).first()
+        if not self._bump(cart_id, expected_version):
+            self.db.rollback()
+            return None
+        
+        # Delete all items
+        self.db.query(ItemCarrinho).filter(
+            ItemCarrinho.carrinho_id == cart_id
+        ).delete(synchronize_session=False)
+        
+        self._sync_totals(cart_id)
+        cart = self._load_aggregate(cart_id)
+        self.db.commit()
+        return cart
     
-    def get_cart_items(self, carrinho_id: int) -> List[ItemCarrinho]:
+    def expire_idle_carts(
+        self,
+        idle_days: int,
+        limit: int,
+        delete_carts: bool,
+        lock_timeout_ms: int
+    ) -> Tuple[List[Tuple[int, int]], int, int]:
         """
-        Get all items in a cart
+        Expire one bounded batch of idle carts in a short transaction
+        
+        Candidates come from the data_atualizacao index, oldest first, with
+        FOR UPDATE SKIP LOCKED so carts being used are never waited on.
         
         Args:
-            carrinho_id: Cart ID
+            idle_days: Carts not updated for this many days are expired
+            limit: Maximum carts in this batch
+            delete_carts: Delete carts and items (True) or only deactivate carts
+            lock_timeout_ms: Abort instead of waiting longer for any lock
             
         Returns:
-            List of cart items
+            Tuple of ((usuario_id, id) of expired active carts, carts expired, items deleted)
         """
-        return self.db.query(ItemCarrinho).filter(
-            ItemCarrinho.carrinho_id == carrinho_id
+        self.db.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+        
+        candidates = select(Carrinho.id, Carrinho.usuario_id, Carrinho.ativo).where(
+            Carrinho.data_atualizacao < func.now() - timedelta(days=idle_days)
+        )
+        if not delete_carts:
+            candidates = candidates.where(Carrinho.ativo == True)
+        rows = self.db.execute(
+            candidates.order_by(Carrinho.data_atualizacao).limit(limit).with_for_update(skip_locked=True)
         ).all()
+        if not rows:
+            self.db.rollback()
+            return [], 0, 0
+        
+        cart_ids = [row.id for row in rows]
+        items_deleted = 0
+        if delete_carts:
+            items_deleted = self.db.execute(
+                delete(ItemCarrinho).where(ItemCarrinho.carrinho_id.in_(cart_ids))
+            ).rowcount
+            self.db.execute(delete(Carrinho).where(Carrinho.id.in_(cart_ids)))
+        else:
+            self.db.execute(
+                update(Carrinho).where(Carrinho.id.in_(cart_ids)).values(ativo=False)
+            )
+        self.db.commit()
+        
+        return [(row.usuario_id, row.id) for row in rows if row.ativo], len(cart_ids), items_deleted
     
-    def update_item_quantity(self, item_id: int, quantidade: int) -> Optional[ItemCarrinho]:
+    # ========== Cart Item Operations ==========
+    
+    def upsert_item(
+        self,
+        carrinho_id: int,
+        livro_id: int,
+        quantidade: int,
+        preco_unitario: Decimal,
+        max_quantity: int
+    ) -> Optional[LineChange]:
         """
-        Update cart item quantity
+        Add item or increase its quantity in one statement, bumping the cart version
+        
+        INSERT ... ON CONFLICT (carrinho_id, livro_id) DO UPDATE, guarded so
+        the resulting quantity never exceeds max_quantity. Runs as a single
+        transaction.
         
         Args:
-            item_id: Item ID
-            quantidade: New quantity
+            carrinho_id: Cart ID
+            livro_id: Book ID
+            quantidade: Quantity to add
+            preco_unitario: Unit price (kept if the item already exists)
+            max_quantity: Maximum quantity per item
             
         Returns:
-            Updated cart item instance or None if not found
+            New quantity, price and cart totals, or None if it would exceed max_quantity
         """
-        item = self.get_item_by_id(item_id)
-        if not item:
+        stmt = pg_insert(ItemCarrinho).values(
+            carrinho_id=carrinho_id,
+            livro_id=livro_id,
+            quantidade=quantidade,
+            preco_unitario=preco_unitario
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ItemCarrinho.carrinho_id, ItemCarrinho.livro_id],
+            set_={
+                "quantidade": ItemCarrinho.quantidade + stmt.excluded.quantidade,
+                "data_atualizacao": func.now()
+            },
+            where=ItemCarrinho.quantidade + stmt.excluded.quantidade <= max_quantity
+        ).returning(ItemCarrinho.quantidade, ItemCarrinho.preco_unitario)
+        
+        self._bump(carrinho_id)
+        row = self.db.execute(stmt).first()
+        if row is None:
+            self.db.rollback()
             return None
         
-        item.quantidade = quantidade
+        totals = self._sync_totals(carrinho_id)
         self.db.commit()
-        self.db.refresh(item)
-        return item
+        return LineChange(row.quantidade, row.preco_unitario, totals)
     
-    def delete_item(self, item_id: int) -> bool:
+    def set_item_quantity(
+        self,
+        carrinho_id: int,
+        livro_id: int,
+        quantidade: int,
+        expected_version: Optional[int] = None
+    ) -> Optional[LineChange]:
         """
-        Delete cart item
+        Set item quantity (0 deletes it) in one statement, bumping the cart version
         
         Args:
-            item_id: Item ID
+            carrinho_id: Cart ID
+            livro_id: Book ID
+            quantidade: New quantity
+            expected_version: Only apply if the cart is at this version
             
         Returns:
-            True if successful, False otherwise
+            New quantity, price and cart totals, or None if the item does not exist
+            
+        Raises:
+            VersionConflictError: If the cart is not at expected_version
         """
-        item = self.get_item_by_id(item_id)
-        if not item:
-            return False
+        match = and_(
+            ItemCarrinho.carrinho_id == carrinho_id,
+            ItemCarrinho.livro_id == livro_id
+        )
+        if quantidade == 0:
+            stmt = delete(ItemCarrinho).where(match).returning(ItemCarrinho.preco_unitario)
+        else:
+            stmt = update(ItemCarrinho).where(match).values(
+                quantidade=quantidade
+            ).returning(ItemCarrinho.preco_unitario)
         
-        self.db.delete(item)
+        self._bump(carrinho_id, expected_version)
+        preco_unitario = self.db.execute(stmt).scalar()
+        if preco_unitario is None:
+            self.db.rollback()
+            return None
+        
+        totals = self._sync_totals(carrinho_id)
         self.db.commit()
-        return True
+        return LineChange(quantidade, preco_unitario, totals)
     
-    def delete_item_by_book(self, carrinho_id: int, livro_id: int) -> bool:
+    def lock_cart_lines(
+        self,
+        carrinho_id: int,
+        expected_version: Optional[int] = None
+    ) -> Dict[int, Tuple[int, Decimal]]:
         """
-        Delete cart item by book ID
+        Bump the cart version (taking the cart row lock) and read its lines
+        
+        Opens a transaction that must be finished with apply_item_changes()
+        or rollback().
         
         Args:
             carrinho_id: Cart ID
-            livro_id: Book ID
+            expected_version: Only proceed if the cart is at this version
             
         Returns:
-            True if successful, False otherwise
+            Mapping of livro_id to (quantidade, preco_unitario)
+            
+        Raises:
+            VersionConflictError: If the cart is not at expected_version
         """
-        item = self.get_item_by_book(carrinho_id, livro_id)
-        if not item:
-            return False
-        
-        self.db.delete(item)
-        self.db.commit()
-        return True
+        self._bump(carrinho_id, expected_version)
+        rows = self.db.query(
+            ItemCarrinho.livro_id, ItemCarrinho.quantidade, ItemCarrinho.preco_unitario
+        ).filter(ItemCarrinho.carrinho_id == carrinho_id).all()
+        return {livro_id: (quantidade, preco) for livro_id, quantidade, preco in rows}
     
-    def get_cart_total_items(self, carrinho_id: int) -> int:
+    def lock_cart_items(self, carrinho_id: int, expected_version: Optional[int] = None) -> Dict[int, int]:
         """
-        Get total number of items in cart
+        Like lock_cart_lines(), returning only quantities
         
         Args:
             carrinho_id: Cart ID
+            expected_version: Only proceed if the cart is at this version
             
         Returns:
-            Total number of items
+            Mapping of livro_id to quantidade
         """
-        items = self.get_cart_items(carrinho_id)
-        return sum(item.quantidade for item in items)
+        return {
+            livro_id: quantidade
+            for livro_id, (quantidade, _) in self.lock_cart_lines(carrinho_id, expected_version).items()
+        }
     
-    def get_cart_total_value(self, carrinho_id: int) -> Decimal:
+    def apply_item_changes(
+        self,
+        carrinho_id: int,
+        quantities: Dict[int, int],
+        prices: Dict[int, Decimal],
+        removed: List[int],
+        update_prices: bool = False
+    ) -> Carrinho:
         """
-        Get total value of cart
+        Apply a set of item changes with set-based SQL and commit
+        
+        One multi-row INSERT ... ON CONFLICT DO UPDATE for new and changed
+        items and one DELETE ... WHERE livro_id IN (...) for removed ones.
         
         Args:
             carrinho_id: Cart ID
+            quantities: Final quantity per livro_id (new or changed items)
+            prices: Unit price per livro_id (used for new items)
+            removed: Book IDs to delete
+            update_prices: Also overwrite the price of existing items
+            
+        Returns:
+            Updated cart (detached, items loaded)
+        """
+        if quantities:
+            stmt = pg_insert(ItemCarrinho).values([
+                {
+                    "carrinho_id": carrinho_id,
+                    "livro_id": livro_id,
+                    "quantidade": quantidade,
+                    "preco_unitario": prices[livro_id]
+                }
+                for livro_id, quantidade in quantities.items()
+            ])
+            changes = {
+                "quantidade": stmt.excluded.quantidade,
+                "data_atualizacao": func.now()
+            }
+            if update_prices:
+                changes["preco_unitario"] = stmt.excluded.preco_unitario
+            self.db.execute(stmt.on_conflict_do_update(
+                index_elements=[ItemCarrinho.carrinho_id, ItemCarrinho.livro_id],
+                set_=changes
+            ))
+        
+        if removed:
+            self.db.execute(delete(ItemCarrinho).where(and_(
+                ItemCarrinho.carrinho_id == carrinho_id,
+                ItemCarrinho.livro_id.in_(removed)
+            )))
+        
+        self._sync_totals(carrinho_id)
+        cart = self._load_aggregate(carrinho_id)
+        self.db.commit()
+        return cart
+    
+    def merge_items(
+        self,
+        usuario_id: int,
+        lines: Dict[int, Tuple[int, Decimal]],
+        max_quantity: int
+    ) -> Carrinho:
+        """
+        Merge lines into the user's active cart in a single transaction
+        
+        One multi-row INSERT ... ON CONFLICT DO UPDATE adds the quantities,
+        clamped to max_quantity; existing items keep their price. The cart
+        is created in the same transaction if the user has none.
+        
+        Args:
+            usuario_id: User ID
+            lines: Mapping of livro_id to (quantidade, preco_unitario)
+            max_quantity: Maximum quantity per item
             
         Returns:
-            Total cart value
+            Updated cart (detached, items loaded)
         """
-        items = self.get_cart_items(carrinho_id)
-        return sum(item.preco_unitario * item.quantidade for item in items)
+        cart = self.get_active_cart_by_user(usuario_id)
+        if not cart:
+            cart = Carrinho(usuario_id=usuario_id, ativo=True)
+            self.db.add(cart)
+            self.db.flush()
+        cart_id = cart.id
+        
+        self._bump(cart_id)
+        stmt = pg_insert(ItemCarrinho).values([
+            {
+                "carrinho_id": cart_id,
+                "livro_id": livro_id,
+                "quantidade": min(quantidade, max_quantity),
+                "preco_unitario": preco_unitario
+            }
+            for livro_id, (quantidade, preco_unitario) in lines.items()
+        ])
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[ItemCarrinho.carrinho_id, ItemCarrinho.livro_id],
+            set_={
+                "quantidade": func.least(ItemCarrinho.quantidade + stmt.excluded.quantidade, max_quantity),
+                "data_atualizacao": func.now()
+            }
+        ))
+        
+        self._sync_totals(cart_id)
+        cart = self._load_aggregate(cart_id)
+        self.db.commit()
+        return cart
+    
+    def rollback(self) -> None:
+        """Discard the current transaction"""
+        self.db.rollback()
@@ -0,0 +1,57 @@
+# Saved Items Repository - Data access layer for saved-for-later and wishlist lists
+# PostgreSQL keeps a periodic copy of the Redis sorted sets (read back when a list is not in Redis)
+
+from typing import List, Dict, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, insert, tuple_
+from datetime import datetime
+
+from models import ItemSalvo
+
+
+class SavedItemsRepository:
+    """Repository for saved list data operations"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_items(self, usuario_id: int, lista: str) -> List[Tuple[int, datetime]]:
+        """
+        Get the persisted content of a list
+
+        Args:
+            usuario_id: User ID
+            lista: List name
+
+        Returns:
+            (livro_id, data_criacao) pairs
+        """
+        rows = self.db.query(ItemSalvo.livro_id, ItemSalvo.data_criacao).filter(
+            and_(ItemSalvo.usuario_id == usuario_id, ItemSalvo.lista == lista)
+        ).all()
+        return [(livro_id, data_criacao) for livro_id, data_criacao in rows]
+
+    def replace_lists(self, lists: Dict[Tuple[int, str], List[Tuple[int, datetime]]]) -> None:
+        """
+        Replace the persisted content of several lists in a single transaction
+
+        One DELETE ... WHERE (usuario_id, lista) IN (...) and one multi-row
+        INSERT, however many lists and items the batch holds.
+
+        Args:
+            lists: Mapping of (usuario_id, lista) to (livro_id, save time) pairs
+        """
+        if not lists:
+            return
+
+        self.db.execute(delete(ItemSalvo).where(
+            tuple_(ItemSalvo.usuario_id, ItemSalvo.lista).in_(list(lists))
+        ))
+        rows = [
+            {"usuario_id": usuario_id, "lista": lista, "livro_id": livro_id, "data_criacao": data_salvo}
+            for (usuario_id, lista), itens in lists.items()
+            for livro_id, data_salvo in itens
+        ]
+        if rows:
+            self.db.execute(insert(ItemSalvo), rows)
+        self.db.commit()
@@ -1,50 +1,143 @@
 # Cart Routes - API endpoints for cart operations
-# Implements /carrinho, /carrinho/add, /carrinho/remove, /carrinho/update endpoints
+# Implements /carrinho, /carrinho/add, /carrinho/remove, /carrinho/update, /carrinho/merge, /carrinho/listas and /convidado endpoints
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response, status
 from sqlalchemy.orm import Session
 from decimal import Decimal
+from typing import Dict, Any, Iterable, Optional
 
 from database import get_db
 from services.cart_service import CartService
+from services.redis_service import redis_service
+from services.live_cart_service import LiveCartService
+from services.write_behind_service import redis_cart_store
+from services.catalog_client import catalog_client, CatalogBook, CatalogUnavailableError
+from services.guest_cart_service import guest_cart_service
+from services.saved_items_service import SavedItemsService
+from config import settings
 from schemas.cart_schemas import (
     AddToCartRequest,
     UpdateCartItemRequest,
     RemoveFromCartRequest,
+    BatchCartRequest,
+    MergeCartRequest,
+    SaveItemRequest,
+    MoveToCartRequest,
     CartResponse,
+    CartCountResponse,
     CartDetailResponse,
     CartActionResponse,
-    CartSummary
+    CartSummary,
+    CartValidationResponse,
+    GuestCartResponse,
+    GuestCartActionResponse,
+    SavedListResponse,
+    GUEST_TOKEN_PATTERN,
+    SAVED_LIST_PATTERN
 )
-from models import Carrinho
-
 # Create router
 router = APIRouter()
 
 
-# Helper function to convert cart to response
-def cart_to_response(cart: Carrinho) -> CartResponse:
-    """Convert cart model to response schema"""
-    return CartResponse(
-        id=cart.id,
-        usuario_id=cart.usuario_id,
-        ativo=cart.ativo,
-        itens=[
-            {
-                "id": item.id,
-                "livro_id": item.livro_id,
-                "quantidade": item.quantidade,
-                "preco_unitario": item.preco_unitario,
-                "subtotal": item.subtotal,
-                "data_criacao": item.data_criacao,
-                "data_atualizacao": item.data_atualizacao
-            }
-            for item in cart.itens
-        ],
-        total_itens=cart.total_itens,
-        valor_total=cart.valor_total,
-        data_criacao=cart.data_criacao,
-        data_atualizacao=cart.data_atualizacao
+def get_cart_service(db: Session) -> CartService:
+    """Pick the cart implementation configured by cart_store_mode"""
+    if settings.cart_store_mode == "redis" and redis_cart_store.is_available():
+        return LiveCartService(db)
+    return CartService(db)
+
+
+async def resolve_books(livro_ids: Iterable[int]) -> Dict[int, CatalogBook]:
+    """
+    Resolve active catalog books (local cache, batched catalog request on miss)
+    
+    Raises:
+        HTTPException: If the catalog is unavailable or a book does not exist
+    """
+    try:
+        books = await catalog_client.get_books(livro_ids)
+    except CatalogUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Catálogo indisponível"
+        )
+    
+    for livro_id, book in books.items():
+        if book is None or not book.ativo:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Livro {livro_id} não encontrado no catálogo"
+            )
+    return books
+
+
+def check_stock(book: CatalogBook, quantidade: int) -> None:
+    """
+    Reject a line quantity above the known catalog stock
+    
+    Absolute quantities (update) are fully checked here; for increments
+    the resulting line is checked by the mutation itself (limite).
+    
+    Raises:
+        HTTPException: If stock is insufficient
+    """
+    if quantidade > book.estoque:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Estoque insuficiente para o livro {book.livro_id} (disponível: {book.estoque})"
+        )
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """
+    Read the expected cart version from an If-Match header ("5", W/"5" or 5)
+    
+    Returns:
+        Expected version, or None if the header is absent or "*"
+        
+    Raises:
+        HTTPException: If the header does not hold a cart version
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    value = value.strip('"')
+    if not value.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match deve conter a versão do carrinho"
+        )
+    return int(value)
+
+
+def set_etag(response: Response, cart: Dict[str, Any]) -> None:
+    """Expose the cart version as ETag (sent back in If-Match)"""
+    response.headers["ETag"] = f'"{cart.get("versao", 0)}"'
+
+
+# Helper functions to convert cart data to response
+def cart_to_response(cart: Dict[str, Any]) -> CartResponse:
+    """Convert serialized cart (from CartService) to response schema"""
+    return CartResponse(**cart)
+
+
+def guest_cart_to_response(cart: Dict[str, Any], message: str) -> GuestCartActionResponse:
+    """Build guest cart action response from serialized guest cart"""
+    return GuestCartActionResponse(
+        message=message,
+        carrinho=GuestCartResponse(**cart),
+        resumo=cart_to_summary(cart)
+    )
+
+
+def cart_to_summary(cart: Dict[str, Any]) -> CartSummary:
+    """Build cart summary from serialized cart"""
+    return CartSummary(
+        total_itens=cart["total_itens"],
+        subtotal=cart["valor_total"],
+        valor_total=cart["valor_total"]
     )
 
 
@@ -62,13 +155,14 @@ async def root():
 @router.get("/health")
 async def health_check():
     """Health check do serviço"""
-    return {"status": "healthy", "service": "cart"}
+    return {"status": "healthy", "service": "cart", "redis": redis_service.breaker.state}
 
 
 # Cart endpoints
 @router.get("/carrinho/{usuario_id}", response_model=CartDetailResponse)
 async def get_cart(
     usuario_id: int,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
@@ -80,16 +174,13 @@ async def get_cart(
     Returns:
         Dados completos do carrinho
     """
-    cart_service = CartService(db)
+    cart_service = get_cart_service(db)
     
     try:
         cart = cart_service.get_cart(usuario_id)
         cart_response = cart_to_response(cart)
-        summary = CartSummary(
-            total_itens=cart.total_itens,
-            subtotal=cart.valor_total,
-            valor_total=cart.valor_total
-        )
+        summary = cart_to_summary(cart)
+        set_etag(response, cart)
         
         return CartDetailResponse(
             carrinho=cart_response,
@@ -105,15 +196,47 @@ async def get_cart(
         )
 
 
+@router.get("/carrinho/{usuario_id}/count", response_model=CartCountResponse)
+async def get_cart_count(
+    usuario_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Obter apenas os totais do carrinho (badge do cabeçalho)
+    
+    Args:
+        usuario_id: ID do usuário
+        
+    Returns:
+        Total de itens e valor total, sem carregar os itens
+    """
+    cart_service = get_cart_service(db)
+    
+    try:
+        return CartCountResponse(**cart_service.get_cart_count(usuario_id))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao obter totais do carrinho: {str(e)}"
+        )
+
+
 @router.post("/carrinho/{usuario_id}/add", response_model=CartActionResponse)
 async def add_to_cart(
     usuario_id: int,
     request: AddToCartRequest,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     Adicionar item ao carrinho
     
+    Adições são comutativas: aplicadas atomicamente sobre a versão atual,
+    sem exigir If-Match.
+    
     Args:
         usuario_id: ID do usuário
         request: Dados do item a adicionar
@@ -121,26 +244,24 @@ async def add_to_cart(
     Returns:
         Carrinho atualizado com mensagem de sucesso
     """
-    cart_service = CartService(db)
+    cart_service = get_cart_service(db)
     
     try:
-        # TODO: Em produção, buscar preço do catalog_service
-        # Por enquanto, usar preço mock
-        preco_unitario = Decimal("29.90")
+        # Preço e estoque do catalog_service (cache local; requisições concorrentes agrupadas)
+        book = (await resolve_books([request.livro_id]))[request.livro_id]
+        check_stock(book, request.quantidade)
         
         cart = cart_service.add_item_to_cart(
             usuario_id=usuario_id,
             livro_id=request.livro_id,
             quantidade=request.quantidade,
-            preco_unitario=preco_unitario
+            preco_unitario=book.preco,
+            limite=book.estoque
         )
+        set_etag(response, cart)
         
         cart_response = cart_to_response(cart)
-        summary = CartSummary(
-            total_itens=cart.total_itens,
-            subtotal=cart.valor_total,
-            valor_total=cart.valor_total
-        )
+        summary = cart_to_summary(cart)
         
         return CartActionResponse(
             message="Item adicionado ao carrinho com sucesso",
@@ -162,6 +283,8 @@ async def update_cart_item(
     usuario_id: int,
     livro_id: int,
     request: UpdateCartItemRequest,
+    response: Response,
+    if_match: Optional[str] = Header(None, description="Versão do carrinho (ETag); 409 se desatualizada"),
     db: Session = Depends(get_db)
 ):
     """
@@ -171,25 +294,27 @@ async def update_cart_item(
         usuario_id: ID do usuário
         livro_id: ID do livro
         request: Nova quantidade
+        if_match: Versão esperada do carrinho (opcional)
         
     Returns:
         Carrinho atualizado com mensagem de sucesso
     """
-    cart_service = CartService(db)
+    cart_service = get_cart_service(db)
     
     try:
+        if request.quantidade > 0:
+            check_stock((await resolve_books([livro_id]))[livro_id], request.quantidade)
+        
         cart = cart_service.update_item_quantity(
             usuario_id=usuario_id,
             livro_id=livro_id,
-            quantidade=request.quantidade
+            quantidade=request.quantidade,
+            expected_version=parse_if_match(if_match)
         )
+        set_etag(response, cart)
         
         cart_response = cart_to_response(cart)
-        summary = CartSummary(
-            total_itens=cart.total_itens,
-            subtotal=cart.valor_total,
-            valor_total=cart.valor_total
-        )
+        summary = cart_to_summary(cart)
         
         message = "Item removido do carrinho" if request.quantidade == 0 else "Quantidade atualizada com sucesso"
         
@@ -212,6 +337,8 @@ async def update_cart_item(
 async def remove_from_cart(
     usuario_id: int,
     livro_id: int,
+    response: Response,
+    if_match: Optional[str] = Header(None, description="Versão do carrinho (ETag); 409 se desatualizada"),
     db: Session = Depends(get_db)
 ):
     """
@@ -220,24 +347,23 @@ async def remove_from_cart(
     Args:
         usuario_id: ID do usuário
         livro_id: ID do livro a remover
+        if_match: Versão esperada do carrinho (opcional)
         
     Returns:
         Carrinho atualizado com mensagem de sucesso
     """
-    cart_service = CartService(db)
+    cart_service = get_cart_service(db)
     
     try:
         cart = cart_service.remove_item_from_cart(
             usuario_id=usuario_id,
-            livro_id=livro_id
+            livro_id=livro_id,
+            expected_version=parse_if_match(if_match)
         )
+        set_etag(response, cart)
         
         cart_response = cart_to_response(cart)
-        summary = CartSummary(
-            total_itens=cart.total_itens,
-            subtotal=cart.valor_total,
-            valor_total=cart.valor_total
-        )
+        summary = cart_to_summary(cart)
         
         return CartActionResponse(
             message="Item removido do carrinho com sucesso",
@@ -257,6 +383,8 @@ async def remove_from_cart(
 @router.delete("/carrinho/{usuario_id}/clear", response_model=CartActionResponse)
 async def clear_cart(
     usuario_id: int,
+    response: Response,
+    if_match: Optional[str] = Header(None, description="Versão do carrinho (ETag); 409 se desatualizada"),
     db: Session = Depends(get_db)
 ):
     """
@@ -264,14 +392,16 @@ async def clear_cart(
     
     Args:
         usuario_id: ID do usuário
+        if_match: Versão esperada do carrinho (opcional)
         
     Returns:
         Carrinho vazio com mensagem de sucesso
     """
-    cart_service = CartService(db)
+    cart_service = get_cart_service(db)
     
     try:
-        cart = cart_service.clear_cart(usuario_id)
+        cart = cart_service.clear_cart(usuario_id, expected_version=parse_if_match(if_match))
+        set_etag(response, cart)
         
         cart_response = cart_to_response(cart)
         summary = CartSummary(
@@ -292,4 +422,468 @@ async def clear_cart(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao limpar carrinho: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/carrinho/{usuario_id}/batch", response_model=CartActionResponse)
+async def batch_cart(
+    usuario_id: int,
+    request: BatchCartRequest,
+    response: Response,
+    if_match: Optional[str] = Header(None, description="Versão do carrinho (ETag); 409 se desatualizada"),
+    db: Session = Depends(get_db)
+):
+    """
+    Aplicar várias operações (add, update, remove) em uma única transação
+    
+    Args:
+        usuario_id: ID do usuário
+        request: Lista ordenada de operações
+        if_match: Versão esperada do carrinho (opcional)
+        
+    Returns:
+        Carrinho atualizado com mensagem de sucesso
+    """
+    cart_service = get_cart_service(db)
+    
+    try:
+        expected_version = parse_if_match(if_match)
+        operacoes = [operacao.model_dump() for operacao in request.operacoes]
+        
+        # Preços e estoque dos livros adicionados ou atualizados em uma única consulta ao catálogo
+        alteracoes = [
+            operacao for operacao in operacoes
+            if operacao["op"] == "add" or (operacao["op"] == "update" and operacao["quantidade"] > 0)
+        ]
+        books = await resolve_books(operacao["livro_id"] for operacao in alteracoes)
+        for operacao in alteracoes:
+            check_stock(books[operacao["livro_id"]], operacao["quantidade"])
+        precos = {livro_id: book.preco for livro_id, book in books.items()}
+        # Adições: a quantidade resultante de cada linha é verificada na própria mutação
+        limites = {livro_id: book.estoque for livro_id, book in books.items()}
+        
+        cart = cart_service.apply_batch(usuario_id, operacoes, precos, expected_version, limites)
+        set_etag(response, cart)
+        
+        return CartActionResponse(
+            message=f"{len(operacoes)} operações aplicadas ao carrinho",
+            carrinho=cart_to_response(cart),
+            resumo=cart_to_summary(cart)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao aplicar operações: {str(e)}"
+        )
+
+
+@router.post("/carrinho/{usuario_id}/validate", response_model=CartValidationResponse)
+async def validate_cart(
+    usuario_id: int,
+    aplicar: bool = Query(False, description="Aplicar os ajustes ao carrinho"),
+    db: Session = Depends(get_db)
+):
+    """
+    Revalidar o carrinho contra preço, estoque e status atuais do catálogo
+    
+    Todos os livros são consultados em uma única requisição ao catálogo
+    (ignorando o cache local) e comparados em memória.
+    
+    Args:
+        usuario_id: ID do usuário
+        aplicar: Se verdadeiro, aplica os ajustes em uma única transação
+        
+    Returns:
+        Ajustes por item e carrinho (atualizado, se aplicado)
+    """
+    cart_service = get_cart_service(db)
+    
+    try:
+        cart = cart_service.get_cart(usuario_id)
+        
+        try:
+            books = await catalog_client.get_books(
+                (item["livro_id"] for item in cart["itens"]), fresh=True
+            )
+        except CatalogUnavailableError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Catálogo indisponível"
+            )
+        
+        cart, ajustes = cart_service.revalidate_cart(usuario_id, cart, books, apply=aplicar)
+        
+        return CartValidationResponse(
+            valido=not ajustes,
+            aplicado=aplicar and bool(ajustes),
+            ajustes=ajustes,
+            carrinho=cart_to_response(cart),
+            resumo=cart_to_summary(cart)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao validar carrinho: {str(e)}"
+        )
+
+
+@router.post("/carrinho/{usuario_id}/checkout", response_model=CartActionResponse)
+async def checkout_cart(
+    usuario_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Finalizar o carrinho (persistido e desativado)
+    
+    Args:
+        usuario_id: ID do usuário
+        
+    Returns:
+        Carrinho finalizado com mensagem de sucesso
+    """
+    cart_service = get_cart_service(db)
+    
+    try:
+        cart = cart_service.checkout_cart(usuario_id)
+        
+        return CartActionResponse(
+            message="Carrinho finalizado com sucesso",
+            carrinho=cart_to_response(cart),
+            resumo=cart_to_summary(cart)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao finalizar carrinho: {str(e)}"
+        )
+
+
+@router.post("/carrinho/{usuario_id}/merge", response_model=CartActionResponse)
+async def merge_guest_cart(
+    usuario_id: int,
+    request: MergeCartRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Mesclar o carrinho de convidado no carrinho do usuário (login)
+    
+    O carrinho de convidado é lido e removido em uma única ida ao Redis e
+    seus itens são somados aos do usuário em uma única transação, limitados
+    a max_quantity_per_item.
+    
+    Args:
+        usuario_id: ID do usuário
+        request: Token de sessão do carrinho de convidado
+        
+    Returns:
+        Carrinho do usuário atualizado
+    """
+    cart_service = get_cart_service(db)
+    
+    try:
+        guest_cart = guest_cart_service.take(request.token)
+        if guest_cart is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Carrinho de convidado não encontrado"
+            )
+        
+        try:
+            cart = cart_service.merge_guest_cart(usuario_id, guest_cart["itens"])
+        except Exception:
+            guest_cart_service.restore(guest_cart)
+            raise
+        
+        return CartActionResponse(
+            message=f"{len(guest_cart['itens'])} itens do carrinho de convidado mesclados",
+            carrinho=cart_to_response(cart),
+            resumo=cart_to_summary(cart)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao mesclar carrinho de convidado: {str(e)}"
+        )
+
+
+# ========== Listas salvas (salvos para depois / desejos) ==========
+
+@router.get("/carrinho/{usuario_id}/listas/{lista}", response_model=SavedListResponse)
+async def get_saved_list(
+    usuario_id: int,
+    lista: str = Path(..., pattern=SAVED_LIST_PATTERN),
+    pagina: int = Query(1, ge=1, description="Página (a partir de 1)"),
+    tamanho: int = Query(settings.saved_items_page_size, ge=1, le=100, description="Itens por página"),
+    db: Session = Depends(get_db)
+):
+    """
+    Listar livros salvos, mais recentes primeiro
+    
+    Args:
+        usuario_id: ID do usuário
+        lista: "salvos" ou "desejos"
+        pagina: Página
+        tamanho: Itens por página
+    """
+    try:
+        return SavedListResponse(**SavedItemsService(db).get_items(usuario_id, lista, pagina, tamanho))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar lista: {str(e)}"
+        )
+
+
+@router.post("/carrinho/{usuario_id}/listas/{lista}", response_model=SavedListResponse)
+async def save_to_list(
+    usuario_id: int,
+    request: SaveItemRequest,
+    lista: str = Path(..., pattern=SAVED_LIST_PATTERN),
+    db: Session = Depends(get_db)
+):
+    """
+    Salvar livro na lista (salvar de novo o move para o topo)
+    
+    Args:
+        usuario_id: ID do usuário
+        lista: "salvos" ou "desejos"
+        request: Livro a salvar
+        
+    Returns:
+        Primeira página da lista
+    """
+    try:
+        await resolve_books([request.livro_id])
+        return SavedListResponse(**SavedItemsService(db).save_item(usuario_id, lista, request.livro_id))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao salvar livro na lista: {str(e)}"
+        )
+
+
+@router.delete("/carrinho/{usuario_id}/listas/{lista}/{livro_id}", response_model=SavedListResponse)
+async def remove_from_list(
+    usuario_id: int,
+    livro_id: int,
+    lista: str = Path(..., pattern=SAVED_LIST_PATTERN),
+    db: Session = Depends(get_db)
+):
+    """
+    Remover livro da lista
+    
+    Args:
+        usuario_id: ID do usuário
+        lista: "salvos" ou "desejos"
+        livro_id: ID do livro
+        
+    Returns:
+        Primeira página da lista
+    """
+    try:
+        return SavedListResponse(**SavedItemsService(db).remove_item(usuario_id, lista, livro_id))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao remover livro da lista: {str(e)}"
+        )
+
+
+@router.post("/carrinho/{usuario_id}/listas/{lista}/{livro_id}/mover", response_model=CartActionResponse)
+async def move_to_cart(
+    usuario_id: int,
+    livro_id: int,
+    response: Response,
+    request: MoveToCartRequest = MoveToCartRequest(),
+    lista: str = Path(..., pattern=SAVED_LIST_PATTERN),
+    db: Session = Depends(get_db)
+):
+    """
+    Mover livro da lista para o carrinho
+    
+    No modo Redis a remoção da lista e a adição ao carrinho são um único
+    script atômico.
+    
+    Args:
+        usuario_id: ID do usuário
+        lista: "salvos" ou "desejos"
+        livro_id: ID do livro
+        request: Quantidade a adicionar
+        
+    Returns:
+        Carrinho atualizado com mensagem de sucesso
+    """
+    cart_service = get_cart_service(db)
+    
+    try:
+        book = (await resolve_books([livro_id]))[livro_id]
+        check_stock(book, request.quantidade)
+        
+        cart = cart_service.move_saved_item(
+            usuario_id, lista, livro_id, request.quantidade, book.preco, limite=book.estoque
+        )
+        set_etag(response, cart)
+        
+        return CartActionResponse(
+            message="Livro movido para o carrinho com sucesso",
+            carrinho=cart_to_response(cart),
+            resumo=cart_to_summary(cart)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao mover livro para o carrinho: {str(e)}"
+        )
+
+
+# ========== Carrinho de convidado (somente Redis) ==========
+
+@router.post("/convidado", response_model=GuestCartActionResponse, status_code=status.HTTP_201_CREATED)
+async def create_guest_cart():
+    """
+    Criar carrinho de convidado
+    
+    Returns:
+        Carrinho vazio com o token de sessão a ser usado nas próximas chamadas
+    """
+    try:
+        cart = guest_cart_service.create_cart()
+        return guest_cart_to_response(cart, "Carrinho de convidado criado")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao criar carrinho de convidado: {str(e)}"
+        )
+
+
+@router.get("/convidado/{token}", response_model=GuestCartActionResponse)
+async def get_guest_cart(token: str = Path(..., pattern=GUEST_TOKEN_PATTERN)):
+    """
+    Visualizar carrinho de convidado
+    
+    Args:
+        token: Token de sessão do convidado
+    """
+    try:
+        cart = guest_cart_service.get_cart(token)
+        return guest_cart_to_response(cart, "Carrinho de convidado")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar carrinho de convidado: {str(e)}"
+        )
+
+
+@router.post("/convidado/{token}/add", response_model=GuestCartActionResponse)
+async def add_to_guest_cart(
+    request: AddToCartRequest,
+    token: str = Path(..., pattern=GUEST_TOKEN_PATTERN)
+):
+    """
+    Adicionar item ao carrinho de convidado
+    
+    Args:
+        token: Token de sessão do convidado
+        request: Dados do item a adicionar
+    """
+    try:
+        book = (await resolve_books([request.livro_id]))[request.livro_id]
+        check_stock(book, request.quantidade)
+        
+        cart = guest_cart_service.add_item(
+            token, request.livro_id, request.quantidade, book.preco, limite=book.estoque
+        )
+        return guest_cart_to_response(cart, "Item adicionado ao carrinho com sucesso")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao adicionar item ao carrinho: {str(e)}"
+        )
+
+
+@router.put("/convidado/{token}/update/{livro_id}", response_model=GuestCartActionResponse)
+async def update_guest_cart_item(
+    livro_id: int,
+    request: UpdateCartItemRequest,
+    token: str = Path(..., pattern=GUEST_TOKEN_PATTERN)
+):
+    """
+    Atualizar quantidade de item do carrinho de convidado (0 remove o item)
+    
+    Args:
+        token: Token de sessão do convidado
+        livro_id: ID do livro
+        request: Nova quantidade
+    """
+    try:
+        if request.quantidade > 0:
+            check_stock((await resolve_books([livro_id]))[livro_id], request.quantidade)
+        
+        cart = guest_cart_service.update_item_quantity(token, livro_id, request.quantidade)
+        return guest_cart_to_response(cart, "Quantidade atualizada com sucesso")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao atualizar item do carrinho: {str(e)}"
+        )
+
+
+@router.delete("/convidado/{token}/remove/{livro_id}", response_model=GuestCartActionResponse)
+async def remove_from_guest_cart(
+    livro_id: int,
+    token: str = Path(..., pattern=GUEST_TOKEN_PATTERN)
+):
+    """
+    Remover item do carrinho de convidado
+    
+    Args:
+        token: Token de sessão do convidado
+        livro_id: ID do livro
+    """
+    try:
+        cart = guest_cart_service.remove_item(token, livro_id)
+        return guest_cart_to_response(cart, "Item removido do carrinho com sucesso")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao remover item do carrinho: {str(e)}"
+        )
@@ -3,20 +3,44 @@ from .cart_schemas import (
     AddToCartRequest,
     UpdateCartItemRequest,
     RemoveFromCartRequest,
+    BatchOperation,
+    BatchCartRequest,
+    MergeCartRequest,
+    SaveItemRequest,
+    MoveToCartRequest,
     CartItemResponse,
     CartSummary,
+    CartCountResponse,
     CartResponse,
     CartDetailResponse,
-    CartActionResponse
+    CartActionResponse,
+    GuestCartResponse,
+    GuestCartActionResponse,
+    SavedItemResponse,
+    SavedListResponse,
+    CartLineAdjustment,
+    CartValidationResponse
 )
 
 __all__ = [
     "AddToCartRequest",
     "UpdateCartItemRequest",
     "RemoveFromCartRequest",
+    "BatchOperation",
+    "BatchCartRequest",
+    "MergeCartRequest",
+    "SaveItemRequest",
+    "MoveToCartRequest",
     "CartItemResponse",
     "CartSummary",
+    "CartCountResponse",
     "CartResponse",
     "CartDetailResponse",
-    "CartActionResponse"
+    "CartActionResponse",
+    "GuestCartResponse",
+    "GuestCartActionResponse",
+    "SavedItemResponse",
+    "SavedListResponse",
+    "CartLineAdjustment",
+    "CartValidationResponse"
 ]
@@ -1,10 +1,17 @@
 # Cart Schemas - Pydantic models for request/response validation
 # Defines data models for cart endpoints
 
-from typing import List, Optional
+from typing import List, Optional, Literal
 from decimal import Decimal
 from datetime import datetime
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, validator, root_validator
+
+
+# Session tokens issued for guest carts (secrets.token_urlsafe)
+GUEST_TOKEN_PATTERN = r"^[A-Za-z0-9_-]{16,64}$"
+
+# Saved lists: "salvos" (saved for later) and "desejos" (wishlist)
+SAVED_LIST_PATTERN = r"^(salvos|desejos)$"
 
 
 class CartItemBase(BaseModel):
@@ -46,15 +53,51 @@ class RemoveFromCartRequest(BaseModel):
     livro_id: int = Field(..., description="ID do livro a ser removido")
 
 
+class BatchOperation(BaseModel):
+    """Single operation of a batch cart mutation"""
+    op: Literal["add", "update", "remove"] = Field(..., description="Tipo da operação")
+    livro_id: int = Field(..., description="ID do livro")
+    quantidade: Optional[int] = Field(None, ge=0, le=99, description="Quantidade (add: a adicionar; update: nova, 0 remove)")
+    
+    @root_validator(skip_on_failure=True)
+    def validate_quantidade(cls, values):
+        op, quantidade = values.get("op"), values.get("quantidade")
+        if op == "add" and (quantidade is None or quantidade < 1):
+            raise ValueError('Quantidade deve ser pelo menos 1 para "add"')
+        if op == "update" and quantidade is None:
+            raise ValueError('Quantidade é obrigatória para "update"')
+        return values
+
+
+class BatchCartRequest(BaseModel):
+    """Request schema for applying several cart operations at once"""
+    operacoes: List[BatchOperation] = Field(..., min_length=1, description="Operações aplicadas em ordem")
+
+
+class MergeCartRequest(BaseModel):
+    """Request schema for merging a guest cart on login"""
+    token: str = Field(..., pattern=GUEST_TOKEN_PATTERN, description="Token de sessão do carrinho de convidado")
+
+
+class SaveItemRequest(BaseModel):
+    """Request schema for saving a book to a list"""
+    livro_id: int = Field(..., description="ID do livro a ser salvo")
+
+
+class MoveToCartRequest(BaseModel):
+    """Request schema for moving a saved book into the cart"""
+    quantidade: int = Field(1, ge=1, le=99, description="Quantidade a adicionar ao carrinho")
+
+
 class CartItemResponse(BaseModel):
-    """Response schema for cart item"""
-    id: int
+    """Response schema for cart item (id/timestamps are None for Redis live carts)"""
+    id: Optional[int] = None
     livro_id: int
     quantidade: int
     preco_unitario: Decimal
     subtotal: Decimal
-    data_criacao: datetime
-    data_atualizacao: datetime
+    data_criacao: Optional[datetime] = None
+    data_atualizacao: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -67,11 +110,19 @@ class CartSummary(BaseModel):
     valor_total: Decimal = Field(..., description="Valor total do carrinho")
 
 
+class CartCountResponse(BaseModel):
+    """Lightweight cart totals for header badges"""
+    usuario_id: int
+    total_itens: int = Field(..., description="Total de itens no carrinho")
+    valor_total: Decimal = Field(..., description="Valor total do carrinho")
+
+
 class CartResponse(BaseModel):
     """Response schema for cart data"""
     id: int
     usuario_id: int
     ativo: bool
+    versao: int = 0
     itens: List[CartItemResponse]
     total_itens: int
     valor_total: Decimal
@@ -93,3 +144,56 @@ class CartActionResponse(BaseModel):
     message: str
     carrinho: CartResponse
     resumo: CartSummary
+
+
+class GuestCartResponse(BaseModel):
+    """Response schema for guest cart data"""
+    token: str
+    versao: int = 0
+    itens: List[CartItemResponse]
+    total_itens: int
+    valor_total: Decimal
+    data_criacao: datetime
+    data_atualizacao: datetime
+
+
+class GuestCartActionResponse(BaseModel):
+    """Response schema for guest cart actions"""
+    message: str
+    carrinho: GuestCartResponse
+    resumo: CartSummary
+
+
+class SavedItemResponse(BaseModel):
+    """Response schema for a saved book"""
+    livro_id: int
+    data_salvo: datetime
+
+
+class SavedListResponse(BaseModel):
+    """Response schema for one page of a saved list"""
+    usuario_id: int
+    lista: str
+    itens: List[SavedItemResponse]
+    total: int
+    pagina: int
+    tamanho: int
+
+
+class CartLineAdjustment(BaseModel):
+    """Difference between a cart line and the current catalog data"""
+    livro_id: int
+    motivos: List[Literal["indisponivel", "estoque_insuficiente", "preco_alterado"]]
+    quantidade: int
+    nova_quantidade: int
+    preco_unitario: Decimal
+    novo_preco_unitario: Decimal
+
+
+class CartValidationResponse(BaseModel):
+    """Response schema for checkout-time cart revalidation"""
+    valido: bool
+    aplicado: bool
+    ajustes: List[CartLineAdjustment]
+    carrinho: CartResponse
+    resumo: CartSummary
@@ -1,5 +1,25 @@
 # Services package initialization
 from .redis_service import redis_service
 from .cart_service import CartService
+from .write_behind_service import redis_cart_store, write_behind_service
+from .live_cart_service import LiveCartService
+from .catalog_client import catalog_client, CatalogBook, CatalogUnavailableError
+from .cart_sweeper_service import cart_sweeper_service
+from .guest_cart_service import GuestCartService, guest_cart_service
+from .saved_items_service import SavedItemsService, saved_items_persister
 
-__all__ = ["redis_service", "CartService"]
+__all__ = [
+    "redis_service",
+    "CartService",
+    "redis_cart_store",
+    "write_behind_service",
+    "LiveCartService",
+    "catalog_client",
+    "CatalogBook",
+    "CatalogUnavailableError",
+    "cart_sweeper_service",
+    "GuestCartService",
+    "guest_cart_service",
+    "SavedItemsService",
+    "saved_items_persister"
+]
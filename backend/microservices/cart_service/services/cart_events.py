@@ -0,0 +1,84 @@
+# Cart Events - Cart activity stream for downstream consumers (recommendations, analytics)
+# Events are published to a capped Redis Stream by the same script call that writes the cart to Redis
+
+from typing import Any, Dict, List, NamedTuple
+
+from config import settings
+
+
+# Capped stream read by other services through their own consumer groups
+EVENTS_STREAM = "cart:events"
+
+# Event types (field "e")
+EVENT_ADD = "add"  # q = units added
+EVENT_QUANTITY = "qty"  # q = new quantity
+EVENT_REMOVE = "remove"  # q = 0
+EVENT_CLEAR = "clear"  # cart-level, l = ''
+EVENT_CHECKOUT = "checkout"  # cart-level, q = total units checked out
+
+# Entry layout: e (type), u (usuario_id), l (livro_id), q (quantity), v (cart version after the change)
+# Publishes the (type, livro_id, quantity) triples found in ARGV[first..last]
+PUBLISH_EVENTS = """
+local function publish_events(stream, maxlen, usuario_id, version, first, last)
+    for i = first, last, 3 do
+        redis.call('XADD', stream, 'MAXLEN', '~', maxlen, '*',
+            'e', ARGV[i], 'u', usuario_id, 'l', ARGV[i + 1], 'q', ARGV[i + 2], 'v', version)
+    end
+end
+"""
+
+
+class CartEvent(NamedTuple):
+    """A single cart activity event"""
+    tipo: str
+    livro_id: Any = ""
+    quantidade: int = 0
+
+
+def events_enabled() -> bool:
+    """Check if cart events are published"""
+    return settings.cart_events_enabled
+
+
+def encode_events(events: List[CartEvent]) -> List[Any]:
+    """
+    Flatten events into script arguments (none when publishing is disabled)
+
+    Args:
+        events: Events to publish
+
+    Returns:
+        Flat list of (type, livro_id, quantity) triples
+    """
+    if not events_enabled():
+        return []
+    args: List[Any] = []
+    for event in events:
+        args.extend([event.tipo, event.livro_id, event.quantidade])
+    return args
+
+
+def line_events(before: Dict[int, int], after: Dict[int, int]) -> List[CartEvent]:
+    """
+    Derive per-item events from quantities before and after a mutation
+
+    Args:
+        before: Mapping of livro_id to quantidade before the change
+        after: Mapping of livro_id to quantidade after the change (absent = removed)
+
+    Returns:
+        One event per changed item
+    """
+    events = []
+    for livro_id in sorted(set(before) | set(after)):
+        old = before.get(livro_id, 0)
+        new = after.get(livro_id, 0)
+        if new == old:
+            continue
+        if old == 0:
+            events.append(CartEvent(EVENT_ADD, livro_id, new))
+        elif new == 0:
+            events.append(CartEvent(EVENT_REMOVE, livro_id, 0))
+        else:
+            events.append(CartEvent(EVENT_QUANTITY, livro_id, new))
+    return events
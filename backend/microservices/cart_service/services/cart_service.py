@@ -1,17 +1,52 @@
 # Cart Service - Business logic for cart operations
 # Handles cart management, item operations, and cache synchronization
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
 from decimal import Decimal
 
 from models import Carrinho, ItemCarrinho
-from repositories.cart_repository import CartRepository
+from repositories.cart_repository import CartRepository, LineChange, VersionConflictError
 from services.redis_service import redis_service
+from services.cart_events import (
+    CartEvent, EVENT_ADD, EVENT_QUANTITY, EVENT_REMOVE, EVENT_CLEAR, EVENT_CHECKOUT, line_events
+)
+from services.catalog_client import CatalogBook
+from services.saved_items_service import SavedItemsService
 from config import settings
 
 
+def line_limit(limite: Optional[int] = None) -> int:
+    """Maximum quantity of one cart line (a stock limit never raises max_quantity_per_item)"""
+    if limite is None:
+        return settings.max_quantity_per_item
+    return min(limite, settings.max_quantity_per_item)
+
+
+def quantity_exceeded(livro_id: int, limite: Optional[int] = None) -> HTTPException:
+    """
+    Build the 400 returned when a line would exceed its limit
+    
+    Args:
+        livro_id: Book ID
+        limite: Stock-based line limit, if any
+        
+    Returns:
+        HTTPException to raise
+    """
+    if line_limit(limite) < settings.max_quantity_per_item:
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Estoque insuficiente para o livro {livro_id} (disponível: {limite})"
+        )
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Quantidade total não pode exceder {settings.max_quantity_per_item} unidades"
+    )
+
+
 class CartService:
     """Service for cart business logic operations"""
     
@@ -23,6 +58,9 @@ class CartService:
         """
         Serialize cart object to dictionary
         
+        This is the representation cached in Redis and returned by every
+        service method (prices stay Decimal; RedisService handles JSON).
+        
         Args:
             cart: Cart instance
             
@@ -33,66 +71,208 @@ class CartService:
             "id": cart.id,
             "usuario_id": cart.usuario_id,
             "ativo": cart.ativo,
+            "versao": cart.versao or 0,
             "itens": [
                 {
                     "id": item.id,
                     "livro_id": item.livro_id,
                     "quantidade": item.quantidade,
-                    "preco_unitario": float(item.preco_unitario),
-                    "subtotal": float(item.subtotal),
+                    "preco_unitario": item.preco_unitario,
+                    "subtotal": item.subtotal,
                     "data_criacao": item.data_criacao.isoformat(),
                     "data_atualizacao": item.data_atualizacao.isoformat()
                 }
                 for item in cart.itens
             ],
             "total_itens": cart.total_itens,
-            "valor_total": float(cart.valor_total),
+            "valor_total": Decimal(cart.valor_total),
             "data_criacao": cart.data_criacao.isoformat(),
             "data_atualizacao": cart.data_atualizacao.isoformat()
         }
     
-    def _sync_to_cache(self, cart: Carrinho) -> None:
+    def _validate_add(self, quantidade: int, preco_unitario: Decimal) -> None:
+        """
+        Validate quantity and price of an item being added
+        
+        Raises:
+            HTTPException: If validation fails
+        """
+        if quantidade < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Quantidade deve ser pelo menos 1"
+            )
+        
+        if quantidade > settings.max_quantity_per_item:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Quantidade não pode exceder {settings.max_quantity_per_item} unidades"
+            )
+        
+        if preco_unitario <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Preço deve ser maior que zero"
+            )
+    
+    def _validate_quantity(self, quantidade: int) -> None:
         """
-        Synchronize cart to Redis cache
+        Validate an absolute item quantity (0 removes the item)
+        
+        Raises:
+            HTTPException: If validation fails
+        """
+        if quantidade < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Quantidade não pode ser negativa"
+            )
+        
+        if quantidade > settings.max_quantity_per_item:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Quantidade não pode exceder {settings.max_quantity_per_item} unidades"
+            )
+    
+    def _sync_to_cache(self, cart: Carrinho, events: Optional[List[CartEvent]] = None) -> Dict[str, Any]:
+        """
+        Serialize cart and write it through to Redis cache
         
         Args:
             cart: Cart instance
+            events: Cart events published with the write (same script call)
+            
+        Returns:
+            Cart data dictionary
+        """
+        cart_data = self._serialize_cart(cart)
+        # No-op while the Redis circuit is open (the cart is flagged stale instead)
+        self.redis_service.set_cart(cart.usuario_id, cart_data, events)
+        return cart_data
+    
+    def _write_line(
+        self,
+        usuario_id: int,
+        cart_id: int,
+        livro_id: int,
+        change: LineChange,
+        event: CartEvent
+    ) -> Dict[str, Any]:
+        """
+        Write a single-item change through to cache
+        
+        The cached hash is patched with one field when it holds the previous
+        version; otherwise the cart is reloaded and written whole. The event
+        is published by the first script call only.
+        
+        Args:
+            usuario_id: User ID
+            cart_id: Cart ID
+            livro_id: Book ID
+            change: Result of the item mutation
+            event: Cart event of the mutation
+            
+        Returns:
+            Updated cart data dictionary
         """
-        if self.redis_service.is_connected():
-            cart_data = self._serialize_cart(cart)
-            self.redis_service.set_cart(cart.usuario_id, cart_data)
+        totals = change.totals
+        cart_data = self.redis_service.set_cart_line(
+            usuario_id,
+            cart_id,
+            livro_id,
+            change.quantidade,
+            change.preco_unitario,
+            totals.versao,
+            totals.total_itens,
+            Decimal(totals.valor_total),
+            totals.data_atualizacao.isoformat(),
+            [event]
+        )
+        if cart_data is None:
+            return self._sync_to_cache(self.cart_repo.get_cart_with_items(cart_id))
+        return cart_data
     
-    def get_cart(self, usuario_id: int) -> Carrinho:
+    def _version_conflict(self, usuario_id: int) -> HTTPException:
+        """
+        Build the 409 returned when an If-Match version is outdated
+        
+        The body carries the current cart so the client can reapply its
+        change without another request.
+        
+        Args:
+            usuario_id: User ID
+            
+        Returns:
+            HTTPException to raise
+        """
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "mensagem": "Carrinho alterado em outra sessão",
+                "carrinho": jsonable_encoder(self.get_cart(usuario_id))
+            }
+        )
+    
+    def get_cart(self, usuario_id: int) -> Dict[str, Any]:
         """
         Get cart for user
         
+        The cached cart is authoritative for reads: a hit costs one
+        pipelined HGETALL + EXPIRE round trip. Postgres is only queried on
+        a cache miss.
+        
         Args:
             usuario_id: User ID
             
         Returns:
-            Cart instance
+            Cart data dictionary
         """
-        # Try to get from cache first
         cached_cart = self.redis_service.get_cart(usuario_id)
         if cached_cart:
-            # Refresh TTL
-            self.redis_service.refresh_ttl(usuario_id)
+            return cached_cart
         
-        # Get or create cart from database
-        cart = self.cart_repo.get_or_create_cart(usuario_id)
+        # Cache miss: load (or create) the cart with its items in one query and populate cache
+        cart = self.cart_repo.get_or_create_cart(usuario_id, with_items=True)
+        return self._sync_to_cache(cart)
+    
+    def get_cart_count(self, usuario_id: int) -> Dict[str, Any]:
+        """
+        Get cart totals for header badges
         
-        # Sync to cache
-        self._sync_to_cache(cart)
+        Served from the Redis counter kept in sync by every write-through;
+        on a miss the stored columns are read (no items loaded) and the
+        counter is repopulated.
         
-        return cart
+        Args:
+            usuario_id: User ID
+            
+        Returns:
+            Dictionary with usuario_id, total_itens and valor_total
+        """
+        cached = self.redis_service.get_cart_count(usuario_id)
+        if cached:
+            total_itens, valor_total = cached
+        else:
+            totals = self.cart_repo.get_cart_totals(usuario_id)
+            if totals:
+                total_itens, valor_total, versao, carrinho_id = totals
+                self.redis_service.set_cart_count(usuario_id, carrinho_id, versao, total_itens, valor_total)
+            else:
+                total_itens, valor_total = 0, Decimal("0.00")
+        return {
+            "usuario_id": usuario_id,
+            "total_itens": total_itens,
+            "valor_total": Decimal(valor_total)
+        }
     
     def add_item_to_cart(
         self, 
         usuario_id: int, 
         livro_id: int, 
         quantidade: int,
-        preco_unitario: Decimal
-    ) -> Carrinho:
+        preco_unitario: Decimal,
+        limite: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Add item to cart or update quantity if exists
         
@@ -101,68 +281,75 @@ class CartService:
             livro_id: Book ID
             quantidade: Quantity to add
             preco_unitario: Unit price
+            limite: Maximum resulting line quantity (catalog stock), checked
+                in the same statement as the increment
             
         Returns:
-            Updated cart instance
+            Updated cart data dictionary
             
         Raises:
             HTTPException: If validation fails
         """
-        # Validate quantity
-        if quantidade < 1:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Quantidade deve ser pelo menos 1"
-            )
+        self._validate_add(quantidade, preco_unitario)
         
-        if quantidade > settings.max_quantity_per_item:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Quantidade não pode exceder {settings.max_quantity_per_item} unidades"
-            )
+        # Get or create cart (keep the id: the instance expires on commit)
+        cart_id = self.cart_repo.get_or_create_cart(usuario_id).id
         
-        # Validate price
-        if preco_unitario <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Preço deve ser maior que zero"
-            )
+        # Insert or increment in one statement (bumps version in the same transaction)
+        change = self.cart_repo.upsert_item(
+            cart_id, livro_id, quantidade, preco_unitario, line_limit(limite)
+        )
+        if change is None:
+            raise quantity_exceeded(livro_id, limite)
         
-        # Get or create cart
-        cart = self.cart_repo.get_or_create_cart(usuario_id)
+        # Patch the cached cart (reloads only if the cache is behind)
+        return self._write_line(usuario_id, cart_id, livro_id, change, CartEvent(EVENT_ADD, livro_id, quantidade))
+    
+    def move_saved_item(
+        self,
+        usuario_id: int,
+        lista: str,
+        livro_id: int,
+        quantidade: int,
+        preco_unitario: Decimal,
+        limite: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Move a book from a saved list into the cart
         
-        # Check if item already exists
-        existing_item = self.cart_repo.get_item_by_book(cart.id, livro_id)
+        The cart lives in PostgreSQL here: the book is first claimed from
+        the list with an atomic Redis remove (so concurrent moves add it
+        once), then added, and put back in the list if the add fails.
         
-        if existing_item:
-            # Update quantity
-            new_quantity = existing_item.quantidade + quantidade
+        Args:
+            usuario_id: User ID
+            lista: Saved list name
+            livro_id: Book ID
+            quantidade: Quantity to add
+            preco_unitario: Unit price
+            limite: Maximum resulting line quantity (catalog stock)
             
-            if new_quantity > settings.max_quantity_per_item:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Quantidade total não pode exceder {settings.max_quantity_per_item} unidades"
-                )
+        Returns:
+            Updated cart data dictionary
             
-            self.cart_repo.update_item_quantity(existing_item.id, new_quantity)
-        else:
-            # Add new item
-            self.cart_repo.add_item(cart.id, livro_id, quantidade, preco_unitario)
-        
-        # Refresh cart
-        cart = self.cart_repo.get_cart_by_id(cart.id)
-        
-        # Sync to cache
-        self._sync_to_cache(cart)
-        
-        return cart
+        Raises:
+            HTTPException: If the book is not in the list or validation fails
+        """
+        saved = SavedItemsService(self.cart_repo.db)
+        saved.claim(usuario_id, lista, livro_id)
+        try:
+            return self.add_item_to_cart(usuario_id, livro_id, quantidade, preco_unitario, limite)
+        except Exception:
+            saved.restore(usuario_id, lista, livro_id)
+            raise
     
     def update_item_quantity(
         self, 
         usuario_id: int, 
         livro_id: int, 
-        quantidade: int
-    ) -> Carrinho:
+        quantidade: int,
+        expected_version: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Update item quantity in cart
         
@@ -170,25 +357,15 @@ class CartService:
             usuario_id: User ID
             livro_id: Book ID
             quantidade: New quantity (0 to remove)
+            expected_version: Cart version the client saw (If-Match)
             
         Returns:
-            Updated cart instance
+            Updated cart data dictionary
             
         Raises:
-            HTTPException: If validation fails or item not found
+            HTTPException: If validation fails, item not found or version conflict
         """
-        # Validate quantity
-        if quantidade < 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Quantidade não pode ser negativa"
-            )
-        
-        if quantidade > settings.max_quantity_per_item:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Quantidade não pode exceder {settings.max_quantity_per_item} unidades"
-            )
+        self._validate_quantity(quantidade)
         
         # Get cart
         cart = self.cart_repo.get_active_cart_by_user(usuario_id)
@@ -198,41 +375,44 @@ class CartService:
                 detail="Carrinho não encontrado"
             )
         
-        # Get item
-        item = self.cart_repo.get_item_by_book(cart.id, livro_id)
-        if not item:
+        # Update or remove in one statement (bumps version in the same transaction)
+        cart_id = cart.id
+        try:
+            change = self.cart_repo.set_item_quantity(cart_id, livro_id, quantidade, expected_version)
+        except VersionConflictError:
+            raise self._version_conflict(usuario_id)
+        if change is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Item não encontrado no carrinho"
             )
         
-        # Update or remove
+        # Patch the cached cart (reloads only if the cache is behind)
         if quantidade == 0:
-            self.cart_repo.delete_item(item.id)
+            event = CartEvent(EVENT_REMOVE, livro_id, 0)
         else:
-            self.cart_repo.update_item_quantity(item.id, quantidade)
-        
-        # Refresh cart
-        cart = self.cart_repo.get_cart_by_id(cart.id)
-        
-        # Sync to cache
-        self._sync_to_cache(cart)
-        
-        return cart
+            event = CartEvent(EVENT_QUANTITY, livro_id, quantidade)
+        return self._write_line(usuario_id, cart_id, livro_id, change, event)
     
-    def remove_item_from_cart(self, usuario_id: int, livro_id: int) -> Carrinho:
+    def remove_item_from_cart(
+        self,
+        usuario_id: int,
+        livro_id: int,
+        expected_version: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Remove item from cart
         
         Args:
             usuario_id: User ID
             livro_id: Book ID
+            expected_version: Cart version the client saw (If-Match)
             
         Returns:
-            Updated cart instance
+            Updated cart data dictionary
             
         Raises:
-            HTTPException: If cart or item not found
+            HTTPException: If cart or item not found or version conflict
         """
         # Get cart
         cart = self.cart_repo.get_active_cart_by_user(usuario_id)
@@ -242,34 +422,34 @@ class CartService:
                 detail="Carrinho não encontrado"
             )
         
-        # Remove item
-        success = self.cart_repo.delete_item_by_book(cart.id, livro_id)
-        if not success:
+        # Delete in one statement (bumps version in the same transaction)
+        cart_id = cart.id
+        try:
+            change = self.cart_repo.set_item_quantity(cart_id, livro_id, 0, expected_version)
+        except VersionConflictError:
+            raise self._version_conflict(usuario_id)
+        if change is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Item não encontrado no carrinho"
             )
         
-        # Refresh cart
-        cart = self.cart_repo.get_cart_by_id(cart.id)
-        
-        # Sync to cache
-        self._sync_to_cache(cart)
-        
-        return cart
+        # Patch the cached cart (reloads only if the cache is behind)
+        return self._write_line(usuario_id, cart_id, livro_id, change, CartEvent(EVENT_REMOVE, livro_id, 0))
     
-    def clear_cart(self, usuario_id: int) -> Carrinho:
+    def clear_cart(self, usuario_id: int, expected_version: Optional[int] = None) -> Dict[str, Any]:
         """
         Clear all items from cart
         
         Args:
             usuario_id: User ID
+            expected_version: Cart version the client saw (If-Match)
             
         Returns:
-            Empty cart instance
+            Empty cart data dictionary
             
         Raises:
-            HTTPException: If cart not found
+            HTTPException: If cart not found or version conflict
         """
         # Get cart
         cart = self.cart_repo.get_active_cart_by_user(usuario_id)
@@ -279,29 +459,320 @@ class CartService:
                 detail="Carrinho não encontrado"
             )
         
-        # Clear items
-        self.cart_repo.clear_cart(cart.id)
+        # Clear items and bump version in one transaction (returns the updated cart, no re-fetch)
+        try:
+            cart = self.cart_repo.clear_cart(cart.id, expected_version)
+        except VersionConflictError:
+            raise self._version_conflict(usuario_id)
+        if not cart:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Carrinho não encontrado"
+            )
+        
+        return self._sync_to_cache(cart, [CartEvent(EVENT_CLEAR)])
+    
+    def _validate_batch(self, operacoes: List[Dict[str, Any]], precos: Dict[int, Decimal]) -> None:
+        """
+        Validate a batch up front, before touching the database
+        
+        Args:
+            operacoes: Operations ({"op", "livro_id", "quantidade"})
+            precos: Unit price per livro_id being added
+            
+        Raises:
+            HTTPException: If validation fails
+        """
+        if not operacoes:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Informe pelo menos uma operação"
+            )
+        
+        if len(operacoes) > settings.max_batch_operations:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Lote não pode exceder {settings.max_batch_operations} operações"
+            )
+        
+        for operacao in operacoes:
+            if operacao["op"] == "add":
+                self._validate_add(operacao["quantidade"], precos[operacao["livro_id"]])
+            elif operacao["op"] == "update":
+                self._validate_quantity(operacao["quantidade"])
+    
+    def _resolve_batch(
+        self,
+        current: Dict[int, int],
+        operacoes: List[Dict[str, Any]],
+        limites: Optional[Dict[int, int]] = None
+    ) -> Dict[int, int]:
+        """
+        Apply operations in order to the current quantities
+        
+        Args:
+            current: Mapping of livro_id to current quantidade
+            operacoes: Operations ({"op", "livro_id", "quantidade"})
+            limites: Maximum resulting quantity per livro_id for adds (catalog stock)
+            
+        Returns:
+            Final mapping of livro_id to quantidade (items at 0 are dropped)
+            
+        Raises:
+            HTTPException: If an item is missing or a limit is exceeded
+        """
+        final = dict(current)
+        for operacao in operacoes:
+            livro_id = operacao["livro_id"]
+            quantidade = final.get(livro_id, 0)
+            
+            if operacao["op"] == "add":
+                limite = (limites or {}).get(livro_id)
+                if quantidade + operacao["quantidade"] > line_limit(limite):
+                    raise quantity_exceeded(livro_id, limite)
+                final[livro_id] = quantidade + operacao["quantidade"]
+                continue
+            
+            if quantidade == 0:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Livro {livro_id} não encontrado no carrinho"
+                )
+            
+            if operacao["op"] == "remove" or operacao["quantidade"] == 0:
+                final.pop(livro_id)
+            else:
+                final[livro_id] = operacao["quantidade"]
+        
+        return final
+    
+    def apply_batch(
+        self,
+        usuario_id: int,
+        operacoes: List[Dict[str, Any]],
+        precos: Dict[int, Decimal],
+        expected_version: Optional[int] = None,
+        limites: Optional[Dict[int, int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply add/update/remove operations atomically in one transaction
+        
+        Args:
+            usuario_id: User ID
+            operacoes: Operations in order ({"op", "livro_id", "quantidade"})
+            precos: Unit price per livro_id being added
+            expected_version: Cart version the client saw (If-Match)
+            limites: Maximum resulting quantity per livro_id for adds (catalog stock),
+                checked against the locked lines
+            
+        Returns:
+            Updated cart data dictionary
+            
+        Raises:
+            HTTPException: If validation fails or version conflict (nothing is applied)
+        """
+        self._validate_batch(operacoes, precos)
+        
+        cart_id = self.cart_repo.get_or_create_cart(usuario_id).id
+        try:
+            current = self.cart_repo.lock_cart_items(cart_id, expected_version)
+        except VersionConflictError:
+            raise self._version_conflict(usuario_id)
+        try:
+            final = self._resolve_batch(current, operacoes, limites)
+        except HTTPException:
+            self.cart_repo.rollback()
+            raise
+        
+        changed = {
+            livro_id: quantidade for livro_id, quantidade in final.items()
+            if current.get(livro_id) != quantidade
+        }
+        removed = [livro_id for livro_id in current if livro_id not in final]
+        cart = self.cart_repo.apply_item_changes(cart_id, changed, precos, removed)
+        
+        # Single cache sync for the whole batch
+        return self._sync_to_cache(cart, line_events(current, final))
+    
+    def merge_guest_cart(self, usuario_id: int, itens: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge guest cart lines into the user's cart in one transaction
+        
+        Quantities of books present in both carts are added and clamped to
+        max_quantity_per_item; existing lines keep their price.
+        
+        Args:
+            usuario_id: User ID
+            itens: Items of the guest cart
+            
+        Returns:
+            Updated cart data dictionary
+        """
+        if not itens:
+            return self.get_cart(usuario_id)
+        
+        lines = {item["livro_id"]: (item["quantidade"], item["preco_unitario"]) for item in itens}
+        cart = self.cart_repo.merge_items(usuario_id, lines, settings.max_quantity_per_item)
+        events = [CartEvent(EVENT_ADD, livro_id, quantidade) for livro_id, (quantidade, _) in sorted(lines.items())]
+        return self._sync_to_cache(cart, events)
+    
+    def _diff_lines(
+        self,
+        lines: Dict[int, Tuple[int, Decimal]],
+        books: Dict[int, Optional[CatalogBook]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Compare cart lines against current catalog data (in memory)
+        
+        Args:
+            lines: Mapping of livro_id to (quantidade, preco_unitario)
+            books: Catalog lookup result (None = unknown to the catalog);
+                lines missing from it are not checked
+            
+        Returns:
+            One adjustment per line that differs from the catalog
+        """
+        ajustes = []
+        for livro_id, (quantidade, preco) in sorted(lines.items()):
+            if livro_id not in books:
+                continue
+            book = books[livro_id]
+            motivos = []
+            nova_quantidade = quantidade
+            novo_preco = preco
+            
+            if book is None or not book.ativo:
+                motivos.append("indisponivel")
+                nova_quantidade = 0
+            else:
+                if book.estoque < quantidade:
+                    motivos.append("estoque_insuficiente")
+                    nova_quantidade = max(book.estoque, 0)
+                if book.preco != preco:
+                    motivos.append("preco_alterado")
+                    novo_preco = book.preco
+            
+            if motivos:
+                ajustes.append({
+                    "livro_id": livro_id,
+                    "motivos": motivos,
+                    "quantidade": quantidade,
+                    "nova_quantidade": nova_quantidade,
+                    "preco_unitario": preco,
+                    "novo_preco_unitario": novo_preco
+                })
+        return ajustes
+    
+    def _apply_adjustments(
+        self,
+        usuario_id: int,
+        books: Dict[int, Optional[CatalogBook]]
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Re-diff the locked cart and apply the adjustments in one transaction
+        
+        Returns:
+            Tuple of (cart data, applied adjustments)
+        """
+        cart = self.cart_repo.get_active_cart_by_user(usuario_id)
+        if not cart:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Carrinho não encontrado"
+            )
+        
+        cart_id = cart.id
+        ajustes = self._diff_lines(self.cart_repo.lock_cart_lines(cart_id), books)
+        if not ajustes:
+            self.cart_repo.rollback()
+            return self.get_cart(usuario_id), []
+        
+        events = line_events(
+            {a["livro_id"]: a["quantidade"] for a in ajustes},
+            {a["livro_id"]: a["nova_quantidade"] for a in ajustes}
+        )
+        mantidos = [a for a in ajustes if a["nova_quantidade"] > 0]
+        cart = self.cart_repo.apply_item_changes(
+            cart_id,
+            {a["livro_id"]: a["nova_quantidade"] for a in mantidos},
+            {a["livro_id"]: a["novo_preco_unitario"] for a in mantidos},
+            [a["livro_id"] for a in ajustes if a["nova_quantidade"] == 0],
+            update_prices=True
+        )
+        return self._sync_to_cache(cart, events), ajustes
+    
+    def revalidate_cart(
+        self,
+        usuario_id: int,
+        cart_data: Dict[str, Any],
+        books: Dict[int, Optional[CatalogBook]],
+        apply: bool = False
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Check every cart line against current catalog price, stock and status
         
-        # Refresh cart
-        cart = self.cart_repo.get_cart_by_id(cart.id)
+        Args:
+            usuario_id: User ID
+            cart_data: Cart data the catalog lookup was made for
+            books: Batched catalog lookup for all cart lines
+            apply: Apply the adjustments (one transaction and cache sync)
+            
+        Returns:
+            Tuple of (cart data, per-line adjustments)
+        """
+        if apply:
+            return self._apply_adjustments(usuario_id, books)
         
-        # Sync to cache
-        self._sync_to_cache(cart)
+        lines = {
+            item["livro_id"]: (item["quantidade"], item["preco_unitario"])
+            for item in cart_data["itens"]
+        }
+        return cart_data, self._diff_lines(lines, books)
+    
+    def checkout_cart(self, usuario_id: int) -> Dict[str, Any]:
+        """
+        Close the active cart (its items move to an order)
         
-        return cart
+        Args:
+            usuario_id: User ID
+            
+        Returns:
+            Final cart data dictionary (ativo = False)
+            
+        Raises:
+            HTTPException: If cart not found
+        """
+        cart = self.cart_repo.get_active_cart_by_user(usuario_id, with_items=True)
+        if not cart:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Carrinho não encontrado"
+            )
+        
+        cart_data = self._serialize_cart(cart)
+        self.cart_repo.deactivate_cart(cart.id)
+        # Tombstone, not a delete: a slow reader cannot write the closed cart back
+        self.redis_service.close_cart(
+            usuario_id,
+            cart.id,
+            [CartEvent(EVENT_CHECKOUT, "", cart_data["total_itens"])],
+            cart_data["versao"]
+        )
+        cart_data["ativo"] = False
+        return cart_data
     
-    def get_cart_summary(self, cart: Carrinho) -> Dict[str, Any]:
+    def get_cart_summary(self, cart_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Get cart summary with totals
         
         Args:
-            cart: Cart instance
+            cart_data: Cart data dictionary
             
         Returns:
             Cart summary dictionary
         """
         return {
-            "total_itens": cart.total_itens,
-            "subtotal": cart.valor_total,
-            "valor_total": cart.valor_total
+            "total_itens": cart_data["total_itens"],
+            "subtotal": cart_data["valor_total"],
+            "valor_total": cart_data["valor_total"]
         }
@@ -0,0 +1,123 @@
+# Cart Sweeper Service - Expires abandoned carts
+# Bounded batches in short transactions, pipelined Redis UNLINK, idle during peak hours
+
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+
+from config import settings
+from database import SessionLocal
+from repositories.cart_repository import CartRepository
+from services.redis_service import redis_service
+from services.write_behind_service import redis_cart_store
+from metrics import SWEEPER_CARTS, SWEEPER_ITEMS, SWEEPER_REDIS_KEYS, SWEEPER_BATCH_SECONDS
+
+
+def parse_hours(window: str) -> Optional[Tuple[int, int]]:
+    """Parse an "start-end" hour window (e.g. "8-23"); empty disables it"""
+    if not window:
+        return None
+    start, end = window.split("-")
+    return int(start), int(end)
+
+
+class CartSweeperService:
+    """Background worker expiring carts idle longer than cart_expiration_days"""
+
+    def __init__(self):
+        self.peak_hours = parse_hours(settings.cart_sweeper_peak_hours)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def in_peak_hours(self, now: Optional[datetime] = None) -> bool:
+        """Check if the current hour falls in the configured peak window"""
+        if self.peak_hours is None:
+            return False
+        hour = (now or datetime.now()).hour
+        start, end = self.peak_hours
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def sweep_batch(self) -> int:
+        """
+        Expire one batch and drop the matching Redis keys
+
+        Returns:
+            Number of carts expired (0 when nothing is left)
+        """
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            closed, carts, items = CartRepository(db).expire_idle_carts(
+                idle_days=settings.cart_expiration_days,
+                limit=settings.cart_sweeper_batch_size,
+                delete_carts=settings.cart_sweeper_delete,
+                lock_timeout_ms=settings.cart_sweeper_lock_timeout_ms
+            )
+        finally:
+            db.close()
+
+        if closed:
+            # Cached carts become tombstones (no late write-back); live hashes are unlinked
+            replaced = redis_service.close_carts(closed)
+            removed = redis_service.unlink([redis_cart_store.live_key(usuario_id) for usuario_id, _ in closed])
+            SWEEPER_REDIS_KEYS.inc(replaced + removed)
+
+        if carts:
+            SWEEPER_CARTS.inc(carts, action="delete" if settings.cart_sweeper_delete else "deactivate")
+            SWEEPER_ITEMS.inc(items)
+            SWEEPER_BATCH_SECONDS.observe(time.perf_counter() - started)
+        return carts
+
+    def sweep(self) -> int:
+        """
+        One sweep pass: batches until nothing is idle, peak hours start or stop is requested
+
+        Returns:
+            Number of carts expired in this pass
+        """
+        total = 0
+        started = time.perf_counter()
+        while not self._stop.is_set() and not self.in_peak_hours():
+            expired = self.sweep_batch()
+            total += expired
+            if expired < settings.cart_sweeper_batch_size:
+                break
+            # Let regular traffic through between batches
+            self._stop.wait(settings.cart_sweeper_pause)
+
+        if total:
+            elapsed = time.perf_counter() - started
+            print(f"Cart sweeper: {total} carts expired in {elapsed:.1f}s ({total / max(elapsed, 1e-6):.0f} carts/s)")
+        return total
+
+    def _run(self) -> None:
+        """Worker loop: one pass every cart_sweeper_interval seconds"""
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Cart sweeper error: {e}")
+            self._stop.wait(settings.cart_sweeper_interval)
+
+    def start(self) -> None:
+        """Start the background sweeper thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cart-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sweeper (the current batch finishes)"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+
+
+# Global cart sweeper instance
+cart_sweeper_service = CartSweeperService()
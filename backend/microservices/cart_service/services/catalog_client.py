@@ -0,0 +1,186 @@
+# Catalog Client - Price and stock lookups against catalog_service
+# Local TTL cache, concurrent lookups batched into one multi-ID request, in-flight coalescing
+
+import asyncio
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from config import settings
+
+
+class CatalogBook(NamedTuple):
+    """Price, stock and status of a catalog book"""
+    livro_id: int
+    preco: Decimal
+    estoque: int
+    ativo: bool
+
+
+class CatalogUnavailableError(Exception):
+    """Raised when the catalog cannot be reached and nothing is cached"""
+
+
+class CatalogClient:
+    """Client for batched, cached catalog price/stock lookups"""
+
+    def __init__(self):
+        # livro_id -> (expires_at, book or None if unknown to the catalog)
+        self._cache: "OrderedDict[int, Tuple[float, Optional[CatalogBook]]]" = OrderedDict()
+        self._in_flight: Dict[int, asyncio.Future] = {}
+        self._queued: List[int] = []
+        self._flush_scheduled = False
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP client lazily (inside the worker's event loop)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=f"{settings.catalog_service_url}{settings.api_prefix}",
+                timeout=settings.catalog_timeout
+            )
+        return self._client
+
+    # ========== Local cache ==========
+
+    def _cache_get(self, livro_id: int, allow_stale: bool = False) -> Tuple[bool, Optional[CatalogBook]]:
+        """Return (hit, book) from the local cache"""
+        entry = self._cache.get(livro_id)
+        if entry is None:
+            return False, None
+        expires_at, book = entry
+        if not allow_stale and expires_at < time.monotonic():
+            return False, None
+        return True, book
+
+    def _cache_set(self, livro_id: int, book: Optional[CatalogBook]) -> None:
+        """Store a lookup result, evicting the oldest entries beyond the size limit"""
+        self._cache[livro_id] = (time.monotonic() + settings.catalog_cache_ttl, book)
+        self._cache.move_to_end(livro_id)
+        while len(self._cache) > settings.catalog_cache_max_entries:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, livro_ids: Iterable[int]) -> None:
+        """Drop cached entries (e.g. after a checkout-time revalidation)"""
+        for livro_id in livro_ids:
+            self._cache.pop(livro_id, None)
+
+    # ========== Batching ==========
+
+    def _enqueue(self, livro_id: int) -> asyncio.Future:
+        """Join an in-flight lookup or queue a new one for the next batch"""
+        future = self._in_flight.get(livro_id)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._in_flight[livro_id] = future
+        self._queued.append(livro_id)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            # Short window so lookups from concurrent requests share one HTTP call
+            loop.call_later(settings.catalog_batch_window_ms / 1000, lambda: asyncio.ensure_future(self._flush()))
+        return future
+
+    async def _flush(self) -> None:
+        """Send queued IDs to the catalog in chunks and resolve their futures"""
+        queued, self._queued = self._queued, []
+        self._flush_scheduled = False
+
+        chunk_size = settings.catalog_batch_max_ids
+        await asyncio.gather(*(
+            self._fetch_chunk(queued[i:i + chunk_size])
+            for i in range(0, len(queued), chunk_size)
+        ))
+
+    async def _fetch_chunk(self, livro_ids: List[int]) -> None:
+        """One multi-ID catalog request for a chunk of queued IDs"""
+        try:
+            response = await self._get_client().get(
+                "/livros/disponibilidade",
+                params=[("ids", livro_id) for livro_id in livro_ids]
+            )
+            response.raise_for_status()
+            found = {
+                item["id"]: CatalogBook(
+                    livro_id=item["id"],
+                    preco=Decimal(str(item["preco"])).quantize(Decimal("0.01")),
+                    estoque=item["estoque"],
+                    ativo=item["ativo"]
+                )
+                for item in response.json()
+            }
+        except Exception as e:
+            print(f"Error fetching books from catalog: {e}")
+            # Each caller decides whether a stale entry is acceptable (see get_books)
+            for livro_id in livro_ids:
+                self._in_flight.pop(livro_id).set_exception(CatalogUnavailableError(str(e)))
+            return
+
+        for livro_id in livro_ids:
+            book = found.get(livro_id)
+            self._cache_set(livro_id, book)
+            self._in_flight.pop(livro_id).set_result(book)
+
+    # ========== Public API ==========
+
+    async def get_books(self, livro_ids: Iterable[int], fresh: bool = False) -> Dict[int, Optional[CatalogBook]]:
+        """
+        Resolve several books, from the local cache when possible
+
+        Args:
+            livro_ids: Book IDs
+            fresh: Bypass the local cache (checkout-time validation)
+
+        Returns:
+            Mapping of livro_id to CatalogBook (None if unknown to the catalog)
+
+        Raises:
+            CatalogUnavailableError: If the catalog is unreachable and a book is not
+                cached (always, for fresh lookups)
+        """
+        result: Dict[int, Optional[CatalogBook]] = {}
+        pending: Dict[int, asyncio.Future] = {}
+        for livro_id in dict.fromkeys(livro_ids):
+            if not fresh:
+                hit, book = self._cache_get(livro_id)
+                if hit:
+                    result[livro_id] = book
+                    continue
+            pending[livro_id] = self._enqueue(livro_id)
+
+        if pending:
+            # Shield: a cancelled request must not cancel a lookup shared with others
+            outcomes = await asyncio.gather(
+                *(asyncio.shield(f) for f in pending.values()),
+                return_exceptions=True
+            )
+            for livro_id, outcome in zip(pending.keys(), outcomes):
+                if isinstance(outcome, CatalogUnavailableError) and not fresh:
+                    # Serve a stale entry rather than failing the cart operation
+                    hit, book = self._cache_get(livro_id, allow_stale=True)
+                    if hit:
+                        result[livro_id] = book
+                        continue
+                if isinstance(outcome, BaseException):
+                    raise outcome
+                result[livro_id] = outcome
+        return result
+
+    async def get_book(self, livro_id: int) -> Optional[CatalogBook]:
+        """Resolve a single book (see get_books)"""
+        return (await self.get_books([livro_id]))[livro_id]
+
+    async def close(self) -> None:
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global catalog client instance
+catalog_client = CatalogClient()
@@ -0,0 +1,72 @@
+# Circuit Breaker - Fail fast while a dependency is down
+# closed -> open after consecutive failures; open -> half-open after a cooldown; one trial call decides
+
+import threading
+import time
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure circuit breaker"""
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Check if a call may be attempted
+
+        Open circuits let a single trial call through once the cooldown
+        has elapsed (half-open); every other call is rejected immediately.
+
+        Returns:
+            True if the call should be attempted
+        """
+        if self.state == CLOSED:
+            return True
+
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return self.state == CLOSED
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call"""
+        if self.state == CLOSED and self._failures == 0:
+            return
+        with self._lock:
+            self.state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def trip(self) -> None:
+        """Open the circuit immediately (e.g. dependency unreachable at startup)"""
+        with self._lock:
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold (or on a failed trial)"""
+        with self._lock:
+            self._failures += 1
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"Circuit opened after {self._failures} consecutive failures")
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
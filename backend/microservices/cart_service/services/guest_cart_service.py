@@ -0,0 +1,123 @@
+# Guest Cart Service - Carts for anonymous shoppers
+# Keyed by a session token, kept only in Redis (with TTL) until merged into the user's cart on login
+
+import secrets
+from typing import Optional, Dict, Any
+from decimal import Decimal
+from fastapi import HTTPException, status
+
+from services.redis_service import redis_service
+from services.cart_service import quantity_exceeded
+from services.redis_cart_store import GuestCartStore, CART_MISSING, QUANTITY_EXCEEDED, ITEM_NOT_FOUND
+from config import settings
+
+
+class GuestCartService:
+    """Service for guest cart operations"""
+
+    def __init__(self, store: GuestCartStore):
+        self.store = store
+
+    def _check_available(self) -> None:
+        """
+        Raises:
+            HTTPException: If Redis is not configured or its circuit is open
+        """
+        if not self.store.is_available() or not redis_service.is_connected():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Carrinho de convidado indisponível"
+            )
+
+    def _check_result(self, result: Any) -> Dict[str, Any]:
+        """
+        Map a store status code to an HTTP error
+
+        Raises:
+            HTTPException: If the cart or item does not exist or the quantity is exceeded
+        """
+        if result == CART_MISSING:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Carrinho de convidado não encontrado"
+            )
+        if result == QUANTITY_EXCEEDED:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Quantidade total não pode exceder {settings.max_quantity_per_item} unidades"
+            )
+        if result == ITEM_NOT_FOUND:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item não encontrado no carrinho"
+            )
+        return result
+
+    def create_cart(self) -> Dict[str, Any]:
+        """
+        Create an empty guest cart with a new session token
+
+        Returns:
+            Cart data dictionary (including the token)
+        """
+        self._check_available()
+        token = secrets.token_urlsafe(24)
+        self.store.create(token)
+        return self.store.get(token)
+
+    def get_cart(self, token: str) -> Dict[str, Any]:
+        """
+        Get guest cart (refreshes its TTL)
+
+        Raises:
+            HTTPException: If the guest cart does not exist
+        """
+        self._check_available()
+        return self._check_result(self.store.get(token) or CART_MISSING)
+
+    def add_item(
+        self,
+        token: str,
+        livro_id: int,
+        quantidade: int,
+        preco_unitario: Decimal,
+        limite: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Add item to a guest cart or increase its quantity (one atomic script call, line limit checked inside)"""
+        self._check_available()
+        result = self.store.add_item(token, livro_id, quantidade, preco_unitario, limite)
+        if result == QUANTITY_EXCEEDED:
+            raise quantity_exceeded(livro_id, limite)
+        return self._check_result(result)
+
+    def update_item_quantity(self, token: str, livro_id: int, quantidade: int) -> Dict[str, Any]:
+        """Set item quantity in a guest cart (0 removes the item)"""
+        self._check_available()
+        return self._check_result(self.store.set_quantity(token, livro_id, quantidade))
+
+    def remove_item(self, token: str, livro_id: int) -> Dict[str, Any]:
+        """Remove item from a guest cart"""
+        self._check_available()
+        return self._check_result(self.store.remove_item(token, livro_id))
+
+    def take(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Remove a guest cart for merging (one Redis round trip)
+
+        Returns:
+            Cart data dictionary or None if the guest cart does not exist
+        """
+        self._check_available()
+        return self.store.take(token)
+
+    def restore(self, cart_data: Dict[str, Any]) -> None:
+        """Put back a taken guest cart whose merge failed"""
+        try:
+            self.store.hydrate(cart_data, owner=cart_data["token"])
+        except Exception as e:
+            print(f"Error restoring guest cart: {e}")
+
+
+# Global guest cart store and service instances
+guest_cart_store = GuestCartStore(redis_service.redis_client)
+guest_cart_service = GuestCartService(guest_cart_store)
@@ -0,0 +1,290 @@
+# Live Cart Service - Cart operations on Redis-primary live carts
+# Used when cart_store_mode = "redis": mutations touch only Redis, PostgreSQL is written behind
+
+from typing import Optional, Dict, Any, Callable, List, Tuple
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from decimal import Decimal
+
+from services.cart_service import CartService, quantity_exceeded
+from services.catalog_client import CatalogBook
+from services.redis_cart_store import (
+    CART_MISSING, VERSION_CONFLICT, QUANTITY_EXCEEDED, ITEM_NOT_FOUND, SAVED_ITEM_MISSING
+)
+from services.write_behind_service import redis_cart_store, write_behind_service
+from services.saved_items_service import SavedItemsService, saved_items_store
+from services.saved_items_store import DIRTY_SET
+from config import settings
+
+
+class LiveCartService(CartService):
+    """Cart service backed by the Redis live cart store"""
+
+    def __init__(self, db: Session):
+        super().__init__(db)
+        self.store = redis_cart_store
+
+    def _load_live(self, usuario_id: int, create: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get the live cart, hydrating it from PostgreSQL when absent
+
+        Args:
+            usuario_id: User ID
+            create: Create the persisted cart if the user has none
+
+        Returns:
+            Cart data dictionary or None if no cart exists and create is False
+        """
+        cart_data = self.store.get(usuario_id)
+        if cart_data:
+            return cart_data
+
+        if create:
+            cart = self.cart_repo.get_or_create_cart(usuario_id, with_items=True)
+        else:
+            cart = self.cart_repo.get_active_cart_by_user(usuario_id, with_items=True)
+            if not cart:
+                return None
+
+        self.store.hydrate(self._serialize_cart(cart))
+        return self.store.get(usuario_id)
+
+    def _require_live(self, usuario_id: int) -> Dict[str, Any]:
+        """
+        Get the live cart or fail
+
+        Raises:
+            HTTPException: If cart not found
+        """
+        cart_data = self._load_live(usuario_id, create=False)
+        if not cart_data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Carrinho não encontrado"
+            )
+        return cart_data
+
+    def _mutate(self, usuario_id: int, mutation: Callable, *args: Any, create: bool = False) -> Any:
+        """
+        Run a store mutation, hydrating the live cart and retrying once if it is absent
+
+        Args:
+            usuario_id: User ID
+            mutation: RedisCartStore mutation method
+            create: Create the persisted cart if the user has none
+
+        Returns:
+            Updated cart dictionary or the script status code
+
+        Raises:
+            HTTPException: If cart not found or the expected version is outdated
+        """
+        result = mutation(usuario_id, *args)
+        if result == CART_MISSING:
+            if create:
+                self._load_live(usuario_id)
+            else:
+                self._require_live(usuario_id)
+            result = mutation(usuario_id, *args)
+        if result == VERSION_CONFLICT:
+            raise self._version_conflict(usuario_id)
+        return result
+
+    def get_cart(self, usuario_id: int) -> Dict[str, Any]:
+        """Get live cart for user (one HGETALL on the hot path)"""
+        return self._load_live(usuario_id)
+
+    def get_cart_count(self, usuario_id: int) -> Dict[str, Any]:
+        """Get live cart totals from the hash, falling back to the stored columns"""
+        totals = self.store.get_totals(usuario_id)
+        if totals is None:
+            return super().get_cart_count(usuario_id)
+        return {
+            "usuario_id": usuario_id,
+            "total_itens": totals[0],
+            "valor_total": totals[1]
+        }
+
+    def add_item_to_cart(
+        self,
+        usuario_id: int,
+        livro_id: int,
+        quantidade: int,
+        preco_unitario: Decimal,
+        limite: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Add item to the live cart or increase its quantity (one atomic script call, line limit checked inside)"""
+        self._validate_add(quantidade, preco_unitario)
+
+        result = self._mutate(
+            usuario_id, self.store.add_item, livro_id, quantidade, preco_unitario, limite, create=True
+        )
+        if result == QUANTITY_EXCEEDED:
+            raise quantity_exceeded(livro_id, limite)
+        return result
+
+    def move_saved_item(
+        self,
+        usuario_id: int,
+        lista: str,
+        livro_id: int,
+        quantidade: int,
+        preco_unitario: Decimal,
+        limite: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Move a book from a saved list into the live cart (one atomic script call)"""
+        self._validate_add(quantidade, preco_unitario)
+        SavedItemsService(self.cart_repo.db).ensure_loaded(usuario_id, lista)
+
+        result = self._mutate(
+            usuario_id, self.store.move_saved,
+            saved_items_store.key(usuario_id, lista), DIRTY_SET, saved_items_store.dirty_member(usuario_id, lista),
+            livro_id, quantidade, preco_unitario, limite,
+            create=True
+        )
+        if result == SAVED_ITEM_MISSING:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Livro não encontrado na lista"
+            )
+        if result == QUANTITY_EXCEEDED:
+            raise quantity_exceeded(livro_id, limite)
+        return result
+
+    def update_item_quantity(
+        self,
+        usuario_id: int,
+        livro_id: int,
+        quantidade: int,
+        expected_version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Set item quantity in the live cart (0 removes the item)"""
+        self._validate_quantity(quantidade)
+
+        result = self._mutate(usuario_id, self.store.set_quantity, livro_id, quantidade, expected_version)
+        if result == ITEM_NOT_FOUND:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item não encontrado no carrinho"
+            )
+        return result
+
+    def remove_item_from_cart(
+        self,
+        usuario_id: int,
+        livro_id: int,
+        expected_version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Remove item from the live cart"""
+        result = self._mutate(usuario_id, self.store.remove_item, livro_id, expected_version)
+        if result == ITEM_NOT_FOUND:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item não encontrado no carrinho"
+            )
+        return result
+
+    def clear_cart(self, usuario_id: int, expected_version: Optional[int] = None) -> Dict[str, Any]:
+        """Clear all items from the live cart"""
+        return self._mutate(usuario_id, self.store.clear, expected_version)
+
+    def apply_batch(
+        self,
+        usuario_id: int,
+        operacoes: List[Dict[str, Any]],
+        precos: Dict[int, Decimal],
+        expected_version: Optional[int] = None,
+        limites: Optional[Dict[int, int]] = None
+    ) -> Dict[str, Any]:
+        """Apply add/update/remove operations to the live cart in one atomic script call (line limits checked inside)"""
+        self._validate_batch(operacoes, precos)
+
+        result = self._mutate(
+            usuario_id, self.store.apply_batch, operacoes, precos, expected_version, limites, create=True
+        )
+        if result == QUANTITY_EXCEEDED:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Quantidade total de um livro excede o estoque disponível ou {settings.max_quantity_per_item} unidades"
+            )
+        if result == ITEM_NOT_FOUND:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item não encontrado no carrinho"
+            )
+        return result
+
+    def merge_guest_cart(self, usuario_id: int, itens: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge guest cart lines into the live cart in one atomic script call (clamped merge ops)"""
+        if not itens:
+            return self.get_cart(usuario_id)
+
+        operacoes = [
+            {"op": "merge", "livro_id": item["livro_id"], "quantidade": item["quantidade"]}
+            for item in itens
+        ]
+        precos = {item["livro_id"]: item["preco_unitario"] for item in itens}
+        return self._mutate(usuario_id, self.store.apply_batch, operacoes, precos, create=True)
+
+    def _apply_adjustments(
+        self,
+        usuario_id: int,
+        books: Dict[int, Optional[CatalogBook]]
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Re-diff the live cart and apply the adjustments in one atomic script call"""
+        cart_data = self._require_live(usuario_id)
+        lines = {
+            item["livro_id"]: (item["quantidade"], item["preco_unitario"])
+            for item in cart_data["itens"]
+        }
+        ajustes = self._diff_lines(lines, books)
+        if not ajustes:
+            return cart_data, []
+
+        operacoes = []
+        precos = {}
+        for ajuste in ajustes:
+            livro_id = ajuste["livro_id"]
+            if ajuste["nova_quantidade"] == 0:
+                operacoes.append({"op": "remove", "livro_id": livro_id})
+                continue
+            if ajuste["nova_quantidade"] != ajuste["quantidade"]:
+                operacoes.append({"op": "update", "livro_id": livro_id, "quantidade": ajuste["nova_quantidade"]})
+            if ajuste["novo_preco_unitario"] != ajuste["preco_unitario"]:
+                operacoes.append({"op": "price", "livro_id": livro_id})
+                precos[livro_id] = ajuste["novo_preco_unitario"]
+
+        # Quantities are absolute values computed from this read: apply them only
+        # if nothing changed the cart in between
+        result = self.store.apply_batch(usuario_id, operacoes, precos, cart_data["versao"])
+        if not isinstance(result, dict):
+            # VERSION_CONFLICT (or the cart expired) since the read: client retries
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Carrinho alterado durante a validação, tente novamente"
+            )
+        return result, ajustes
+
+    def checkout_cart(self, usuario_id: int) -> Dict[str, Any]:
+        """
+        Flush the live cart synchronously, then close it
+
+        Args:
+            usuario_id: User ID
+
+        Returns:
+            Final cart data dictionary (ativo = False)
+
+        Raises:
+            HTTPException: If cart not found
+        """
+        failed = write_behind_service.flush(self.cart_repo.db, [usuario_id])
+        if failed:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Não foi possível persistir o carrinho"
+            )
+
+        cart_data = super().checkout_cart(usuario_id)
+        self.store.delete(usuario_id)
+        return cart_data
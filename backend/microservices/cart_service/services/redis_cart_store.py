@@ -0,0 +1,628 @@
+# Redis Cart Store - Redis-primary live carts (cart_store_mode = "redis")
+# Live cart lives in a Redis hash mutated by Lua scripts; every mutation is journaled to a stream for write-behind
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, Dict, Any, List, Tuple
+
+import redis
+
+from config import settings
+from services.cart_events import EVENTS_STREAM, events_enabled
+
+
+# Hash layout of cart:live:{usuario_id}
+#   q:{livro_id}   quantity
+#   p:{livro_id}   unit price in cents
+#   total_itens, valor_total (cents)   totals maintained incrementally by the scripts
+#   carrinho_id, versao, data_criacao, data_atualizacao   metadata
+QTY_PREFIX = "q:"
+PRICE_PREFIX = "p:"
+
+# Mutation journal consumed by the write-behind worker
+WAL_STREAM = "cart:wal"
+WAL_GROUP = "cart-write-behind"
+
+# Status codes returned by mutation scripts (success returns the full hash)
+SAVED_ITEM_MISSING = -4
+VERSION_CONFLICT = -3
+CART_MISSING = -2
+QUANTITY_EXCEEDED = -1
+ITEM_NOT_FOUND = 0
+
+# Shared arguments of mutation scripts:
+# KEYS[1] = live key, KEYS[2] = journal stream, KEYS[3] = cart events stream
+# ARGV[1] = ttl, ARGV[2] = now, ARGV[3] = usuario_id ('' skips the journal), ARGV[4] = stream maxlen, ARGV[5] = op,
+# ARGV[6] = expected versao ('' = unconditional), ARGV[7] = events maxlen ('' = no events)
+# Scripts record cart events with emit(); they are published with the new version on commit
+_MUTATION_GUARD = """
+local events = {}
+local function emit(e, l, q)
+    events[#events + 1] = {e, l, q}
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -2
+end
+if ARGV[6] ~= '' and redis.call('HGET', KEYS[1], 'versao') ~= ARGV[6] then
+    return -3
+end
+"""
+
+_MUTATION_COMMIT = """
+local version = redis.call('HINCRBY', KEYS[1], 'versao', 1)
+redis.call('HSET', KEYS[1], 'data_atualizacao', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+if ARGV[3] ~= '' then
+    redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[4], '*', 'usuario_id', ARGV[3], 'op', ARGV[5])
+end
+if ARGV[7] ~= '' then
+    for _, event in ipairs(events) do
+        redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[7], '*',
+            'e', event[1], 'u', ARGV[3], 'l', event[2], 'q', event[3], 'v', version)
+    end
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+# ARGV[8] = livro_id, ARGV[9] = quantity to add, ARGV[10] = price cents, ARGV[11] = line limit
+_ADD_LINE = """
+local qty_field = 'q:' .. ARGV[8]
+local price_field = 'p:' .. ARGV[8]
+local current = tonumber(redis.call('HGET', KEYS[1], qty_field) or '0')
+local delta = tonumber(ARGV[9])
+if current + delta > tonumber(ARGV[11]) then
+    return -1
+end
+local price = tonumber(redis.call('HGET', KEYS[1], price_field) or '0')
+if current == 0 then
+    price = tonumber(ARGV[10])
+    redis.call('HSET', KEYS[1], price_field, price)
+end
+redis.call('HSET', KEYS[1], qty_field, current + delta)
+redis.call('HINCRBY', KEYS[1], 'total_itens', delta)
+redis.call('HINCRBY', KEYS[1], 'valor_total', delta * price)
+emit('add', ARGV[8], delta)
+"""
+
+ADD_SCRIPT = _MUTATION_GUARD + _ADD_LINE + _MUTATION_COMMIT
+
+# Move a book from a saved/wishlist sorted set into the cart (same arguments as ADD)
+# KEYS[4] = saved list, KEYS[5] = saved lists dirty set; ARGV[12] = dirty set member
+MOVE_SAVED_SCRIPT = _MUTATION_GUARD + """
+if not redis.call('ZSCORE', KEYS[4], ARGV[8]) then
+    return -4
+end
+""" + _ADD_LINE + """
+redis.call('ZREM', KEYS[4], ARGV[8])
+redis.call('SADD', KEYS[5], ARGV[12])
+""" + _MUTATION_COMMIT
+
+# ARGV[8] = livro_id, ARGV[9] = new quantity (0 removes the item)
+SET_SCRIPT = _MUTATION_GUARD + """
+local qty_field = 'q:' .. ARGV[8]
+local price_field = 'p:' .. ARGV[8]
+local current = redis.call('HGET', KEYS[1], qty_field)
+if not current then
+    return 0
+end
+local quantity = tonumber(ARGV[9])
+local delta = quantity - tonumber(current)
+local price = tonumber(redis.call('HGET', KEYS[1], price_field) or '0')
+if quantity == 0 then
+    redis.call('HDEL', KEYS[1], qty_field, price_field)
+    emit('remove', ARGV[8], 0)
+else
+    redis.call('HSET', KEYS[1], qty_field, quantity)
+    if delta ~= 0 then
+        emit('qty', ARGV[8], quantity)
+    end
+end
+redis.call('HINCRBY', KEYS[1], 'total_itens', delta)
+redis.call('HINCRBY', KEYS[1], 'valor_total', delta * price)
+""" + _MUTATION_COMMIT
+
+CLEAR_SCRIPT = _MUTATION_GUARD + """
+for _, field in ipairs(redis.call('HKEYS', KEYS[1])) do
+    local prefix = string.sub(field, 1, 2)
+    if prefix == 'q:' or prefix == 'p:' then
+        redis.call('HDEL', KEYS[1], field)
+    end
+end
+redis.call('HSET', KEYS[1], 'total_itens', 0, 'valor_total', 0)
+emit('clear', '', 0)
+""" + _MUTATION_COMMIT
+
+# ARGV[8] = max quantity, then (op, livro_id, quantity, price cents, line limit ('' = max quantity)) per operation
+# op is add, update, remove, price (reprice an existing item) or merge (add clamped to the line limit)
+# All operations are checked before anything is written: the batch applies fully or not at all
+BATCH_SCRIPT = _MUTATION_GUARD + """
+local max_quantity = tonumber(ARGV[8])
+local original, quantity, price = {}, {}, {}
+for i = 9, #ARGV, 5 do
+    local op, id = ARGV[i], ARGV[i + 1]
+    local limit = tonumber(ARGV[i + 4]) or max_quantity
+    if original[id] == nil then
+        original[id] = tonumber(redis.call('HGET', KEYS[1], 'q:' .. id) or '0')
+        quantity[id] = original[id]
+        price[id] = tonumber(redis.call('HGET', KEYS[1], 'p:' .. id) or '0')
+    end
+    local current = quantity[id]
+    if op == 'add' or op == 'merge' then
+        local target = current + tonumber(ARGV[i + 2])
+        if target > limit then
+            if op == 'add' then
+                return -1
+            end
+            target = limit
+        end
+        if current == 0 then
+            price[id] = tonumber(ARGV[i + 3])
+        end
+        quantity[id] = target
+    else
+        if current == 0 then
+            return 0
+        end
+        if op == 'price' then
+            price[id] = tonumber(ARGV[i + 3])
+        else
+            quantity[id] = op == 'remove' and 0 or tonumber(ARGV[i + 2])
+        end
+    end
+end
+local old_price = {}
+for id, _ in pairs(original) do
+    old_price[id] = tonumber(redis.call('HGET', KEYS[1], 'p:' .. id) or '0')
+end
+for id, q in pairs(quantity) do
+    if q == 0 then
+        redis.call('HDEL', KEYS[1], 'q:' .. id, 'p:' .. id)
+    else
+        redis.call('HSET', KEYS[1], 'q:' .. id, q, 'p:' .. id, price[id])
+    end
+    redis.call('HINCRBY', KEYS[1], 'total_itens', q - original[id])
+    redis.call('HINCRBY', KEYS[1], 'valor_total', q * price[id] - original[id] * old_price[id])
+    if original[id] == 0 and q > 0 then
+        emit('add', id, q)
+    elseif q == 0 and original[id] > 0 then
+        emit('remove', id, 0)
+    elseif q ~= original[id] then
+        emit('qty', id, q)
+    end
+end
+""" + _MUTATION_COMMIT
+
+# Populate the live hash from Postgres only if no live cart exists yet
+# KEYS[1] = live key; ARGV[1] = ttl; ARGV[2..] = field/value pairs
+HYDRATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+def _line_limit(limite: Optional[int]) -> int:
+    """Maximum quantity of one cart line (a stock limit never raises max_quantity_per_item)"""
+    if limite is None:
+        return settings.max_quantity_per_item
+    return min(limite, settings.max_quantity_per_item)
+
+
+def to_cents(value: Decimal) -> int:
+    """Convert a price to integer cents"""
+    return int((Decimal(value) * 100).quantize(Decimal("1")))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Convert integer cents to a 2-decimal price"""
+    return (Decimal(cents) / 100).quantize(Decimal("0.01"))
+
+
+class RedisCartStore:
+    """Store for live carts kept in Redis hashes"""
+
+    key_prefix = "cart:live:"
+
+    def __init__(self, client: Optional[redis.Redis], ttl: Optional[int] = None):
+        self.client = client
+        self.ttl = ttl or settings.cart_expiration_days * 86400
+        self._hydrate = client.register_script(HYDRATE_SCRIPT) if client else None
+        self._add = client.register_script(ADD_SCRIPT) if client else None
+        self._set = client.register_script(SET_SCRIPT) if client else None
+        self._clear = client.register_script(CLEAR_SCRIPT) if client else None
+        self._batch = client.register_script(BATCH_SCRIPT) if client else None
+        self._move_saved = client.register_script(MOVE_SAVED_SCRIPT) if client else None
+
+    def _key(self, usuario_id: int) -> str:
+        """Generate Redis key for a live cart"""
+        return f"{self.key_prefix}{usuario_id}"
+
+    def _journal_id(self, usuario_id: int) -> Any:
+        """Owner recorded in the write-behind journal ('' disables journaling)"""
+        return usuario_id
+
+    def _events_maxlen(self) -> Any:
+        """Cap of the cart events stream ('' disables events)"""
+        return settings.cart_events_maxlen if events_enabled() else ""
+
+    def live_key(self, usuario_id: int) -> str:
+        """Public name of a user's live cart key"""
+        return self._key(usuario_id)
+
+    def is_available(self) -> bool:
+        """Check if the store has a Redis client"""
+        return self.client is not None
+
+    # ========== Reads ==========
+
+    def _parse(self, usuario_id: int, raw: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Convert a live hash into the cart dictionary returned by CartService
+
+        Args:
+            usuario_id: User ID
+            raw: HGETALL result
+
+        Returns:
+            Cart data dictionary
+        """
+        itens = []
+        for field, value in raw.items():
+            if not field.startswith(QTY_PREFIX):
+                continue
+            livro_id = int(field[len(QTY_PREFIX):])
+            quantidade = int(value)
+            preco = from_cents(int(raw.get(f"{PRICE_PREFIX}{livro_id}", 0)))
+            itens.append({
+                "id": None,
+                "livro_id": livro_id,
+                "quantidade": quantidade,
+                "preco_unitario": preco,
+                "subtotal": preco * quantidade,
+                "data_criacao": None,
+                "data_atualizacao": None
+            })
+        itens.sort(key=lambda item: item["livro_id"])
+
+        return {
+            "id": int(raw.get("carrinho_id", 0)),
+            "usuario_id": usuario_id,
+            "ativo": True,
+            "versao": int(raw.get("versao", 0)),
+            "itens": itens,
+            "total_itens": int(raw.get("total_itens", 0)),
+            "valor_total": from_cents(int(raw.get("valor_total", 0))),
+            "data_criacao": raw.get("data_criacao"),
+            "data_atualizacao": raw.get("data_atualizacao")
+        }
+
+    def get(self, usuario_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get live cart and refresh its TTL in one round trip
+
+        Args:
+            usuario_id: User ID
+
+        Returns:
+            Cart data dictionary or None if no live cart exists
+        """
+        key = self._key(usuario_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(key)
+        pipe.expire(key, self.ttl)
+        raw, _ = pipe.execute()
+        if not raw:
+            return None
+        return self._parse(usuario_id, raw)
+
+    def get_totals(self, usuario_id: int) -> Optional[Tuple[int, Decimal]]:
+        """
+        Get live cart totals without reading items (one HMGET)
+
+        Returns:
+            Tuple of (total_itens, valor_total) or None if no live cart exists
+        """
+        total_itens, valor_total = self.client.hmget(self._key(usuario_id), "total_itens", "valor_total")
+        if total_itens is None:
+            return None
+        return int(total_itens), from_cents(int(valor_total or 0))
+
+    def exists(self, usuario_id: int) -> bool:
+        """Check if a live cart exists"""
+        return bool(self.client.exists(self._key(usuario_id)))
+
+    def hydrate(self, cart_data: Dict[str, Any], owner: Any = None) -> None:
+        """
+        Load a persisted cart into Redis (no-op if a live cart already exists)
+
+        Args:
+            cart_data: Serialized cart from Postgres
+            owner: Key owner (defaults to cart_data["usuario_id"])
+        """
+        fields: List[Any] = [
+            "carrinho_id", cart_data["id"],
+            "versao", cart_data.get("versao", 0),
+            "data_criacao", cart_data["data_criacao"],
+            "data_atualizacao", cart_data["data_atualizacao"],
+            "total_itens", cart_data["total_itens"],
+            "valor_total", to_cents(cart_data["valor_total"]),
+        ]
+        for item in cart_data["itens"]:
+            fields.extend([
+                f"{QTY_PREFIX}{item['livro_id']}", item["quantidade"],
+                f"{PRICE_PREFIX}{item['livro_id']}", to_cents(item["preco_unitario"]),
+            ])
+        owner = cart_data["usuario_id"] if owner is None else owner
+        self._hydrate(keys=[self._key(owner)], args=[self.ttl, *fields])
+
+    def snapshot(self, usuario_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Read a live cart for persistence (does not touch the TTL)
+
+        Returns:
+            Cart data dictionary or None if no live cart exists
+        """
+        raw = self.client.hgetall(self._key(usuario_id))
+        if not raw:
+            return None
+        return self._parse(usuario_id, raw)
+
+    # ========== Mutations ==========
+
+    def _mutate(
+        self,
+        script,
+        usuario_id: int,
+        op: str,
+        *args: Any,
+        expected_version: Optional[int] = None,
+        extra_keys: Tuple[str, ...] = ()
+    ) -> Any:
+        """
+        Run a mutation script: one atomic round trip that updates the hash,
+        its totals and version, journals the change for write-behind and
+        publishes its cart events
+
+        Args:
+            expected_version: Only apply if the live cart is at this version
+            extra_keys: Script-specific keys (KEYS[4] onwards)
+
+        Returns:
+            Updated cart dictionary, or the script status code on failure
+        """
+        result = script(
+            keys=[self._key(usuario_id), WAL_STREAM, EVENTS_STREAM, *extra_keys],
+            args=[
+                self.ttl,
+                datetime.utcnow().isoformat(),
+                self._journal_id(usuario_id),
+                settings.write_behind_stream_maxlen,
+                op,
+                "" if expected_version is None else expected_version,
+                self._events_maxlen(),
+                *args
+            ]
+        )
+        if isinstance(result, int):
+            return result
+        return self._parse(usuario_id, dict(zip(result[::2], result[1::2])))
+
+    def add_item(
+        self,
+        usuario_id: int,
+        livro_id: int,
+        quantidade: int,
+        preco_unitario: Decimal,
+        limite: Optional[int] = None
+    ) -> Any:
+        """
+        Atomically add quantity to an item, enforcing the line limit
+
+        Args:
+            usuario_id: User ID
+            livro_id: Book ID
+            quantidade: Quantity to add
+            preco_unitario: Unit price (kept if the item already exists)
+            limite: Maximum resulting line quantity (default max_quantity_per_item)
+
+        Returns:
+            Updated cart dictionary, CART_MISSING or QUANTITY_EXCEEDED
+        """
+        return self._mutate(
+            self._add, usuario_id, "add",
+            livro_id, quantidade, to_cents(preco_unitario), _line_limit(limite)
+        )
+
+    def move_saved(
+        self,
+        usuario_id: int,
+        saved_key: str,
+        dirty_set: str,
+        dirty_member: str,
+        livro_id: int,
+        quantidade: int,
+        preco_unitario: Decimal,
+        limite: Optional[int] = None
+    ) -> Any:
+        """
+        Atomically remove a book from a saved list and add it to the live cart
+
+        Args:
+            usuario_id: User ID
+            saved_key: Sorted set holding the saved list
+            dirty_set: Set of saved lists pending persistence
+            dirty_member: Member of dirty_set for this list
+            livro_id: Book ID
+            quantidade: Quantity to add
+            preco_unitario: Unit price (kept if the item already exists)
+            limite: Maximum resulting line quantity (default max_quantity_per_item)
+
+        Returns:
+            Updated cart dictionary, CART_MISSING, SAVED_ITEM_MISSING or QUANTITY_EXCEEDED
+        """
+        return self._mutate(
+            self._move_saved, usuario_id, "move",
+            livro_id, quantidade, to_cents(preco_unitario), _line_limit(limite), dirty_member,
+            extra_keys=(saved_key, dirty_set)
+        )
+
+    def set_quantity(
+        self,
+        usuario_id: int,
+        livro_id: int,
+        quantidade: int,
+        expected_version: Optional[int] = None
+    ) -> Any:
+        """
+        Atomically set an item quantity (0 removes the item)
+
+        Returns:
+            Updated cart dictionary, CART_MISSING, VERSION_CONFLICT or ITEM_NOT_FOUND
+        """
+        return self._mutate(
+            self._set, usuario_id, "set", livro_id, quantidade, expected_version=expected_version
+        )
+
+    def remove_item(self, usuario_id: int, livro_id: int, expected_version: Optional[int] = None) -> Any:
+        """
+        Atomically remove an item
+
+        Returns:
+            Updated cart dictionary, CART_MISSING, VERSION_CONFLICT or ITEM_NOT_FOUND
+        """
+        return self._mutate(self._set, usuario_id, "remove", livro_id, 0, expected_version=expected_version)
+
+    def clear(self, usuario_id: int, expected_version: Optional[int] = None) -> Any:
+        """
+        Atomically remove all items, keeping cart metadata
+
+        Returns:
+            Updated cart dictionary, CART_MISSING or VERSION_CONFLICT
+        """
+        return self._mutate(self._clear, usuario_id, "clear", expected_version=expected_version)
+
+    def apply_batch(
+        self,
+        usuario_id: int,
+        operacoes: List[Dict[str, Any]],
+        precos: Dict[int, Decimal],
+        expected_version: Optional[int] = None,
+        limites: Optional[Dict[int, int]] = None
+    ) -> Any:
+        """
+        Atomically apply add/update/remove/price operations (all or nothing)
+
+        Args:
+            usuario_id: User ID
+            operacoes: Operations in order ({"op", "livro_id", "quantidade"})
+            precos: Unit price per livro_id being added, merged or repriced
+            expected_version: Only apply if the live cart is at this version
+            limites: Maximum resulting quantity per livro_id for adds and merges
+                (default max_quantity_per_item)
+
+        Returns:
+            Updated cart dictionary, CART_MISSING, VERSION_CONFLICT, QUANTITY_EXCEEDED or ITEM_NOT_FOUND
+        """
+        args: List[Any] = [settings.max_quantity_per_item]
+        for operacao in operacoes:
+            livro_id = operacao["livro_id"]
+            args.extend([
+                operacao["op"],
+                livro_id,
+                operacao.get("quantidade") or 0,
+                to_cents(precos[livro_id]) if livro_id in precos else 0,
+                (limites or {}).get(livro_id, "")
+            ])
+        return self._mutate(self._batch, usuario_id, "batch", *args, expected_version=expected_version)
+
+    def delete(self, usuario_id: int) -> None:
+        """Drop a live cart (after checkout)"""
+        self.client.delete(self._key(usuario_id))
+
+    # ========== Write-behind journal ==========
+
+    def ensure_group(self) -> None:
+        """Create the write-behind consumer group (replays from the start of the stream)"""
+        try:
+            self.client.xgroup_create(WAL_STREAM, WAL_GROUP, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def claim_pending(self, consumer: str, min_idle_ms: int, count: int) -> List[Tuple[str, Dict[str, str]]]:
+        """Claim journal entries left un-acknowledged by a crashed consumer"""
+        result = self.client.xautoclaim(WAL_STREAM, WAL_GROUP, consumer, min_idle_ms, "0-0", count=count)
+        return [entry for entry in result[1] if entry and entry[1]]
+
+    def read_new(self, consumer: str, count: int, block_ms: int) -> List[Tuple[str, Dict[str, str]]]:
+        """Read new journal entries for this consumer"""
+        response = self.client.xreadgroup(WAL_GROUP, consumer, {WAL_STREAM: ">"}, count=count, block=block_ms)
+        if not response:
+            return []
+        return response[0][1]
+
+    def acknowledge(self, entry_ids: List[str]) -> None:
+        """Acknowledge and drop persisted journal entries"""
+        if not entry_ids:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        pipe.xack(WAL_STREAM, WAL_GROUP, *entry_ids)
+        pipe.xdel(WAL_STREAM, *entry_ids)
+        pipe.execute()
+
+
+class GuestCartStore(RedisCartStore):
+    """Store for anonymous carts keyed by session token (Redis only, expire with their TTL)"""
+
+    key_prefix = "cart:guest:"
+
+    def __init__(self, client: Optional[redis.Redis]):
+        super().__init__(client, ttl=settings.guest_cart_ttl)
+
+    def _journal_id(self, token: str) -> Any:
+        """Guest carts are never written behind"""
+        return ""
+
+    def _events_maxlen(self) -> Any:
+        """Guest carts publish no cart events (no user yet)"""
+        return ""
+
+    def _parse(self, token: str, raw: Dict[str, str]) -> Dict[str, Any]:
+        """Convert a guest hash into a cart dictionary keyed by token"""
+        cart_data = super()._parse(token, raw)
+        cart_data["token"] = cart_data.pop("usuario_id")
+        return cart_data
+
+    def create(self, token: str) -> None:
+        """Create an empty guest cart"""
+        now = datetime.utcnow().isoformat()
+        self.hydrate({
+            "id": 0,
+            "versao": 0,
+            "itens": [],
+            "total_itens": 0,
+            "valor_total": Decimal("0.00"),
+            "data_criacao": now,
+            "data_atualizacao": now
+        }, owner=token)
+
+    def take(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Read and delete a guest cart atomically in one round trip (MULTI: HGETALL + DEL)
+
+        A cart can therefore be merged only once, even by concurrent logins.
+
+        Returns:
+            Cart data dictionary or None if the guest cart does not exist
+        """
+        key = self._key(token)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(key)
+        pipe.delete(key)
+        raw, _ = pipe.execute()
+        if not raw:
+            return None
+        return self._parse(token, raw)
@@ -1,39 +1,392 @@
 # Redis Service - Cart session caching
 # Handles Redis operations for cart data caching
 
-import json
+import threading
 import redis
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple, List, Set
 from decimal import Decimal
 
 from config import settings
+from metrics import REDIS_CACHE_SKIPS, REDIS_CIRCUIT_STATE, CART_EVENTS, CART_EVENTS_DROPPED
+from services.cart_events import EVENTS_STREAM, PUBLISH_EVENTS, CartEvent, encode_events, events_enabled
+from services.circuit_breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+from services.redis_cart_store import to_cents, from_cents
+
+
+# Cached entries are ordered by (cart id, version): cart ids are serial, so a newer cart row
+# always replaces an older one, even though its versao starts again at 0. A closed cart
+# (checkout, sweeper) leaves a tombstone {id, x} that refuses late writes of that same cart.
+_IS_NEWER = """
+local function is_newer(key, version_field, id, version)
+    local cached = redis.call('HMGET', key, 'id', version_field, 'x')
+    if not cached[1] then
+        return true
+    end
+    local cached_id, incoming_id = tonumber(cached[1]), tonumber(id)
+    if cached_id ~= incoming_id then
+        return cached_id < incoming_id
+    end
+    return not cached[3] and tonumber(cached[2] or '-1') <= tonumber(version)
+end
+"""
+
+# Badge counter update, skipped if the stored counter is newer.
+# KEYS[n] = count key; ARGV = cart id, version, total_itens, valor_total, ttl
+_SET_COUNT = _IS_NEWER + """
+local function set_count(key, id, version, total_itens, valor_total, ttl)
+    if not is_newer(key, 'versao', id, version) then
+        return 0
+    end
+    redis.call('DEL', key)
+    redis.call('HSET', key, 'id', id, 'versao', version, 'total_itens', total_itens, 'valor_total', valor_total)
+    redis.call('EXPIRE', key, ttl)
+    return 1
+end
+"""
+
+# Hash layout of cart:h:{usuario_id} (kept small so Redis stores it as a listpack)
+#   i:{livro_id}   "quantity:unit price in cents"
+#   id, v (versao), n (total_itens), t (valor_total in cents), c/u (data_criacao/data_atualizacao)
+ITEM_PREFIX = "i:"
+
+# Write-through of the whole cart, only if the cached cart is not newer.
+# The badge counter is updated and cart events are published in the same atomic step
+# (events describe the committed change, so they are published even if the write is skipped).
+# KEYS[1] = cart key, KEYS[2] = count key, KEYS[3] = events stream
+# ARGV = version, ttl, total_itens, valor_total, usuario_id, events maxlen, event arg count n,
+# cart id, n event args, field/value pairs...
+SET_IF_NEWER_SCRIPT = _SET_COUNT + PUBLISH_EVENTS + """
+local fields = 9 + tonumber(ARGV[7])
+publish_events(KEYS[3], ARGV[6], ARGV[5], ARGV[1], 9, fields - 1)
+if not is_newer(KEYS[1], 'v', ARGV[8], ARGV[1]) then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, fields))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+set_count(KEYS[2], ARGV[8], ARGV[1], ARGV[3], ARGV[4], ARGV[2])
+return 1
+"""
+
+# Single-item write-through: one HSET/HDEL, applied only on top of the previous version.
+# Returns 0 if the cached cart is missing, another cart or not exactly one version behind
+# (caller rewrites it whole); the events are published either way.
+# KEYS as above; ARGV = version, ttl, total_itens, valor_total, valor_total cents, data_atualizacao,
+# item field, packed item ('' removes it), usuario_id, events maxlen, cart id, event args...
+SET_LINE_SCRIPT = _SET_COUNT + PUBLISH_EVENTS + """
+publish_events(KEYS[3], ARGV[10], ARGV[9], ARGV[1], 12, #ARGV)
+local cached = redis.call('HMGET', KEYS[1], 'id', 'v', 'x')
+if cached[1] ~= ARGV[11] or cached[3] or tonumber(cached[2] or '-1') ~= tonumber(ARGV[1]) - 1 then
+    return 0
+end
+if ARGV[8] == '' then
+    redis.call('HDEL', KEYS[1], ARGV[7])
+else
+    redis.call('HSET', KEYS[1], ARGV[7], ARGV[8])
+end
+redis.call('HSET', KEYS[1], 'v', ARGV[1], 'n', ARGV[3], 't', ARGV[5], 'u', ARGV[6])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+set_count(KEYS[2], ARGV[11], ARGV[1], ARGV[3], ARGV[4], ARGV[2])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+# KEYS[1] = count key; ARGV = cart id, version, total_itens, valor_total, ttl
+SET_COUNT_IF_NEWER_SCRIPT = _SET_COUNT + """
+return set_count(KEYS[1], ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5])
+"""
+
+# Replace the cached cart and counter of closed carts with tombstones (skipped where a newer
+# cart is already cached). KEYS = cart key, count key per cart; ARGV = ttl, cart id per cart
+CLOSE_CARTS_SCRIPT = """
+local replaced = 0
+for i = 2, #ARGV do
+    local id = ARGV[i]
+    for _, key in ipairs({KEYS[2 * i - 3], KEYS[2 * i - 2]}) do
+        if tonumber(redis.call('HGET', key, 'id') or '-1') <= tonumber(id) then
+            replaced = replaced + redis.call('DEL', key)
+            redis.call('HSET', key, 'id', id, 'x', 1)
+            redis.call('EXPIRE', key, ARGV[1])
+        end
+    end
+end
+return replaced
+"""
+
+
+def encode_cart(cart_data: Dict[str, Any]) -> List[Any]:
+    """
+    Flatten a serialized cart into hash field/value pairs
+    
+    Per-item ids and timestamps are not cached; prices are integer cents.
+    
+    Args:
+        cart_data: Cart data dictionary (from CartService)
+        
+    Returns:
+        Flat list of field/value pairs
+    """
+    fields: List[Any] = [
+        "id", cart_data["id"],
+        "v", cart_data.get("versao", 0),
+        "n", cart_data["total_itens"],
+        "t", to_cents(cart_data["valor_total"]),
+        "c", cart_data["data_criacao"],
+        "u", cart_data["data_atualizacao"],
+    ]
+    for item in cart_data["itens"]:
+        fields.extend([
+            f"{ITEM_PREFIX}{item['livro_id']}",
+            f"{item['quantidade']}:{to_cents(item['preco_unitario'])}"
+        ])
+    return fields
+
+
+def decode_cart(usuario_id: int, raw: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Rebuild the cart dictionary returned by CartService from a cached hash
+    
+    Args:
+        usuario_id: User ID
+        raw: HGETALL result
+        
+    Returns:
+        Cart data dictionary
+    """
+    itens = []
+    for field, value in raw.items():
+        if not field.startswith(ITEM_PREFIX):
+            continue
+        quantidade, cents = value.split(":")
+        preco = from_cents(int(cents))
+        itens.append({
+            "id": None,
+            "livro_id": int(field[len(ITEM_PREFIX):]),
+            "quantidade": int(quantidade),
+            "preco_unitario": preco,
+            "subtotal": preco * int(quantidade),
+            "data_criacao": None,
+            "data_atualizacao": None
+        })
+    itens.sort(key=lambda item: item["livro_id"])
+    
+    return {
+        "id": int(raw["id"]),
+        "usuario_id": usuario_id,
+        "ativo": True,
+        "versao": int(raw["v"]),
+        "itens": itens,
+        "total_itens": int(raw["n"]),
+        "valor_total": from_cents(int(raw["t"])),
+        "data_criacao": raw["c"],
+        "data_atualizacao": raw["u"]
+    }
+
+
+# Circuit state exported as a gauge
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Errors meaning Redis is unreachable (other errors do not trip the circuit)
+_CONNECTION_ERRORS = (redis.ConnectionError, redis.TimeoutError)
+
+# Users whose write-through was skipped, remembered until Redis recovers
+_MAX_STALE_USERS = 100000
 
 
 class RedisService:
     """Service for Redis cache operations"""
     
     def __init__(self):
-        """Initialize Redis connection"""
+        """
+        Initialize the Redis connection pool
+        
+        Cache calls never PING: a circuit breaker fed by call outcomes and a
+        background probe skips Redis immediately while it is down.
+        """
+        self.breaker = CircuitBreaker(
+            settings.redis_breaker_failure_threshold,
+            settings.redis_breaker_cooldown
+        )
+        self._probe_stop = threading.Event()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._stale: Set[int] = set()
+        self._stale_lock = threading.Lock()
         try:
-            self.redis_client = redis.from_url(
+            pool = redis.BlockingConnectionPool.from_url(
                 settings.redis_url,
+                max_connections=settings.redis_max_connections,
+                timeout=settings.redis_pool_timeout,
                 decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5
+                socket_connect_timeout=settings.redis_connect_timeout,
+                socket_timeout=settings.redis_socket_timeout
             )
-            # Test connection
-            self.redis_client.ping()
-        except redis.ConnectionError as e:
-            print(f"Warning: Could not connect to Redis: {e}")
+            self.redis_client = redis.Redis(connection_pool=pool)
+            self._set_if_newer = self.redis_client.register_script(SET_IF_NEWER_SCRIPT)
+            self._set_line = self.redis_client.register_script(SET_LINE_SCRIPT)
+            self._set_count_if_newer = self.redis_client.register_script(SET_COUNT_IF_NEWER_SCRIPT)
+            self._close_carts = self.redis_client.register_script(CLOSE_CARTS_SCRIPT)
+        except Exception as e:
+            print(f"Warning: Invalid Redis configuration: {e}")
             self.redis_client = None
+            return
+        
+        # Unreachable at startup: start open, the probe closes the circuit on recovery
+        if not self.probe():
+            self.breaker.trip()
+            REDIS_CIRCUIT_STATE.set(_STATE_VALUES[OPEN])
+    
+    # ========== Health ==========
+    
+    def _allow(self, operation: str) -> bool:
+        """
+        Check if a cache operation may hit Redis (no network call)
+        
+        Args:
+            operation: Operation name for the skip metric
+            
+        Returns:
+            True if Redis should be called
+        """
+        if self.redis_client is None:
+            REDIS_CACHE_SKIPS.inc(operation=operation, reason="unconfigured")
+            return False
+        if not self.breaker.allow():
+            REDIS_CACHE_SKIPS.inc(operation=operation, reason="circuit_open")
+            return False
+        return True
+    
+    def _mark_stale(self, usuario_id: int) -> None:
+        """Remember a cart whose cached copy missed a write"""
+        with self._stale_lock:
+            if len(self._stale) < _MAX_STALE_USERS:
+                self._stale.add(usuario_id)
+            elif len(self._stale) == _MAX_STALE_USERS:
+                print("Warning: too many carts missed the cache; stale entries expire with their TTL")
+    
+    def _succeeded(self) -> None:
+        """Record a successful Redis call (resets the failure count, closes an open circuit)"""
+        if self.breaker.state == CLOSED:
+            # Fast path inside record_success when there were no failures
+            self.breaker.record_success()
+            return
+        
+        # Drop carts written only to Postgres during the outage before serving reads again
+        with self._stale_lock:
+            stale, self._stale = self._stale, set()
+        if stale:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for usuario_id in stale:
+                    pipe.unlink(*self.cart_keys(usuario_id))
+                pipe.execute()
+            except Exception as e:
+                print(f"Error invalidating stale carts in Redis: {e}")
+                with self._stale_lock:
+                    self._stale |= stale
+                self.breaker.record_failure()
+                REDIS_CIRCUIT_STATE.set(_STATE_VALUES[self.breaker.state])
+                return
+        
+        self.breaker.record_success()
+        REDIS_CIRCUIT_STATE.set(_STATE_VALUES[self.breaker.state])
+    
+    def _failed(self, operation: str, error: Exception) -> None:
+        """Record a failed Redis call (connection errors feed the circuit breaker)"""
+        REDIS_CACHE_SKIPS.inc(operation=operation, reason="error")
+        if isinstance(error, _CONNECTION_ERRORS):
+            self.breaker.record_failure()
+            REDIS_CIRCUIT_STATE.set(_STATE_VALUES[self.breaker.state])
+    
+    def probe(self) -> bool:
+        """
+        PING Redis and update the circuit (used by the background probe only)
+        
+        Returns:
+            True if Redis answered
+        """
+        if self.redis_client is None:
+            return False
+        try:
+            self.redis_client.ping()
+        except Exception as e:
+            if self.breaker.state == CLOSED:
+                print(f"Warning: Redis health probe failed: {e}")
+            self.breaker.record_failure()
+            REDIS_CIRCUIT_STATE.set(_STATE_VALUES[self.breaker.state])
+            return False
+        self._succeeded()
+        return True
+    
+    def _run_probe(self) -> None:
+        """Probe loop: one PING every redis_health_interval seconds"""
+        while not self._probe_stop.wait(settings.redis_health_interval):
+            self.probe()
+    
+    def start_health_probe(self) -> None:
+        """Start the background health probe thread"""
+        if self._probe_thread is not None or self.redis_client is None:
+            return
+        self._probe_stop.clear()
+        self._probe_thread = threading.Thread(target=self._run_probe, name="redis-health-probe", daemon=True)
+        self._probe_thread.start()
+    
+    def stop_health_probe(self) -> None:
+        """Stop the background health probe"""
+        if self._probe_thread is None:
+            return
+        self._probe_stop.set()
+        self._probe_thread.join(timeout=settings.redis_health_interval + 1)
+        self._probe_thread = None
+    
+    def is_connected(self) -> bool:
+        """Check if Redis is usable (circuit not open; no network call)"""
+        return self.redis_client is not None and self.breaker.state != OPEN
+    
+    # ========== Keys ==========
     
     def _get_cart_key(self, usuario_id: int) -> str:
         """Generate Redis key for cart"""
-        return f"cart:user:{usuario_id}"
+        return f"cart:h:{usuario_id}"
+    
+    def _get_count_key(self, usuario_id: int) -> str:
+        """Generate Redis key for the cart badge counter"""
+        return f"cart:count:{usuario_id}"
+    
+    def cart_keys(self, usuario_id: int) -> List[str]:
+        """All cache keys held for a user's cart"""
+        return [self._get_cart_key(usuario_id), self._get_count_key(usuario_id)]
+    
+    def unlink(self, keys: List[str], chunk_size: int = 500) -> int:
+        """
+        Remove keys with pipelined UNLINK (memory is reclaimed off the main thread)
+        
+        Args:
+            keys: Keys to remove
+            chunk_size: Keys per UNLINK command
+            
+        Returns:
+            Number of keys that existed
+        """
+        if not keys or not self._allow("unlink"):
+            return 0
+        
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for i in range(0, len(keys), chunk_size):
+                pipe.unlink(*keys[i:i + chunk_size])
+            removed = sum(pipe.execute())
+            self._succeeded()
+            return removed
+            
+        except Exception as e:
+            print(f"Error unlinking keys from Redis: {e}")
+            self._failed("unlink", e)
+            return 0
+    
+    # ========== Cart cache ==========
     
     def get_cart(self, usuario_id: int) -> Optional[Dict[str, Any]]:
         """
-        Get cart data from Redis cache
+        Get cart data from Redis cache, refreshing its TTL
         
         Args:
             usuario_id: User ID
@@ -41,95 +394,328 @@ class RedisService:
         Returns:
             Cart data dictionary or None if not found
         """
-        if not self.redis_client:
+        if not self._allow("get_cart"):
             return None
         
         try:
             key = self._get_cart_key(usuario_id)
-            data = self.redis_client.get(key)
-            
-            if data:
-                cart_data = json.loads(data)
-                # Convert string Decimals back to Decimal objects
-                if 'itens' in cart_data:
-                    for item in cart_data['itens']:
-                        if 'preco_unitario' in item:
-                            item['preco_unitario'] = Decimal(str(item['preco_unitario']))
-                        if 'subtotal' in item:
-                            item['subtotal'] = Decimal(str(item['subtotal']))
-                if 'valor_total' in cart_data:
-                    cart_data['valor_total'] = Decimal(str(cart_data['valor_total']))
-                return cart_data
+            recovering = self.breaker.state != CLOSED
+            # HGETALL + EXPIRE in a single round trip
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hgetall(key)
+            pipe.expire(key, settings.redis_ttl)
+            raw, _ = pipe.execute()
+            self._succeeded()
+            if recovering:
+                # Read before stale carts were dropped: treat as a miss
+                return None
+            
+            # A tombstone (closed cart) is a miss
+            if raw and "x" not in raw:
+                return decode_cart(usuario_id, raw)
             
             return None
             
         except Exception as e:
             print(f"Error getting cart from Redis: {e}")
+            self._failed("get_cart", e)
             return None
     
-    def set_cart(self, usuario_id: int, cart_data: Dict[str, Any]) -> bool:
+    def _events_published(self, events: Optional[List[CartEvent]]) -> None:
+        """Count events published by a successful script call"""
+        for event in events or ():
+            CART_EVENTS.inc(type=event.tipo)
+    
+    def _events_dropped(self, events: Optional[List[CartEvent]]) -> None:
+        """Count events lost with a skipped or failed Redis call"""
+        if events and events_enabled():
+            CART_EVENTS_DROPPED.inc(len(events))
+    
+    def set_cart(self, usuario_id: int, cart_data: Dict[str, Any], events: Optional[List[CartEvent]] = None) -> bool:
         """
-        Save cart data to Redis cache
+        Save cart data to Redis cache (version-checked write-through)
+        
+        The write is skipped when the cached cart is newer (a later cart
+        row, or the same cart at a higher ``versao``) or was closed, so
+        out-of-order writers never replace a newer cart with a stale one.
+        Events are appended to the cart:events stream by the same script call.
         
         Args:
             usuario_id: User ID
-            cart_data: Cart data dictionary
+            cart_data: Cart data dictionary (with ``versao``)
+            events: Cart events of the mutation being written through
             
         Returns:
-            True if successful, False otherwise
+            True if written, False if stale or on error
         """
-        if not self.redis_client:
+        if not self._allow("set_cart"):
+            self._mark_stale(usuario_id)
+            self._events_dropped(events)
             return False
         
         try:
-            key = self._get_cart_key(usuario_id)
-            
-            # Convert Decimal objects to strings for JSON serialization
-            cart_copy = cart_data.copy()
-            if 'itens' in cart_copy:
-                for item in cart_copy['itens']:
-                    if 'preco_unitario' in item and isinstance(item['preco_unitario'], Decimal):
-                        item['preco_unitario'] = str(item['preco_unitario'])
-                    if 'subtotal' in item and isinstance(item['subtotal'], Decimal):
-                        item['subtotal'] = str(item['subtotal'])
-            if 'valor_total' in cart_copy and isinstance(cart_copy['valor_total'], Decimal):
-                cart_copy['valor_total'] = str(cart_copy['valor_total'])
-            
-            # Serialize to JSON and save with TTL
-            json_data = json.dumps(cart_copy, default=str)
-            self.redis_client.setex(
-                key,
-                settings.redis_ttl,
-                json_data
+            event_args = encode_events(events or [])
+            written = self._set_if_newer(
+                keys=[self._get_cart_key(usuario_id), self._get_count_key(usuario_id), EVENTS_STREAM],
+                args=[
+                    cart_data.get("versao", 0),
+                    settings.redis_ttl,
+                    cart_data["total_itens"],
+                    str(cart_data["valor_total"]),
+                    usuario_id,
+                    settings.cart_events_maxlen,
+                    len(event_args),
+                    cart_data["id"],
+                    *event_args,
+                    *encode_cart(cart_data)
+                ]
             )
-            return True
+            self._succeeded()
+            if event_args:
+                self._events_published(events)
+            return bool(written)
             
         except Exception as e:
             print(f"Error saving cart to Redis: {e}")
+            self._failed("set_cart", e)
+            self._events_dropped(events)
+            # Never leave a stale cart behind an authoritative read path
+            self._mark_stale(usuario_id)
+            if self.breaker.state != OPEN:
+                try:
+                    self.redis_client.delete(self._get_cart_key(usuario_id), self._get_count_key(usuario_id))
+                except Exception:
+                    pass
+            return False
+    
+    def set_cart_line(
+        self,
+        usuario_id: int,
+        carrinho_id: int,
+        livro_id: int,
+        quantidade: int,
+        preco_unitario: Decimal,
+        versao: int,
+        total_itens: int,
+        valor_total: Decimal,
+        data_atualizacao: str,
+        events: Optional[List[CartEvent]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Write a single-item change through to the cached cart (one HSET/HDEL)
+        
+        Applied only if the cached cart is this cart at version ``versao - 1``;
+        the events are published by the same script call in any case.
+        
+        Args:
+            usuario_id: User ID
+            carrinho_id: Cart ID
+            livro_id: Book ID
+            quantidade: New quantity (0 removes the item)
+            preco_unitario: Unit price
+            versao: Cart version after the change
+            total_itens: Cart total units after the change
+            valor_total: Cart total value after the change
+            data_atualizacao: Cart update timestamp (ISO format)
+            events: Cart events of the mutation
+            
+        Returns:
+            Updated cart data dictionary, or None if the whole cart must be written
+        """
+        if not self._allow("set_cart_line"):
+            self._mark_stale(usuario_id)
+            self._events_dropped(events)
+            return None
+        
+        try:
+            event_args = encode_events(events or [])
+            raw = self._set_line(
+                keys=[self._get_cart_key(usuario_id), self._get_count_key(usuario_id), EVENTS_STREAM],
+                args=[
+                    versao,
+                    settings.redis_ttl,
+                    total_itens,
+                    str(valor_total),
+                    to_cents(valor_total),
+                    data_atualizacao,
+                    f"{ITEM_PREFIX}{livro_id}",
+                    f"{quantidade}:{to_cents(preco_unitario)}" if quantidade else "",
+                    usuario_id,
+                    settings.cart_events_maxlen,
+                    carrinho_id,
+                    *event_args
+                ]
+            )
+            self._succeeded()
+            if event_args:
+                self._events_published(events)
+            if not raw:
+                return None
+            return decode_cart(usuario_id, dict(zip(raw[::2], raw[1::2])))
+            
+        except Exception as e:
+            print(f"Error saving cart line to Redis: {e}")
+            self._failed("set_cart_line", e)
+            self._events_dropped(events)
+            return None
+    
+    def get_cart_count(self, usuario_id: int) -> Optional[Tuple[int, Decimal]]:
+        """
+        Get the cart badge counter (one HMGET, no cart payload)
+        
+        Args:
+            usuario_id: User ID
+            
+        Returns:
+            Tuple of (total_itens, valor_total) or None if not cached
+        """
+        if not self._allow("get_cart_count"):
+            return None
+        
+        try:
+            recovering = self.breaker.state != CLOSED
+            total_itens, valor_total = self.redis_client.hmget(
+                self._get_count_key(usuario_id), "total_itens", "valor_total"
+            )
+            self._succeeded()
+            if recovering or total_itens is None:
+                return None
+            return int(total_itens), Decimal(valor_total)
+            
+        except Exception as e:
+            print(f"Error getting cart count from Redis: {e}")
+            self._failed("get_cart_count", e)
+            return None
+    
+    def set_cart_count(
+        self,
+        usuario_id: int,
+        carrinho_id: int,
+        versao: int,
+        total_itens: int,
+        valor_total: Decimal
+    ) -> bool:
+        """
+        Populate the cart badge counter (skipped if a newer cart or version is stored)
+        
+        Args:
+            usuario_id: User ID
+            carrinho_id: Cart ID the totals belong to
+            versao: Cart version the totals belong to
+            total_itens: Total units
+            valor_total: Total value
+            
+        Returns:
+            True if written, False if stale or on error
+        """
+        if not self._allow("set_cart_count"):
+            return False
+        
+        try:
+            written = self._set_count_if_newer(
+                keys=[self._get_count_key(usuario_id)],
+                args=[carrinho_id, versao, total_itens, str(valor_total), settings.redis_ttl]
+            )
+            self._succeeded()
+            return bool(written)
+            
+        except Exception as e:
+            print(f"Error saving cart count to Redis: {e}")
+            self._failed("set_cart_count", e)
             return False
     
-    def delete_cart(self, usuario_id: int) -> bool:
+    def close_cart(
+        self,
+        usuario_id: int,
+        carrinho_id: int,
+        events: Optional[List[CartEvent]] = None,
+        versao: int = 0
+    ) -> bool:
         """
-        Delete cart from Redis cache
+        Replace a closed cart in the cache with a tombstone
+        
+        The tombstone is read as a miss and refuses late write-throughs of
+        the closed cart (e.g. from a slow cache-miss reader), while the
+        user's next cart (higher id) replaces it. Events are published in
+        the same pipeline (one round trip).
         
         Args:
             usuario_id: User ID
+            carrinho_id: ID of the closed cart
+            events: Cart events to publish (e.g. checkout)
+            versao: Cart version recorded in the events
             
         Returns:
             True if successful, False otherwise
         """
-        if not self.redis_client:
+        if not self._allow("close_cart"):
+            self._mark_stale(usuario_id)
+            self._events_dropped(events)
             return False
         
         try:
-            key = self._get_cart_key(usuario_id)
-            self.redis_client.delete(key)
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._close_carts(
+                keys=self.cart_keys(usuario_id),
+                args=[settings.redis_ttl, carrinho_id],
+                client=pipe
+            )
+            published = encode_events(events or [])
+            if published:
+                for event in events:
+                    pipe.xadd(
+                        EVENTS_STREAM,
+                        {"e": event.tipo, "u": usuario_id, "l": event.livro_id, "q": event.quantidade, "v": versao},
+                        maxlen=settings.cart_events_maxlen,
+                        approximate=True
+                    )
+            pipe.execute()
+            self._succeeded()
+            if published:
+                self._events_published(events)
             return True
             
         except Exception as e:
-            print(f"Error deleting cart from Redis: {e}")
+            print(f"Error closing cart in Redis: {e}")
+            self._failed("close_cart", e)
+            self._events_dropped(events)
+            self._mark_stale(usuario_id)
             return False
     
+    def close_carts(self, carts: List[Tuple[int, int]], chunk_size: int = 500) -> int:
+        """
+        Replace several closed carts with tombstones (see close_cart)
+        
+        Args:
+            carts: (usuario_id, carrinho_id) pairs
+            chunk_size: Carts per script call
+            
+        Returns:
+            Number of cached keys replaced
+        """
+        if not carts or not self._allow("close_carts"):
+            return 0
+        
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for i in range(0, len(carts), chunk_size):
+                chunk = carts[i:i + chunk_size]
+                self._close_carts(
+                    keys=[key for usuario_id, _ in chunk for key in self.cart_keys(usuario_id)],
+                    args=[settings.redis_ttl, *[carrinho_id for _, carrinho_id in chunk]],
+                    client=pipe
+                )
+            replaced = sum(pipe.execute())
+            self._succeeded()
+            return replaced
+            
+        except Exception as e:
+            print(f"Error closing carts in Redis: {e}")
+            self._failed("close_carts", e)
+            for usuario_id, _ in carts:
+                self._mark_stale(usuario_id)
+            return 0
+    
     def refresh_ttl(self, usuario_id: int) -> bool:
         """
         Refresh TTL for cart in Redis
@@ -140,27 +726,18 @@ class RedisService:
         Returns:
             True if successful, False otherwise
         """
-        if not self.redis_client:
+        if not self._allow("refresh_ttl"):
             return False
         
         try:
             key = self._get_cart_key(usuario_id)
             self.redis_client.expire(key, settings.redis_ttl)
+            self._succeeded()
             return True
             
         except Exception as e:
             print(f"Error refreshing cart TTL: {e}")
-            return False
-    
-    def is_connected(self) -> bool:
-        """Check if Redis is connected"""
-        if not self.redis_client:
-            return False
-        
-        try:
-            self.redis_client.ping()
-            return True
-        except:
+            self._failed("refresh_ttl", e)
             return False
 
 
@@ -0,0 +1,192 @@
+# Saved Items Service - Saved-for-later and wishlist lists
+# Lists live in Redis sorted sets (outside itens_carrinho); a background worker copies changed lists to PostgreSQL
+
+import threading
+from typing import Optional, Dict, Any
+
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from config import settings
+from database import SessionLocal
+from repositories.saved_items_repository import SavedItemsRepository
+from services.redis_service import redis_service
+from services.saved_items_store import SavedItemsStore, LIST_MISSING, LIST_FULL, NOT_SAVED
+
+
+class SavedItemsService:
+    """Service for saved list operations"""
+
+    def __init__(self, db: Session):
+        self.repo = SavedItemsRepository(db)
+        self.store = saved_items_store
+
+    def _check_available(self) -> None:
+        """
+        Raises:
+            HTTPException: If Redis is not configured or its circuit is open
+        """
+        if not self.store.is_available() or not redis_service.is_connected():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Listas salvas indisponíveis"
+            )
+
+    def ensure_loaded(self, usuario_id: int, lista: str) -> None:
+        """Load the list from PostgreSQL if it is not in Redis"""
+        self._check_available()
+        self.store.hydrate(usuario_id, lista, self.repo.get_items(usuario_id, lista))
+
+    def _run(self, usuario_id: int, lista: str, mutation, *args: Any) -> int:
+        """
+        Run a store call, loading the list and retrying once if it is not in Redis
+
+        Returns:
+            Store result
+        """
+        self._check_available()
+        result = mutation(usuario_id, lista, *args)
+        if result is None or result == LIST_MISSING:
+            self.ensure_loaded(usuario_id, lista)
+            result = mutation(usuario_id, lista, *args)
+        return result
+
+    def get_items(self, usuario_id: int, lista: str, pagina: int = 1, tamanho: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get one page of a list, most recently saved first
+
+        Args:
+            usuario_id: User ID
+            lista: List name
+            pagina: Page number (from 1)
+            tamanho: Page size
+
+        Returns:
+            Page dictionary (itens, total, pagina, tamanho)
+        """
+        tamanho = tamanho or settings.saved_items_page_size
+        itens, total = self._run(usuario_id, lista, self.store.page, (pagina - 1) * tamanho, tamanho)
+        return {
+            "usuario_id": usuario_id,
+            "lista": lista,
+            "itens": itens,
+            "total": total,
+            "pagina": pagina,
+            "tamanho": tamanho
+        }
+
+    def save_item(self, usuario_id: int, lista: str, livro_id: int) -> Dict[str, Any]:
+        """
+        Save a book to a list (saving it again moves it to the top)
+
+        Returns:
+            First page of the list
+
+        Raises:
+            HTTPException: If the list is full
+        """
+        if self._run(usuario_id, lista, self.store.save, livro_id) == LIST_FULL:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Lista não pode exceder {settings.saved_items_max} livros"
+            )
+        return self.get_items(usuario_id, lista)
+
+    def remove_item(self, usuario_id: int, lista: str, livro_id: int) -> Dict[str, Any]:
+        """
+        Remove a book from a list
+
+        Returns:
+            First page of the list
+
+        Raises:
+            HTTPException: If the book is not in the list
+        """
+        self.claim(usuario_id, lista, livro_id)
+        return self.get_items(usuario_id, lista)
+
+    def claim(self, usuario_id: int, lista: str, livro_id: int) -> None:
+        """
+        Take a book out of a list in one atomic script call (of concurrent
+        callers, only the first succeeds)
+
+        Raises:
+            HTTPException: If the book is not in the list
+        """
+        if self._run(usuario_id, lista, self.store.remove, livro_id) == NOT_SAVED:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Livro não encontrado na lista"
+            )
+
+    def restore(self, usuario_id: int, lista: str, livro_id: int) -> None:
+        """Put back a claimed book whose move failed (it returns at the top of the list)"""
+        self._run(usuario_id, lista, self.store.save, livro_id)
+
+
+class SavedItemsPersister:
+    """Background worker copying changed lists to PostgreSQL"""
+
+    def __init__(self, store: SavedItemsStore):
+        self.store = store
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """
+        Persist one batch of changed lists in a single transaction
+
+        Returns:
+            Number of lists processed
+        """
+        lists = self.store.pop_dirty(settings.saved_items_persist_batch_size)
+        if not lists:
+            return 0
+
+        db = SessionLocal()
+        try:
+            SavedItemsRepository(db).replace_lists(self.store.snapshot(lists))
+        except Exception:
+            db.rollback()
+            # Retried on the next pass
+            self.store.mark_dirty(lists)
+            raise
+        finally:
+            db.close()
+        return len(lists)
+
+    def _run(self) -> None:
+        """Worker loop: drain the dirty set, then sleep saved_items_persist_interval seconds"""
+        while not self._stop.is_set():
+            try:
+                while self.run_once() >= settings.saved_items_persist_batch_size and not self._stop.is_set():
+                    pass
+            except Exception as e:
+                print(f"Saved items persistence error: {e}")
+            self._stop.wait(settings.saved_items_persist_interval)
+
+    def start(self) -> None:
+        """Start the background worker thread"""
+        if self._thread is not None or not self.store.is_available():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="saved-items-persister", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the worker after a final pass"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=settings.saved_items_persist_interval + 5)
+        self._thread = None
+        try:
+            while self.run_once():
+                pass
+        except Exception as e:
+            print(f"Saved items final persistence error: {e}")
+
+
+# Global saved list store and persistence worker instances
+saved_items_store = SavedItemsStore(redis_service.redis_client)
+saved_items_persister = SavedItemsPersister(saved_items_store)
@@ -0,0 +1,212 @@
+# Saved Items Store - Saved-for-later and wishlist lists kept as Redis sorted sets
+# One sorted set per user and list (member = livro_id, score = save time in ms); changes are persisted periodically
+
+import calendar
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+import redis
+
+from config import settings
+
+
+# Lists a user can keep ("salvos" = saved for later, "desejos" = wishlist)
+SAVED_LISTS = ("salvos", "desejos")
+
+# Lists changed since the last persistence pass (members "lista:usuario_id")
+DIRTY_SET = "saved:dirty"
+
+# Placeholder member (score 0) marking a list as loaded, so an emptied list
+# is never re-hydrated from stale PostgreSQL rows. Book IDs are never "_".
+SENTINEL = "_"
+
+# Status codes returned by scripts (success returns the list size)
+LIST_MISSING = -2
+LIST_FULL = -1
+NOT_SAVED = -3
+
+# Populate a list from PostgreSQL only if it is not loaded yet
+# KEYS[1] = list key; ARGV[1] = ttl; ARGV[2..] = score/member pairs
+HYDRATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 0, '_')
+if #ARGV > 1 then
+    redis.call('ZADD', KEYS[1], unpack(ARGV, 2))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Save (or re-save, moving it to the top) a book, enforcing the list bound
+# KEYS[1] = list key, KEYS[2] = dirty set; ARGV = ttl, max items, score, livro_id, dirty member
+SAVE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -2
+end
+if not redis.call('ZSCORE', KEYS[1], ARGV[4]) and redis.call('ZCARD', KEYS[1]) - 1 >= tonumber(ARGV[2]) then
+    return -1
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('SADD', KEYS[2], ARGV[5])
+return redis.call('ZCARD', KEYS[1]) - 1
+"""
+
+# KEYS as above; ARGV = ttl, livro_id, dirty member
+REMOVE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -2
+end
+if redis.call('ZREM', KEYS[1], ARGV[2]) == 0 then
+    return -3
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('SADD', KEYS[2], ARGV[3])
+return redis.call('ZCARD', KEYS[1]) - 1
+"""
+
+
+def now_ms() -> int:
+    """Current time as a sorted set score"""
+    return int(time.time() * 1000)
+
+
+class SavedItemsStore:
+    """Store for per-user saved-for-later and wishlist sorted sets"""
+
+    def __init__(self, client: Optional[redis.Redis]):
+        self.client = client
+        self.ttl = settings.cart_expiration_days * 86400
+        self._hydrate = client.register_script(HYDRATE_SCRIPT) if client else None
+        self._save = client.register_script(SAVE_SCRIPT) if client else None
+        self._remove = client.register_script(REMOVE_SCRIPT) if client else None
+
+    def key(self, usuario_id: int, lista: str) -> str:
+        """Generate Redis key for a user's list"""
+        return f"saved:{lista}:{usuario_id}"
+
+    def dirty_member(self, usuario_id: int, lista: str) -> str:
+        """Member of the dirty set for a user's list"""
+        return f"{lista}:{usuario_id}"
+
+    def is_available(self) -> bool:
+        """Check if the store has a Redis client"""
+        return self.client is not None
+
+    # ========== Reads ==========
+
+    def page(self, usuario_id: int, lista: str, offset: int, limit: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """
+        Read one page, newest first, refreshing the TTL (one round trip)
+
+        Args:
+            usuario_id: User ID
+            lista: List name
+            offset: Items to skip
+            limit: Page size
+
+        Returns:
+            Tuple of (items, total) or None if the list is not loaded
+        """
+        key = self.key(usuario_id, lista)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrevrange(key, offset, offset + limit - 1, withscores=True)
+        pipe.zcard(key)
+        pipe.expire(key, self.ttl)
+        members, size, _ = pipe.execute()
+        if size == 0:
+            return None
+        itens = [
+            {"livro_id": int(member), "data_salvo": datetime.utcfromtimestamp(score / 1000)}
+            for member, score in members
+            if member != SENTINEL
+        ]
+        return itens, size - 1
+
+    def hydrate(self, usuario_id: int, lista: str, itens: List[Tuple[int, datetime]]) -> None:
+        """
+        Load a persisted list into Redis (no-op if it is already loaded)
+
+        Args:
+            usuario_id: User ID
+            lista: List name
+            itens: (livro_id, data_criacao) pairs from PostgreSQL
+        """
+        args: List[Any] = [self.ttl]
+        for livro_id, data_salvo in itens:
+            # Naive UTC datetimes (as written by the persister)
+            args.extend([calendar.timegm(data_salvo.timetuple()) * 1000, livro_id])
+        self._hydrate(keys=[self.key(usuario_id, lista)], args=args)
+
+    # ========== Mutations ==========
+
+    def save(self, usuario_id: int, lista: str, livro_id: int) -> int:
+        """
+        Save a book (one atomic script call)
+
+        Returns:
+            New list size, LIST_MISSING or LIST_FULL
+        """
+        return self._save(
+            keys=[self.key(usuario_id, lista), DIRTY_SET],
+            args=[self.ttl, settings.saved_items_max, now_ms(), livro_id, self.dirty_member(usuario_id, lista)]
+        )
+
+    def remove(self, usuario_id: int, lista: str, livro_id: int) -> int:
+        """
+        Remove a book (one atomic script call)
+
+        Returns:
+            New list size, LIST_MISSING or NOT_SAVED
+        """
+        return self._remove(
+            keys=[self.key(usuario_id, lista), DIRTY_SET],
+            args=[self.ttl, livro_id, self.dirty_member(usuario_id, lista)]
+        )
+
+    # ========== Persistence ==========
+
+    def pop_dirty(self, count: int) -> List[Tuple[int, str]]:
+        """
+        Take up to count changed lists
+
+        Returns:
+            (usuario_id, lista) pairs
+        """
+        members = self.client.spop(DIRTY_SET, count) or []
+        result = []
+        for member in members:
+            lista, usuario_id = member.split(":", 1)
+            result.append((int(usuario_id), lista))
+        return result
+
+    def mark_dirty(self, lists: List[Tuple[int, str]]) -> None:
+        """Put back lists whose persistence failed"""
+        if lists:
+            self.client.sadd(DIRTY_SET, *[self.dirty_member(usuario_id, lista) for usuario_id, lista in lists])
+
+    def snapshot(self, lists: List[Tuple[int, str]]) -> Dict[Tuple[int, str], List[Tuple[int, datetime]]]:
+        """
+        Read the current content of several lists (one pipelined round trip)
+
+        Lists that are no longer loaded are left out (nothing to persist).
+
+        Returns:
+            Mapping of (usuario_id, lista) to (livro_id, save time) pairs
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for usuario_id, lista in lists:
+            pipe.zrange(self.key(usuario_id, lista), 0, -1, withscores=True)
+        result = {}
+        for owner, members in zip(lists, pipe.execute()):
+            if not members:
+                continue
+            result[owner] = [
+                (int(member), datetime.utcfromtimestamp(score / 1000))
+                for member, score in members
+                if member != SENTINEL
+            ]
+        return result
@@ -0,0 +1,115 @@
+# Write-Behind Service - Persists Redis live carts to PostgreSQL
+# Consumes the cart:wal stream in batches; un-acknowledged entries are replayed after a crash
+
+import os
+import socket
+import threading
+from typing import Iterable, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from repositories.cart_repository import CartRepository
+from services.redis_service import redis_service
+from services.redis_cart_store import RedisCartStore
+
+
+class WriteBehindService:
+    """Background worker flushing dirty live carts to the database"""
+
+    def __init__(self, store: RedisCartStore):
+        self.store = store
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def flush(self, db: Session, usuario_ids: Iterable[int]) -> Set[int]:
+        """
+        Persist the current snapshot of each live cart
+
+        Snapshots (not individual operations) are written, so a batch
+        collapses any number of mutations per cart into one transaction.
+
+        Args:
+            db: Database session
+            usuario_ids: Users whose live carts are dirty
+
+        Returns:
+            Set of user IDs that failed to persist
+        """
+        repo = CartRepository(db)
+        failed = set()
+        for usuario_id in usuario_ids:
+            try:
+                snapshot = self.store.snapshot(usuario_id)
+                if snapshot:
+                    repo.replace_cart_items(snapshot)
+            except Exception as e:
+                db.rollback()
+                print(f"Write-behind error for cart of user {usuario_id}: {e}")
+                failed.add(usuario_id)
+        return failed
+
+    def run_once(self) -> int:
+        """
+        Process one batch: entries orphaned by a crashed consumer first, then new ones
+
+        Returns:
+            Number of journal entries processed
+        """
+        batch = settings.write_behind_batch_size
+        entries = self.store.claim_pending(self.consumer, settings.write_behind_claim_idle_ms, batch)
+        entries += self.store.read_new(self.consumer, batch, block_ms=None)
+        if not entries:
+            return 0
+
+        usuario_ids = {int(fields["usuario_id"]) for _, fields in entries}
+        db = SessionLocal()
+        try:
+            failed = self.flush(db, usuario_ids)
+        finally:
+            db.close()
+
+        # Failed carts stay pending and are reclaimed on a later pass
+        self.store.acknowledge([
+            entry_id for entry_id, fields in entries
+            if int(fields["usuario_id"]) not in failed
+        ])
+        return len(entries)
+
+    def _run(self) -> None:
+        """Worker loop: drain the stream, then sleep write_behind_interval seconds"""
+        while not self._stop.is_set():
+            try:
+                while self.run_once() >= settings.write_behind_batch_size and not self._stop.is_set():
+                    pass
+            except Exception as e:
+                print(f"Write-behind worker error: {e}")
+            self._stop.wait(settings.write_behind_interval)
+
+    def start(self) -> None:
+        """Start the background worker thread"""
+        if self._thread is not None or not self.store.is_available():
+            return
+        self.store.ensure_group()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cart-write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the worker after a final drain"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=settings.write_behind_interval + 5)
+        self._thread = None
+        try:
+            self.run_once()
+        except Exception as e:
+            print(f"Write-behind final flush error: {e}")
+
+
+# Global live cart store and write-behind worker instances
+redis_cart_store = RedisCartStore(redis_service.redis_client)
+write_behind_service = WriteBehindService(redis_cart_store)
@@ -4,12 +4,29 @@ Script de teste rápido para o Cart Service
 Valida os principais endpoints e funcionalidades
 """
 
+import os
 import requests
+import redis
 import json
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 
 BASE_URL = "http://localhost:8003/api/v1"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/2")  # mesmo Redis do serviço
 USER_ID = 1
+CONCURRENCY_USER_ID = 9001
+CONCURRENT_ADDS = 300
+MAX_QUANTITY_PER_ITEM = 99
+
+# Limite de statements SQL por requisição (cabeçalho X-DB-Statements, DB_STATEMENT_HEADER=true)
+# Leitura: carrinho e itens em um único SELECT; mutação: sem recarregar o carrinho após o commit
+MAX_STATEMENTS = {
+    "GET /carrinho": 1,
+    "POST /add": 5,
+    "PUT /update": 5,
+    "POST /batch": 7,
+    "DELETE /clear": 5,
+}
 
 
 def print_response(title, response):
@@ -98,6 +115,104 @@ def test_clear_cart():
     return response.status_code == 200
 
 
+def test_concurrent_adds():
+    """Testa adições paralelas do mesmo item (sem perda de atualização, limite respeitado)"""
+    requests.delete(f"{BASE_URL}/carrinho/{CONCURRENCY_USER_ID}/clear")
+    
+    def add_one(_):
+        return requests.post(
+            f"{BASE_URL}/carrinho/{CONCURRENCY_USER_ID}/add",
+            json={"livro_id": 101, "quantidade": 1}
+        ).status_code
+    
+    with ThreadPoolExecutor(max_workers=50) as executor:
+        statuses = list(executor.map(add_one, range(CONCURRENT_ADDS)))
+    
+    response = requests.get(f"{BASE_URL}/carrinho/{CONCURRENCY_USER_ID}")
+    carrinho = response.json()["carrinho"]
+    quantidade = sum(item["quantidade"] for item in carrinho["itens"])
+    expected = min(CONCURRENT_ADDS, MAX_QUANTITY_PER_ITEM)
+    
+    print(f"\n{'='*60}")
+    print("  Adições Concorrentes")
+    print(f"{'='*60}")
+    print(f"Requisições: {CONCURRENT_ADDS} | 200: {statuses.count(200)} | 400: {statuses.count(400)}")
+    print(f"Quantidade final: {quantidade} (esperado {expected}) | total_itens: {carrinho['total_itens']}")
+    print(f"{'='*60}\n")
+    
+    requests.delete(f"{BASE_URL}/carrinho/{CONCURRENCY_USER_ID}/clear")
+    return (
+        quantidade == expected
+        and carrinho["total_itens"] == expected
+        and statuses.count(200) == expected
+        and statuses.count(400) == CONCURRENT_ADDS - expected
+    )
+
+
+def test_if_match_conflict():
+    """Testa controle otimista: If-Match desatualizado retorna 409 com o carrinho atual"""
+    requests.delete(f"{BASE_URL}/carrinho/{CONCURRENCY_USER_ID}/clear")
+    requests.post(
+        f"{BASE_URL}/carrinho/{CONCURRENCY_USER_ID}/add",
+        json={"livro_id": 101, "quantidade": 1}
+    )
+    etag = requests.get(f"{BASE_URL}/carrinho/{CONCURRENCY_USER_ID}").headers["ETag"]
+    
+    # Duas "abas" partindo da mesma versão: a primeira vence, a segunda recebe 409
+    first = requests.put(
+        f"{BASE_URL}/carrinho/{CONCURRENCY_USER_ID}/update/101",
+        json={"quantidade": 2},
+        headers={"If-Match": etag}
+    )
+    second = requests.put(
+        f"{BASE_URL}/carrinho/{CONCURRENCY_USER_ID}/update/101",
+        json={"quantidade": 5},
+        headers={"If-Match": etag}
+    )
+    print_response("If-Match Desatualizado", second)
+    
+    requests.delete(f"{BASE_URL}/carrinho/{CONCURRENCY_USER_ID}/clear")
+    return (
+        first.status_code == 200
+        and second.status_code == 409
+        and second.json()["detail"]["carrinho"]["itens"][0]["quantidade"] == 2
+        and second.json()["detail"]["carrinho"]["versao"] == first.json()["carrinho"]["versao"]
+    )
+
+
+def test_statement_counts():
+    """Testa ausência de N+1: statements SQL por requisição dentro do limite"""
+    url = f"{BASE_URL}/carrinho/{CONCURRENCY_USER_ID}"
+    requests.delete(f"{url}/clear")
+    for livro_id in range(201, 211):
+        requests.post(f"{url}/add", json={"livro_id": livro_id, "quantidade": 1})
+    
+    # As adições deixam o carrinho no cache: remove o hash para medir a leitura do banco
+    redis.Redis.from_url(REDIS_URL).unlink(f"cart:h:{CONCURRENCY_USER_ID}")
+    
+    responses = {
+        "GET /carrinho": requests.get(url),
+        "POST /add": requests.post(f"{url}/add", json={"livro_id": 201, "quantidade": 1}),
+        "PUT /update": requests.put(f"{url}/update/202", json={"quantidade": 3}),
+        "POST /batch": requests.post(f"{url}/batch", json={"operacoes": [
+            {"op": "update", "livro_id": 203, "quantidade": 2},
+            {"op": "remove", "livro_id": 204},
+        ]}),
+        "DELETE /clear": requests.delete(f"{url}/clear"),
+    }
+    
+    if "X-DB-Statements" not in responses["GET /carrinho"].headers:
+        print("\n❌ X-DB-Statements ausente: inicie o serviço com DB_STATEMENT_HEADER=true\n")
+        return False
+    
+    ok = True
+    for endpoint, response in responses.items():
+        count = int(response.headers["X-DB-Statements"])
+        print(f"{endpoint:<16} status={response.status_code} statements={count} (máx. {MAX_STATEMENTS[endpoint]})")
+        ok = ok and response.status_code == 200 and count <= MAX_STATEMENTS[endpoint]
+    return ok
+
+
 def run_all_tests():
     """Executa todos os testes"""
     print("\n" + "="*60)
@@ -116,6 +231,9 @@ def run_all_tests():
         ("Visualizar Carrinho (após remoção)", test_get_cart),
         ("Limpar Carrinho", test_clear_cart),
         ("Visualizar Carrinho (após limpar)", test_get_cart),
+        ("Adições Concorrentes", test_concurrent_adds),
+        ("Conflito de Versão (If-Match)", test_if_match_conflict),
+        ("Statements SQL por Requisição", test_statement_counts),
     ]
     
     results = []
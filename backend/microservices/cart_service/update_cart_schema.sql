@@ -0,0 +1,69 @@
+-- Atualizações de schema do Cart Service para bancos já existentes
+-- Execute este script no banco postgres-cart (bancos novos recebem
+-- as mesmas alterações via create_tables())
+-- Todas as instruções são idempotentes
+
+-- Versão do carrinho (ordena write-through no Redis)
+ALTER TABLE carrinhos ADD COLUMN IF NOT EXISTS versao INTEGER NOT NULL DEFAULT 0;
+
+-- Um item por livro em cada carrinho (alvo do upsert ON CONFLICT)
+-- Consolida duplicatas existentes antes de criar a restrição
+WITH duplicados AS (
+    SELECT carrinho_id, livro_id, MIN(id) AS manter, LEAST(SUM(quantidade), 99) AS quantidade
+    FROM itens_carrinho
+    GROUP BY carrinho_id, livro_id
+    HAVING COUNT(*) > 1
+), consolidados AS (
+    UPDATE itens_carrinho i
+    SET quantidade = d.quantidade
+    FROM duplicados d
+    WHERE i.id = d.manter
+    RETURNING i.id
+)
+DELETE FROM itens_carrinho i
+USING duplicados d
+WHERE i.carrinho_id = d.carrinho_id
+  AND i.livro_id = d.livro_id
+  AND i.id <> d.manter;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'uq_itens_carrinho_carrinho_livro'
+    ) THEN
+        ALTER TABLE itens_carrinho
+            ADD CONSTRAINT uq_itens_carrinho_carrinho_livro UNIQUE (carrinho_id, livro_id);
+    END IF;
+END $$;
+
+-- Totais desnormalizados (mantidos a cada alteração de itens)
+ALTER TABLE carrinhos ADD COLUMN IF NOT EXISTS total_itens INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE carrinhos ADD COLUMN IF NOT EXISTS valor_total NUMERIC(10, 2) NOT NULL DEFAULT 0;
+
+UPDATE carrinhos c
+SET total_itens = t.total_itens,
+    valor_total = t.valor_total
+FROM (
+    SELECT carrinho_id,
+           SUM(quantidade) AS total_itens,
+           SUM(quantidade * preco_unitario) AS valor_total
+    FROM itens_carrinho
+    GROUP BY carrinho_id
+) t
+WHERE c.id = t.carrinho_id
+  AND (c.total_itens <> t.total_itens OR c.valor_total <> t.valor_total);
+
+-- Varredura de carrinhos abandonados (busca por data_atualizacao)
+-- CONCURRENTLY não bloqueia escritas; não execute dentro de uma transação
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_carrinhos_data_atualizacao
+    ON carrinhos (data_atualizacao);
+
+-- Listas "salvos para depois" e "desejos" (cópia persistente dos sorted sets do Redis)
+CREATE TABLE IF NOT EXISTS itens_salvos (
+    id SERIAL PRIMARY KEY,
+    usuario_id INTEGER NOT NULL,
+    lista VARCHAR(20) NOT NULL,
+    livro_id INTEGER NOT NULL,
+    data_criacao TIMESTAMP NOT NULL,
+    CONSTRAINT uq_itens_salvos_usuario_lista_livro UNIQUE (usuario_id, lista, livro_id)
+);
@@ -0,0 +1,26 @@
+-- Índices de listagem e busca do catálogo
+-- Execute este script no banco postgres-catalog (bancos já existentes;
+-- bancos novos recebem os índices via create_tables())
+-- Validado por benchmark_queries.py: nenhuma consulta de BookRepository
+-- deve cair em Seq Scan com 1M de livros
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Listagem padrão e ordenações (todas as consultas filtram ativo = true)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_livros_ativo_data_criacao ON livros (data_criacao) WHERE ativo = true;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_livros_ativo_titulo ON livros (titulo) WHERE ativo = true;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_livros_ativo_autor ON livros (autor) WHERE ativo = true;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_livros_ativo_preco ON livros (preco) WHERE ativo = true;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_livros_ativo_estoque ON livros (estoque) WHERE ativo = true;
+
+-- Filtros de categoria/condição combinados com ordenação e faixa de preço
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_livros_ativo_categoria_data_criacao ON livros (categoria, data_criacao) WHERE ativo = true;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_livros_ativo_categoria_preco ON livros (categoria, preco) WHERE ativo = true;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_livros_ativo_condicao_data_criacao ON livros (condicao, data_criacao) WHERE ativo = true;
+
+-- Busca ILIKE '%termo%' em título, autor e ISBN
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_livros_titulo_trgm ON livros USING gin (titulo gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_livros_autor_trgm ON livros USING gin (autor gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_livros_isbn_trgm ON livros USING gin (isbn gin_trgm_ops);
+
+ANALYZE livros;
@@ -29,10 +29,34 @@ class Settings(BaseSettings):
     docs_url: str = "/docs"
     redoc_url: str = "/redoc"
     
+    # Instrumentation
+    metrics_enabled: bool = True  # Expose /metrics
+    server_timing_enabled: bool = False  # Add Server-Timing breakdown to responses
+    
     # Pagination
     default_page_size: int = 20
     max_page_size: int = 100
     
+    # Cover thumbnails
+    thumbnail_cache_dir: str = "thumbnail_cache"
+    thumbnail_cache_max_bytes: int = 512 * 1024 * 1024  # 512 MB (LRU eviction)
+    thumbnail_workers: int = 2  # Image processing worker processes
+    thumbnail_quality: int = 80
+    thumbnail_fetch_timeout: int = 10  # Seconds to download the source cover
+    thumbnail_max_source_bytes: int = 10 * 1024 * 1024  # 10 MB
+    thumbnail_cache_max_age: int = 31536000  # 1 year for versioned URLs
+    
+    # Public settings (public_settings.json kept in memory)
+    public_settings_check_interval: float = 1.0  # Seconds between file mtime checks
+    
+    # Price statistics (precomputed histograms for the price slider)
+    price_histogram_buckets: int = 20
+    price_stats_refresh_interval: int = 30  # Seconds between background refresh checks
+    price_stats_max_age: int = 3600  # Recompute at least hourly even without writes
+    
+    # Multi-ID availability lookup (used by cart_service)
+    availability_max_ids: int = 200
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -3,7 +3,7 @@
 # Implementa RNF1.1, RNF1.2 para performance
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
@@ -38,4 +38,8 @@ def get_db():
 # Função para criar tabelas
 def create_tables():
     from models import Base
+    if engine.dialect.name == "postgresql":
+        # Índices trigram de busca (models.py) dependem de pg_trgm
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
     Base.metadata.create_all(bind=engine)
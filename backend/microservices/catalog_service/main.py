@@ -2,13 +2,19 @@
 # Microserviço responsável pelo catálogo de livros
 # Implementa arquitetura limpa com separação de responsabilidades
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+import time
 import uvicorn
 
 from config import settings
 from database import create_tables
+from metrics import metrics_service, REQUEST_SECONDS
 from routes import router
+from services.thumbnail_service import thumbnail_service
+from services.public_settings_service import public_settings_service
+from services.price_stats_service import price_stats_service
 
 
 # Create FastAPI application
@@ -29,6 +35,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """Record request latency and optionally expose the Server-Timing breakdown"""
+    metrics_service.start_request()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    
+    # Route template (e.g. /api/v1/livros/{book_id}) keeps label cardinality bounded
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=response.status_code
+    )
+    
+    if settings.server_timing_enabled:
+        response.headers["Server-Timing"] = metrics_service.server_timing_header(elapsed)
+        response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+
 # Include API routes
 app.include_router(router, prefix=settings.api_prefix)
 
@@ -38,12 +67,19 @@ async def startup_event():
     """Initialize application on startup"""
     # Create database tables
     create_tables()
+    # Reload public settings as soon as another worker writes them
+    public_settings_service.start_listener()
+    # Background refresh of precomputed price statistics
+    price_stats_service.start()
     print("Catalog Service started successfully!")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on application shutdown"""
+    thumbnail_service.shutdown()
+    public_settings_service.stop_listener()
+    price_stats_service.stop()
     print("Catalog Service shutting down...")
 
 
@@ -63,6 +99,14 @@ async def health_check():
     return {"status": "healthy", "service": "catalog"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (per worker process)"""
+    if not settings.metrics_enabled:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(metrics_service.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
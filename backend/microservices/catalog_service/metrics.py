@@ -0,0 +1,186 @@
+# Métricas do Catalog Service - instrumentação leve do caminho crítico
+# Histogramas/contadores em processo exportados em formato Prometheus e Server-Timing por requisição
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Latency buckets in seconds (0.25 ms .. 2.5 s)
+DEFAULT_BUCKETS = (0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Per-request accumulated durations (seconds) for the Server-Timing header
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """Render a Prometheus label set"""
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increment the counter for a label set"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        """Prometheus exposition lines"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation in seconds"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        """Prometheus exposition lines"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                cumulative += series[len(self.buckets)]
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsService:
+    """Registry of catalog metrics"""
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        """Register a counter"""
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Histogram:
+        """Register a histogram"""
+        metric = Histogram(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    # ========== Per-request Server-Timing ==========
+
+    def start_request(self) -> None:
+        """Begin collecting Server-Timing entries for the current request"""
+        _request_timings.set({})
+
+    def record(self, timing_name: str, seconds: float) -> None:
+        """Accumulate a duration into the current request's Server-Timing"""
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[timing_name] = timings.get(timing_name, 0.0) + seconds
+
+    def server_timing_header(self, total_seconds: Optional[float] = None) -> str:
+        """Build the Server-Timing header value (durations in ms)"""
+        timings = dict(_request_timings.get() or {})
+        if total_seconds is not None:
+            timings["total"] = total_seconds
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
+
+    @contextmanager
+    def timed(self, histogram: Histogram, timing_name: str, **labels) -> Iterator[None]:
+        """
+        Time a block into a histogram and the request's Server-Timing
+
+        Args:
+            histogram: Histogram to observe
+            timing_name: Server-Timing entry name (e.g. "cache", "db-page")
+            **labels: Histogram label values
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            histogram.observe(elapsed, **labels)
+            self.record(timing_name, elapsed)
+
+
+# Global metrics service instance
+metrics_service = MetricsService()
+
+# Catalog hot-path metrics
+REQUEST_SECONDS = metrics_service.histogram(
+    "catalog_request_seconds", "HTTP request latency", ("method", "route", "status")
+)
+CACHE_SECONDS = metrics_service.histogram(
+    "catalog_cache_seconds", "Redis cache operation latency", ("operation", "endpoint")
+)
+CACHE_REQUESTS = metrics_service.counter(
+    "catalog_cache_requests_total", "Cache lookups by result", ("endpoint", "result")
+)
+CACHE_ERRORS = metrics_service.counter(
+    "catalog_cache_errors_total", "Redis cache errors", ("operation",)
+)
+DB_SECONDS = metrics_service.histogram(
+    "catalog_db_query_seconds", "Repository query latency", ("query",)
+)
+SERIALIZATION_SECONDS = metrics_service.histogram(
+    "catalog_serialization_seconds", "Book serialization latency", ("endpoint",)
+)
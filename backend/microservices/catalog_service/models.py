@@ -2,7 +2,7 @@
 # Define as entidades Livro, CondicaoLivro e enums relacionados
 # Implementa o modelo de domínio conforme diagrama UML
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum as SQLEnum, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum as SQLEnum, Numeric, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -46,4 +46,23 @@ class Livro(Base):
     data_atualizacao = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relacionamentos (apenas dentro do mesmo microserviço)
-    # Cross-service relationships são mantidos apenas via foreign keys
\ No newline at end of file
+    # Cross-service relationships são mantidos apenas via foreign keys
+
+
+# Índices de listagem/busca (ver benchmark_queries.py e add_catalog_indexes.sql)
+# Parciais em ativo = true: toda consulta do catálogo filtra por livros ativos
+_ATIVO = Livro.ativo == True
+
+Index("ix_livros_ativo_data_criacao", Livro.data_criacao, postgresql_where=_ATIVO)
+Index("ix_livros_ativo_titulo", Livro.titulo, postgresql_where=_ATIVO)
+Index("ix_livros_ativo_autor", Livro.autor, postgresql_where=_ATIVO)
+Index("ix_livros_ativo_preco", Livro.preco, postgresql_where=_ATIVO)
+Index("ix_livros_ativo_estoque", Livro.estoque, postgresql_where=_ATIVO)
+Index("ix_livros_ativo_categoria_data_criacao", Livro.categoria, Livro.data_criacao, postgresql_where=_ATIVO)
+Index("ix_livros_ativo_categoria_preco", Livro.categoria, Livro.preco, postgresql_where=_ATIVO)
+Index("ix_livros_ativo_condicao_data_criacao", Livro.condicao, Livro.data_criacao, postgresql_where=_ATIVO)
+
+# Busca ILIKE '%termo%' (RF2.2) usa trigramas; requer a extensão pg_trgm
+Index("ix_livros_titulo_trgm", Livro.titulo, postgresql_using="gin", postgresql_ops={"titulo": "gin_trgm_ops"})
+Index("ix_livros_autor_trgm", Livro.autor, postgresql_using="gin", postgresql_ops={"autor": "gin_trgm_ops"})
+Index("ix_livros_isbn_trgm", Livro.isbn, postgresql_using="gin", postgresql_ops={"isbn": "gin_trgm_ops"})
@@ -2,10 +2,12 @@
 # Implements repository pattern for book data access
 
 from typing import Optional, List, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc
+from sqlalchemy.orm import Session, Query
+from sqlalchemy import and_, or_, desc, asc, func
+from decimal import Decimal
 
 from models import Livro, Categoria, CondicaoLivro
+from metrics import metrics_service, DB_SECONDS
 
 
 class BookRepository:
@@ -40,9 +42,28 @@ class BookRepository:
         Returns:
             Book instance or None if not found
         """
-        return self.db.query(Livro).filter(
-            and_(Livro.id == book_id, Livro.ativo == True)
-        ).first()
+        with metrics_service.timed(DB_SECONDS, "db", query="get_by_id"):
+            return self.db.query(Livro).filter(
+                and_(Livro.id == book_id, Livro.ativo == True)
+            ).first()
+    
+    def get_availability(self, book_ids: List[int]) -> List[Tuple[int, Decimal, int, bool]]:
+        """
+        Get price, stock and active flag for several books in one query
+        
+        Inactive books are included so callers can tell them apart from
+        unknown IDs.
+        
+        Args:
+            book_ids: Book IDs
+            
+        Returns:
+            List of (id, preco, estoque, ativo) tuples
+        """
+        with metrics_service.timed(DB_SECONDS, "db", query="get_availability"):
+            return self.db.query(
+                Livro.id, Livro.preco, Livro.estoque, Livro.ativo
+            ).filter(Livro.id.in_(book_ids)).all()
     
     def get_by_isbn(self, isbn: str) -> Optional[Livro]:
         """
@@ -58,36 +79,39 @@ class BookRepository:
             and_(Livro.isbn == isbn, Livro.ativo == True)
         ).first()
     
-    def get_all(
+    def build_query(
         self,
-        skip: int = 0,
-        limit: int = 20,
+        search_term: Optional[str] = None,
         categoria: Optional[Categoria] = None,
         condicao: Optional[CondicaoLivro] = None,
         preco_min: Optional[float] = None,
-        preco_max: Optional[float] = None,
-        order_by: str = "data_criacao",
-        order_direction: str = "desc"
-    ) -> Tuple[List[Livro], int]:
+        preco_max: Optional[float] = None
+    ) -> Query:
         """
-        Get all books with filters and pagination
+        Build the filtered (unordered, unpaginated) query for active books
+        
+        Shared by get_all/search and by benchmark_queries.py, so the
+        benchmark explains exactly the SQL the API executes.
         
         Args:
-            skip: Number of records to skip
-            limit: Maximum number of records to return
+            search_term: Term to search in title, author, or ISBN
             categoria: Filter by category
             condicao: Filter by condition
             preco_min: Minimum price filter
             preco_max: Maximum price filter
-            order_by: Field to order by
-            order_direction: Order direction (asc or desc)
             
         Returns:
-            Tuple of (list of books, total count)
+            Filtered query
         """
         query = self.db.query(Livro).filter(Livro.ativo == True)
         
-        # Apply filters
+        if search_term:
+            query = query.filter(or_(
+                Livro.titulo.ilike(f"%{search_term}%"),
+                Livro.autor.ilike(f"%{search_term}%"),
+                Livro.isbn.ilike(f"%{search_term}%")
+            ))
+        
         if categoria:
             query = query.filter(Livro.categoria == categoria)
         
@@ -100,18 +124,67 @@ class BookRepository:
         if preco_max is not None:
             query = query.filter(Livro.preco <= preco_max)
         
-        # Get total count before pagination
-        total = query.count()
+        return query
+    
+    def apply_ordering(self, query: Query, order_by: str, order_direction: str) -> Query:
+        """
+        Apply ordering to a books query
         
-        # Apply ordering
+        Args:
+            query: Query to order
+            order_by: Field to order by
+            order_direction: Order direction (asc or desc)
+            
+        Returns:
+            Ordered query
+        """
         order_field = getattr(Livro, order_by, Livro.data_criacao)
         if order_direction == "asc":
-            query = query.order_by(asc(order_field))
-        else:
-            query = query.order_by(desc(order_field))
+            return query.order_by(asc(order_field))
+        return query.order_by(desc(order_field))
+    
+    def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 20,
+        categoria: Optional[Categoria] = None,
+        condicao: Optional[CondicaoLivro] = None,
+        preco_min: Optional[float] = None,
+        preco_max: Optional[float] = None,
+        order_by: str = "data_criacao",
+        order_direction: str = "desc"
+    ) -> Tuple[List[Livro], int]:
+        """
+        Get all books with filters and pagination
+        
+        Args:
+            skip: Number of records to skip
+            limit: Maximum number of records to return
+            categoria: Filter by category
+            condicao: Filter by condition
+            preco_min: Minimum price filter
+            preco_max: Maximum price filter
+            order_by: Field to order by
+            order_direction: Order direction (asc or desc)
+            
+        Returns:
+            Tuple of (list of books, total count)
+        """
+        query = self.build_query(
+            categoria=categoria,
+            condicao=condicao,
+            preco_min=preco_min,
+            preco_max=preco_max
+        )
         
-        # Apply pagination
-        books = query.offset(skip).limit(limit).all()
+        # Get total count before pagination
+        with metrics_service.timed(DB_SECONDS, "db-count", query="get_all.count"):
+            total = query.count()
+        
+        # Apply ordering and pagination
+        query = self.apply_ordering(query, order_by, order_direction)
+        with metrics_service.timed(DB_SECONDS, "db-page", query="get_all.page"):
+            books = query.offset(skip).limit(limit).all()
         
         return books, total
     
@@ -144,42 +217,22 @@ class BookRepository:
         Returns:
             Tuple of (list of books, total count)
         """
-        # Build search filter
-        search_filter = or_(
-            Livro.titulo.ilike(f"%{search_term}%"),
-            Livro.autor.ilike(f"%{search_term}%"),
-            Livro.isbn.ilike(f"%{search_term}%")
-        )
-        
-        query = self.db.query(Livro).filter(
-            and_(Livro.ativo == True, search_filter)
+        query = self.build_query(
+            search_term=search_term,
+            categoria=categoria,
+            condicao=condicao,
+            preco_min=preco_min,
+            preco_max=preco_max
         )
         
-        # Apply additional filters
-        if categoria:
-            query = query.filter(Livro.categoria == categoria)
-        
-        if condicao:
-            query = query.filter(Livro.condicao == condicao)
-        
-        if preco_min is not None:
-            query = query.filter(Livro.preco >= preco_min)
-        
-        if preco_max is not None:
-            query = query.filter(Livro.preco <= preco_max)
-        
         # Get total count before pagination
-        total = query.count()
-        
-        # Apply ordering
-        order_field = getattr(Livro, order_by, Livro.data_criacao)
-        if order_direction == "asc":
-            query = query.order_by(asc(order_field))
-        else:
-            query = query.order_by(desc(order_field))
+        with metrics_service.timed(DB_SECONDS, "db-count", query="search.count"):
+            total = query.count()
         
-        # Apply pagination
-        books = query.offset(skip).limit(limit).all()
+        # Apply ordering and pagination
+        query = self.apply_ordering(query, order_by, order_direction)
+        with metrics_service.timed(DB_SECONDS, "db-page", query="search.page"):
+            books = query.offset(skip).limit(limit).all()
         
         return books, total
     
@@ -247,6 +300,27 @@ class BookRepository:
         self.db.refresh(book)
         return book
     
+    def get_price_counts(self) -> List[Tuple[Optional[Categoria], Optional[CondicaoLivro], Decimal, int]]:
+        """
+        Get the price distribution of active books
+        
+        Aggregated per (categoria, condicao, preco), so the result size is
+        bounded by distinct prices rather than by the number of books.
+        
+        Returns:
+            List of (categoria, condicao, preco, count) tuples
+        """
+        return self.db.query(
+            Livro.categoria,
+            Livro.condicao,
+            Livro.preco,
+            func.count(Livro.id)
+        ).filter(
+            Livro.ativo == True
+        ).group_by(
+            Livro.categoria, Livro.condicao, Livro.preco
+        ).all()
+    
     def isbn_exists(self, isbn: str, exclude_id: Optional[int] = None) -> bool:
         """
         Check if ISBN already exists
@@ -2,24 +2,26 @@
 # Endpoints: /livros, /livros/{id}, /buscar
 # Implementa RF2.1, RF2.2, RF2.3, RF2.4, RF2.5
 
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, status
+from fastapi.responses import FileResponse, JSONResponse, Response
 from sqlalchemy.orm import Session
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
-import os
-import json
-import threading
-
 from database import get_db
 from schemas.book_schemas import (
     BookCreate,
     BookUpdate,
     BookResponse,
+    BookAvailabilityResponse,
     BookListResponse,
     CategoryResponse,
-    ConditionResponse
+    ConditionResponse,
+    PriceStatsResponse
 )
 from services.book_service import BookService
+from services.thumbnail_service import thumbnail_service, THUMBNAIL_FORMATS
+from services.public_settings_service import public_settings_service
+from config import settings
 
 router = APIRouter(tags=["Catálogo"])
 
@@ -66,6 +68,19 @@ async def get_books(
     return result
 
 
+@router.get("/livros/disponibilidade", response_model=List[BookAvailabilityResponse])
+async def get_books_availability(
+    ids: List[int] = Query(..., description="IDs dos livros (repita o parâmetro: ids=1&ids=2)"),
+    book_service: BookService = Depends(get_book_service)
+):
+    """
+    Consultar preço, estoque e status de vários livros em uma única requisição
+    
+    - **ids**: IDs dos livros (máx: 200); IDs inexistentes são omitidos
+    """
+    return book_service.get_books_availability(ids)
+
+
 @router.get("/livros/{book_id}", response_model=BookResponse)
 async def get_book(
     book_id: int,
@@ -79,6 +94,45 @@ async def get_book(
     return book_service.get_book_by_id(book_id)
 
 
+@router.get("/livros/{book_id}/thumbnail")
+async def get_book_thumbnail(
+    book_id: int,
+    request: Request,
+    size: str = Query("md", regex="^(sm|md|lg)$", description="Tamanho da miniatura"),
+    format: str = Query("webp", regex="^(webp|jpeg)$", description="Formato da imagem"),
+    v: Optional[str] = Query(None, description="Versão da capa (cache busting)"),
+    book_service: BookService = Depends(get_book_service)
+):
+    """
+    Obter miniatura da capa de um livro em tamanho fixo
+    
+    - **book_id**: ID do livro
+    - **size**: sm (160x240), md (320x480) ou lg (640x960)
+    - **format**: webp ou jpeg
+    - **v**: versão retornada em `thumbnail_url`; URLs versionadas são cacheadas por 1 ano
+    """
+    book = book_service.get_book_by_id(book_id)
+    if not book.get("imagem_url"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Livro sem imagem de capa"
+        )
+    
+    path, etag = await thumbnail_service.get_thumbnail(book["imagem_url"], size, format)
+    
+    # Versioned URLs never change content; unversioned ones may after a cover update
+    if v and v == thumbnail_service.source_version(book["imagem_url"]):
+        cache_control = f"public, max-age={settings.thumbnail_cache_max_age}, immutable"
+    else:
+        cache_control = "public, max-age=3600"
+    headers = {"Cache-Control": cache_control, "ETag": etag}
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return FileResponse(path, media_type=THUMBNAIL_FORMATS[format], headers=headers)
+
+
 @router.get("/buscar", response_model=BookListResponse)
 async def search_books(
     q: str = Query(..., min_length=1, description="Termo de busca"),
@@ -182,11 +236,24 @@ async def get_conditions(
     return book_service.get_conditions()
 
 
-# ---------------------- Public Settings (site-wide) ----------------------
+@router.get("/precos/estatisticas", response_model=PriceStatsResponse)
+async def get_price_stats(
+    categoria: Optional[str] = Query(None, description="Filtrar por categoria"),
+    condicao: Optional[str] = Query(None, description="Filtrar por condição"),
+    book_service: BookService = Depends(get_book_service)
+):
+    """
+    Obter estatísticas de preço (mínimo, máximo, média, percentis e histograma)
+    
+    Valores pré-calculados em segundo plano; usados pelo filtro de faixa de preço.
+    
+    - **categoria**: Filtrar por categoria (omitir para todas)
+    - **condicao**: Filtrar por condição (omitir para todas)
+    """
+    return book_service.get_price_stats(categoria=categoria, condicao=condicao)
 
-SETTINGS_FILE = os.environ.get("PUBLIC_SETTINGS_FILE", "public_settings.json")
-_settings_lock = threading.Lock()
 
+# ---------------------- Public Settings (site-wide) ----------------------
 
 class PublicSettings(BaseModel):
     """Site-wide public settings persisted server-side.
@@ -199,36 +266,32 @@ class PublicSettings(BaseModel):
     enabledPayments: Optional[List[str]] = None
 
 
-def _read_settings_file() -> Dict[str, Any]:
-    if not os.path.exists(SETTINGS_FILE):
-        return {}
-    try:
-        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
-    except Exception:
-        # If file is corrupted, fall back to empty dict
-        return {}
-
-
-def _write_settings_file(data: Dict[str, Any]) -> None:
-    os.makedirs(os.path.dirname(SETTINGS_FILE) or ".", exist_ok=True)
-    tmp_path = f"{SETTINGS_FILE}.tmp"
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    os.replace(tmp_path, SETTINGS_FILE)
+def _settings_response(data: Dict[str, Any], version: int, etag: str) -> JSONResponse:
+    """Build the public settings response with version and ETag headers"""
+    body = PublicSettings(
+        enabledCategories=data.get("enabledCategories"),
+        enabledPayments=data.get("enabledPayments"),
+    )
+    return JSONResponse(
+        content=body.model_dump(),
+        headers={"ETag": etag, "X-Settings-Version": str(version), "Cache-Control": "no-cache"},
+    )
 
 
 @router.get("/public-settings", response_model=PublicSettings, tags=["Configuração Pública"]) 
-async def get_public_settings():
+async def get_public_settings(request: Request):
     """Obter configurações públicas do site.
 
     Retorna null para campos não configurados (comportamento padrão: exibir todos).
+    Servido da memória; responde 304 quando `If-None-Match` corresponde ao ETag atual.
     """
-    raw = _read_settings_file()
-    return PublicSettings(
-        enabledCategories=raw.get("enabledCategories"),
-        enabledPayments=raw.get("enabledPayments"),
-    )
+    data, version, etag = public_settings_service.get()
+    if request.headers.get("if-none-match") == etag:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "X-Settings-Version": str(version), "Cache-Control": "no-cache"},
+        )
+    return _settings_response(data, version, etag)
 
 
 @router.put("/public-settings", response_model=PublicSettings, tags=["Configuração Pública"]) 
@@ -238,18 +301,14 @@ async def update_public_settings(payload: PublicSettings):
     Observações:
     - enabledCategories: null → não configurado (mostrar todas). [] → ocultar todas.
     - enabledPayments: null → não configurado (mostrar todas). [] → ocultar todas.
+    - A escrita é serializada entre workers e incrementa a versão das configurações.
     """
-    data = _read_settings_file()
+    changes: Dict[str, Any] = {}
     # Only overwrite keys that are not None to allow partial updates
     if payload.enabledCategories is not None or "enabledCategories" in payload.model_fields_set:
-        data["enabledCategories"] = payload.enabledCategories
+        changes["enabledCategories"] = payload.enabledCategories
     if payload.enabledPayments is not None or "enabledPayments" in payload.model_fields_set:
-        data["enabledPayments"] = payload.enabledPayments
-
-    with _settings_lock:
-        _write_settings_file(data)
+        changes["enabledPayments"] = payload.enabledPayments
 
-    return PublicSettings(
-        enabledCategories=data.get("enabledCategories"),
-        enabledPayments=data.get("enabledPayments"),
-    )
+    data, version, etag = public_settings_service.update(changes)
+    return _settings_response(data, version, etag)
@@ -6,9 +6,12 @@ from .book_schemas import (
     BookCreate,
     BookUpdate,
     BookResponse,
+    BookAvailabilityResponse,
     BookListResponse,
     CategoryResponse,
-    ConditionResponse
+    ConditionResponse,
+    PriceBucket,
+    PriceStatsResponse
 )
 
 __all__ = [
@@ -16,7 +19,10 @@ __all__ = [
     "BookCreate",
     "BookUpdate",
     "BookResponse",
+    "BookAvailabilityResponse",
     "BookListResponse",
     "CategoryResponse",
-    "ConditionResponse"
+    "ConditionResponse",
+    "PriceBucket",
+    "PriceStatsResponse"
 ]
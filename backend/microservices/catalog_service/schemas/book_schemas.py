@@ -2,7 +2,7 @@
 # Defines data structures for API endpoints
 
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 
@@ -117,6 +117,7 @@ class BookResponse(BaseModel):
     numero_paginas: Optional[int] = None
     sinopse: Optional[str] = None
     imagem_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
     preco: float
     estoque: int
     categoria: str
@@ -129,6 +130,14 @@ class BookResponse(BaseModel):
         from_attributes = True
 
 
+class BookAvailabilityResponse(BaseModel):
+    """Schema for price/stock lookup of one book"""
+    id: int
+    preco: float
+    estoque: int
+    ativo: bool
+
+
 class BookListResponse(BaseModel):
     """Schema for paginated book list response"""
     items: List[BookResponse]
@@ -141,6 +150,26 @@ class BookListResponse(BaseModel):
     search_term: Optional[str] = None
 
 
+class PriceBucket(BaseModel):
+    """Schema for one price histogram bucket"""
+    inicio: float
+    fim: float
+    quantidade: int
+
+
+class PriceStatsResponse(BaseModel):
+    """Schema for price statistics response"""
+    categoria: Optional[str] = None
+    condicao: Optional[str] = None
+    total: int
+    preco_min: Optional[float] = None
+    preco_max: Optional[float] = None
+    media: Optional[float] = None
+    percentis: Dict[str, float]
+    histograma: List[PriceBucket]
+    atualizado_em: str
+
+
 class CategoryResponse(BaseModel):
     """Schema for category response"""
     value: str
@@ -12,12 +12,8 @@ from sqlalchemy.orm import Session
 # Adicionar o diretório atual ao path para importar os módulos
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from database import SessionLocal, engine
-from models import Base, Livro, Categoria, CondicaoLivro
-
-def create_tables():
-    """Criar todas as tabelas"""
-    Base.metadata.create_all(bind=engine)
+from database import SessionLocal, create_tables
+from models import Livro, Categoria, CondicaoLivro
 
 def seed_livros():
     """Popular tabela de livros com dados de exemplo"""
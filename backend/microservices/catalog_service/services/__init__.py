@@ -3,5 +3,14 @@
 
 from .book_service import BookService
 from .cache_service import cache_service
+from .thumbnail_service import thumbnail_service
+from .public_settings_service import public_settings_service
+from .price_stats_service import price_stats_service
 
-__all__ = ["BookService", "cache_service"]
+__all__ = [
+    "BookService",
+    "cache_service",
+    "thumbnail_service",
+    "public_settings_service",
+    "price_stats_service"
+]
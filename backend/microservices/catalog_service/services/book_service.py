@@ -6,9 +6,18 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import datetime
 
+from config import settings
 from models import Livro, Categoria, CondicaoLivro
 from repositories.book_repository import BookRepository
 from services.cache_service import cache_service
+from services.thumbnail_service import ThumbnailService
+from services.price_stats_service import price_stats_service
+from metrics import (
+    metrics_service,
+    CACHE_SECONDS,
+    CACHE_REQUESTS,
+    SERIALIZATION_SECONDS
+)
 
 
 class BookService:
@@ -39,6 +48,7 @@ class BookService:
             "numero_paginas": book.numero_paginas,
             "sinopse": book.sinopse,
             "imagem_url": book.imagem_url,
+            "thumbnail_url": ThumbnailService.build_url(book.id, book.imagem_url),
             "preco": float(book.preco) if book.preco else 0.0,
             "estoque": book.estoque,
             "categoria": book.categoria.value if book.categoria else None,
@@ -65,6 +75,48 @@ class BookService:
                 parts.append(f"{key}:{value}")
         return ":".join(parts)
     
+    def _cache_get(self, cache_key: str, endpoint: str) -> Optional[Any]:
+        """
+        Read from cache, recording latency and hit/miss per endpoint
+        
+        Args:
+            cache_key: Cache key
+            endpoint: Endpoint label for metrics
+            
+        Returns:
+            Cached value or None
+        """
+        with metrics_service.timed(CACHE_SECONDS, "cache", operation="get", endpoint=endpoint):
+            cached = self.cache.get(cache_key)
+        CACHE_REQUESTS.inc(endpoint=endpoint, result="hit" if cached else "miss")
+        return cached
+    
+    def _cache_set(self, cache_key: str, value: Any, endpoint: str) -> None:
+        """
+        Write to cache, recording latency per endpoint
+        
+        Args:
+            cache_key: Cache key
+            value: Value to cache
+            endpoint: Endpoint label for metrics
+        """
+        with metrics_service.timed(CACHE_SECONDS, "cache", operation="set", endpoint=endpoint):
+            self.cache.set(cache_key, value)
+    
+    def _serialize_books(self, books: List[Livro], endpoint: str) -> List[Dict[str, Any]]:
+        """
+        Serialize a page of books, recording serialization time
+        
+        Args:
+            books: Book instances
+            endpoint: Endpoint label for metrics
+            
+        Returns:
+            List of book dictionaries
+        """
+        with metrics_service.timed(SERIALIZATION_SECONDS, "serialize", endpoint=endpoint):
+            return [self._serialize_book(book) for book in books]
+    
     def get_book_by_id(self, book_id: int) -> Dict[str, Any]:
         """
         Get book by ID with caching
@@ -80,7 +132,7 @@ class BookService:
         """
         # Try cache first
         cache_key = f"book:{book_id}"
-        cached_book = self.cache.get(cache_key)
+        cached_book = self._cache_get(cache_key, "get_book")
         if cached_book:
             return cached_book
         
@@ -93,11 +145,47 @@ class BookService:
             )
         
         # Serialize and cache
-        book_data = self._serialize_book(book)
-        self.cache.set(cache_key, book_data)
+        with metrics_service.timed(SERIALIZATION_SECONDS, "serialize", endpoint="get_book"):
+            book_data = self._serialize_book(book)
+        self._cache_set(cache_key, book_data, "get_book")
         
         return book_data
     
+    def get_books_availability(self, book_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Get price, stock and active flag for several books (uncached, always fresh)
+        
+        Used by other services to resolve many books in one request.
+        Unknown IDs are omitted from the result.
+        
+        Args:
+            book_ids: Book IDs
+            
+        Returns:
+            List of availability dictionaries
+            
+        Raises:
+            HTTPException: If too many IDs are requested
+        """
+        unique_ids = list(dict.fromkeys(book_ids))
+        if len(unique_ids) > settings.availability_max_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Máximo de {settings.availability_max_ids} livros por consulta"
+            )
+        if not unique_ids:
+            return []
+        
+        return [
+            {
+                "id": book_id,
+                "preco": float(preco) if preco else 0.0,
+                "estoque": estoque,
+                "ativo": bool(ativo)
+            }
+            for book_id, preco, estoque, ativo in self.book_repo.get_availability(unique_ids)
+        ]
+    
     def get_books(
         self,
         page: int = 1,
@@ -139,7 +227,7 @@ class BookService:
         )
         
         # Try cache first
-        cached_result = self.cache.get(cache_key)
+        cached_result = self._cache_get(cache_key, "get_books")
         if cached_result:
             return cached_result
         
@@ -180,7 +268,7 @@ class BookService:
         )
         
         # Serialize books
-        books_data = [self._serialize_book(book) for book in books]
+        books_data = self._serialize_books(books, "get_books")
         
         # Calculate pagination info
         total_pages = (total + page_size - 1) // page_size
@@ -196,7 +284,7 @@ class BookService:
         }
         
         # Cache result
-        self.cache.set(cache_key, result)
+        self._cache_set(cache_key, result, "get_books")
         
         return result
     
@@ -244,7 +332,7 @@ class BookService:
         )
         
         # Try cache first
-        cached_result = self.cache.get(cache_key)
+        cached_result = self._cache_get(cache_key, "search_books")
         if cached_result:
             return cached_result
         
@@ -286,7 +374,7 @@ class BookService:
         )
         
         # Serialize books
-        books_data = [self._serialize_book(book) for book in books]
+        books_data = self._serialize_books(books, "search_books")
         
         # Calculate pagination info
         total_pages = (total + page_size - 1) // page_size
@@ -303,7 +391,7 @@ class BookService:
         }
         
         # Cache result
-        self.cache.set(cache_key, result)
+        self._cache_set(cache_key, result, "search_books")
         
         return result
     
@@ -332,6 +420,7 @@ class BookService:
         
         # Invalidate cache
         self.cache.delete_pattern("books:*")
+        price_stats_service.mark_dirty()
         
         return self._serialize_book(book)
     
@@ -368,6 +457,7 @@ class BookService:
         # Invalidate cache
         self.cache.delete(f"book:{book_id}")
         self.cache.delete_pattern("books:*")
+        price_stats_service.mark_dirty()
         
         return self._serialize_book(book)
     
@@ -394,9 +484,44 @@ class BookService:
         # Invalidate cache
         self.cache.delete(f"book:{book_id}")
         self.cache.delete_pattern("books:*")
+        price_stats_service.mark_dirty()
         
         return {"message": "Livro removido com sucesso"}
     
+    def get_price_stats(self, categoria: Optional[str] = None, condicao: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get precomputed price histogram and percentiles
+        
+        Args:
+            categoria: Filter by category
+            condicao: Filter by condition
+            
+        Returns:
+            Price statistics dictionary
+            
+        Raises:
+            HTTPException: If category or condition is invalid
+        """
+        if categoria:
+            try:
+                Categoria(categoria)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Categoria inválida: {categoria}"
+                )
+        
+        if condicao:
+            try:
+                CondicaoLivro(condicao)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Condição inválida: {condicao}"
+                )
+        
+        return price_stats_service.get_stats(categoria, condicao)
+    
     def get_categories(self) -> List[Dict[str, str]]:
         """
         Get all available categories
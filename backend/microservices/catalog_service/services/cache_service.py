@@ -5,6 +5,7 @@ import json
 import redis
 from typing import Optional, Any
 from config import settings
+from metrics import CACHE_ERRORS
 
 
 class CacheService:
@@ -50,6 +51,7 @@ class CacheService:
                 return json.loads(value)
             return None
         except Exception as e:
+            CACHE_ERRORS.inc(operation="get")
             print(f"Cache get error: {e}")
             return None
     
@@ -74,6 +76,7 @@ class CacheService:
             self.redis_client.setex(key, ttl, serialized_value)
             return True
         except Exception as e:
+            CACHE_ERRORS.inc(operation="set")
             print(f"Cache set error: {e}")
             return False
     
@@ -94,6 +97,7 @@ class CacheService:
             self.redis_client.delete(key)
             return True
         except Exception as e:
+            CACHE_ERRORS.inc(operation="delete")
             print(f"Cache delete error: {e}")
             return False
     
@@ -116,6 +120,7 @@ class CacheService:
                 self.redis_client.delete(*keys)
             return True
         except Exception as e:
+            CACHE_ERRORS.inc(operation="delete_pattern")
             print(f"Cache delete pattern error: {e}")
             return False
     
@@ -133,6 +138,7 @@ class CacheService:
             self.redis_client.flushdb()
             return True
         except Exception as e:
+            CACHE_ERRORS.inc(operation="clear_all")
             print(f"Cache clear error: {e}")
             return False
     
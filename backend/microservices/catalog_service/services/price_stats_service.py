@@ -0,0 +1,264 @@
+# Price Stats Service - Precomputed price histograms and percentiles
+# Recomputed in the background (on schedule or after catalog writes) and served from memory/Redis
+
+import asyncio
+import math
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from config import settings
+from database import SessionLocal
+from repositories.book_repository import BookRepository
+from services.cache_service import cache_service
+
+
+STATS_KEY = "price_stats:snapshot"
+DIRTY_KEY = "price_stats:dirty"
+LOCK_KEY = "price_stats:lock"
+
+# Aggregate key for "all categories" / "all conditions"
+ALL = "*"
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# Retry delay until the first snapshot exists (scheduler and Retry-After)
+COLD_RETRY_SECONDS = 5
+
+
+def _group_stats(prices: Counter, buckets: int) -> Dict[str, Any]:
+    """
+    Compute summary, percentiles and histogram for one group
+
+    Args:
+        prices: Counter of price (Decimal) -> number of books
+        buckets: Number of histogram buckets
+
+    Returns:
+        Stats dictionary
+    """
+    total = sum(prices.values())
+    ordered = sorted(prices.items())
+    preco_min = ordered[0][0]
+    preco_max = ordered[-1][0]
+    soma = sum(price * count for price, count in ordered)
+
+    # Nearest-rank percentiles over the weighted distribution
+    percentis = {}
+    targets = [(p, max(1, math.ceil(p / 100 * total))) for p in PERCENTILES]
+    cumulative = 0
+    target_idx = 0
+    for price, count in ordered:
+        cumulative += count
+        while target_idx < len(targets) and cumulative >= targets[target_idx][1]:
+            percentis[f"p{targets[target_idx][0]}"] = float(price)
+            target_idx += 1
+
+    # Equal-width buckets spanning [min, max]
+    width = (preco_max - preco_min) / buckets if preco_max > preco_min else Decimal("1")
+    counts = [0] * buckets
+    for price, count in ordered:
+        idx = min(int((price - preco_min) / width), buckets - 1)
+        counts[idx] += count
+    histograma = [
+        {
+            "inicio": float(round(preco_min + width * i, 2)),
+            "fim": float(round(preco_min + width * (i + 1), 2)),
+            "quantidade": counts[i]
+        }
+        for i in range(buckets)
+    ]
+
+    return {
+        "total": total,
+        "preco_min": float(preco_min),
+        "preco_max": float(preco_max),
+        "media": float(round(soma / total, 2)),
+        "percentis": percentis,
+        "histograma": histograma
+    }
+
+
+def compute_snapshot(rows: List[Tuple[Any, Any, Decimal, int]], buckets: int) -> Dict[str, Any]:
+    """
+    Build stats for every (categoria, condicao) pair plus the "*" aggregates
+
+    Args:
+        rows: Output of BookRepository.get_price_counts()
+        buckets: Number of histogram buckets
+
+    Returns:
+        Snapshot dictionary with "groups" keyed by "categoria|condicao"
+    """
+    groups: Dict[str, Counter] = defaultdict(Counter)
+    for categoria, condicao, preco, count in rows:
+        if preco is None:
+            continue
+        cat = categoria.value if categoria else ALL
+        cond = condicao.value if condicao else ALL
+        preco = Decimal(preco)
+        for key in {(cat, cond), (cat, ALL), (ALL, cond), (ALL, ALL)}:
+            groups[f"{key[0]}|{key[1]}"][preco] += count
+
+    return {
+        "atualizado_em": datetime.utcnow().isoformat(),
+        "groups": {key: _group_stats(prices, buckets) for key, prices in groups.items()}
+    }
+
+
+class PriceStatsService:
+    """Service for precomputed catalog price statistics"""
+
+    def __init__(self):
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._loaded_at = 0.0
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+
+    def mark_dirty(self) -> None:
+        """Flag stats for recomputation after a catalog write"""
+        self._dirty = True
+        if cache_service.is_available():
+            try:
+                cache_service.redis_client.set(DIRTY_KEY, "1")
+            except Exception as e:
+                print(f"Price stats dirty flag error: {e}")
+
+    def _is_dirty(self) -> bool:
+        """Check local and shared dirty flags"""
+        if self._dirty:
+            return True
+        if cache_service.is_available():
+            try:
+                return bool(cache_service.redis_client.exists(DIRTY_KEY))
+            except Exception:
+                return False
+        return False
+
+    def _load_shared(self) -> bool:
+        """Load the latest snapshot published by any worker"""
+        snapshot = cache_service.get(STATS_KEY)
+        if snapshot:
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+            return True
+        return False
+
+    def refresh(self) -> Dict[str, Any]:
+        """
+        Recompute the snapshot from the database and publish it (blocking)
+
+        Returns:
+            New snapshot
+        """
+        # Clear first: writes landing during the computation re-flag it
+        self._dirty = False
+        if cache_service.is_available():
+            try:
+                cache_service.redis_client.delete(DIRTY_KEY)
+            except Exception:
+                pass
+
+        db = SessionLocal()
+        try:
+            rows = BookRepository(db).get_price_counts()
+        finally:
+            db.close()
+
+        snapshot = compute_snapshot(rows, settings.price_histogram_buckets)
+        self._snapshot = snapshot
+        self._loaded_at = time.monotonic()
+        # Keep the shared copy well past the refresh interval
+        cache_service.set(STATS_KEY, snapshot, ttl=max(settings.cache_ttl, settings.price_stats_max_age * 2))
+        return snapshot
+
+    def _acquire_refresh_lock(self) -> bool:
+        """Only one worker recomputes per interval (always true without Redis)"""
+        if not cache_service.is_available():
+            return True
+        try:
+            return bool(cache_service.redis_client.set(
+                LOCK_KEY, "1", nx=True, ex=settings.price_stats_refresh_interval
+            ))
+        except Exception:
+            return True
+
+    def tick(self) -> None:
+        """One scheduler step: recompute if dirty/stale, otherwise pull the shared copy"""
+        stale = self._snapshot is None or (
+            datetime.utcnow() - datetime.fromisoformat(self._snapshot["atualizado_em"])
+        ).total_seconds() > settings.price_stats_max_age
+        if (stale or self._is_dirty()) and self._acquire_refresh_lock():
+            self.refresh()
+        else:
+            self._load_shared()
+
+    async def run_scheduler(self) -> None:
+        """Background loop refreshing the stats every price_stats_refresh_interval seconds"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.tick)
+            except Exception as e:
+                print(f"Price stats refresh error: {e}")
+            # Retry soon while the first snapshot is still missing (e.g. database down at startup)
+            await asyncio.sleep(
+                settings.price_stats_refresh_interval if self._snapshot is not None else COLD_RETRY_SECONDS
+            )
+
+    def start(self) -> None:
+        """Start the background scheduler"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run_scheduler())
+
+    def stop(self) -> None:
+        """Stop the background scheduler"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def get_stats(self, categoria: Optional[str], condicao: Optional[str]) -> Dict[str, Any]:
+        """
+        Get precomputed stats for a category/condition (O(1) lookup)
+
+        Args:
+            categoria: Category value or None for all
+            condicao: Condition value or None for all
+
+        Returns:
+            Stats dictionary (total 0 and empty histogram if no books match)
+
+        Raises:
+            HTTPException: 503 if the first snapshot has not been computed yet
+        """
+        if self._snapshot is None and not self._load_shared():
+            # Cold start: the scheduler's first tick (at startup) computes it in the background
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Estatísticas de preço ainda em cálculo, tente novamente em instantes",
+                headers={"Retry-After": str(COLD_RETRY_SECONDS)}
+            )
+
+        key = f"{categoria or ALL}|{condicao or ALL}"
+        group = self._snapshot["groups"].get(key) or {
+            "total": 0,
+            "preco_min": None,
+            "preco_max": None,
+            "media": None,
+            "percentis": {},
+            "histograma": []
+        }
+        return {
+            "categoria": categoria,
+            "condicao": condicao,
+            **group,
+            "atualizado_em": self._snapshot["atualizado_em"]
+        }
+
+
+# Global price stats service instance
+price_stats_service = PriceStatsService()
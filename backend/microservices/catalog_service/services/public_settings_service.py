@@ -0,0 +1,194 @@
+# Public Settings Service - In-memory, versioned site-wide settings
+# Reloads public_settings.json only when it changes and coordinates writes across workers
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+from services.cache_service import cache_service
+
+
+SETTINGS_FILE = os.environ.get("PUBLIC_SETTINGS_FILE", "public_settings.json")
+SETTINGS_CHANNEL = "catalog:public_settings"
+
+
+class PublicSettingsService:
+    """Service for public settings kept in memory with version and ETag"""
+
+    def __init__(self, path: str = SETTINGS_FILE):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+        self._version = 0
+        self._etag = ""
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._listener: Optional[threading.Thread] = None
+        self._pubsub = None
+        self._reload()
+
+    # ========== Disk I/O ==========
+
+    def _read_file(self) -> Tuple[Dict[str, Any], Optional[float]]:
+        """Read settings and mtime from disk (empty dict if missing or corrupted)"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return {}, None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f) or {}, mtime
+        except Exception:
+            # If file is corrupted, fall back to empty dict
+            return {}, mtime
+
+    def _write_file(self, data: Dict[str, Any]) -> None:
+        """Atomically replace the settings file"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared by every worker process on this host"""
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ========== In-memory state ==========
+
+    def _apply(self, raw: Dict[str, Any], mtime: Optional[float]) -> None:
+        """Swap the in-memory snapshot (caller holds self._lock)"""
+        data = {k: v for k, v in raw.items() if k != "version"}
+        canonical = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        self._data = data
+        self._version = int(raw.get("version") or 0)
+        self._etag = f'"{self._version}-{hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]}"'
+        self._mtime = mtime
+        self._checked_at = time.monotonic()
+
+    def _reload(self) -> None:
+        """Load settings from disk into memory"""
+        raw, mtime = self._read_file()
+        with self._lock:
+            self._apply(raw, mtime)
+
+    def _refresh_if_stale(self) -> None:
+        """Reload when the file mtime changed, checking at most once per interval"""
+        now = time.monotonic()
+        if now - self._checked_at < settings.public_settings_check_interval:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._mtime:
+            self._reload()
+        else:
+            self._checked_at = now
+
+    def get(self) -> Tuple[Dict[str, Any], int, str]:
+        """
+        Get current settings
+
+        Returns:
+            Tuple of (settings dict, version, ETag)
+        """
+        self._refresh_if_stale()
+        with self._lock:
+            return dict(self._data), self._version, self._etag
+
+    def update(self, changes: Dict[str, Any]) -> Tuple[Dict[str, Any], int, str]:
+        """
+        Apply a partial update and persist it
+
+        The read-modify-write runs under an inter-process file lock on the
+        latest on-disk state, so concurrent workers never lose each other's
+        updates. Other workers are notified through Redis pub/sub.
+
+        Args:
+            changes: Keys to overwrite
+
+        Returns:
+            Tuple of (settings dict, version, ETag)
+        """
+        with self._file_lock():
+            raw, _ = self._read_file()
+            raw.update(changes)
+            raw["version"] = int(raw.get("version") or 0) + 1
+            self._write_file(raw)
+            mtime = os.stat(self.path).st_mtime
+            with self._lock:
+                self._apply(raw, mtime)
+                result = dict(self._data), self._version, self._etag
+
+        self._publish(result[1])
+        return result
+
+    # ========== Cross-worker notifications ==========
+
+    def _publish(self, version: int) -> None:
+        """Notify other workers that a new version was written"""
+        if not cache_service.is_available():
+            return
+        try:
+            cache_service.redis_client.publish(SETTINGS_CHANNEL, json.dumps({"version": version}))
+        except Exception as e:
+            print(f"Public settings publish error: {e}")
+
+    def _listen(self) -> None:
+        """Reload immediately when another worker publishes a newer version"""
+        try:
+            for message in self._pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    version = int(json.loads(message["data"]).get("version", 0))
+                except (ValueError, TypeError, AttributeError):
+                    continue
+                if version > self._version:
+                    self._reload()
+        except Exception as e:
+            # Subscription lost: mtime polling still keeps workers coherent
+            print(f"Public settings listener stopped: {e}")
+
+    def start_listener(self) -> None:
+        """Subscribe to settings notifications in a background thread"""
+        if self._listener is not None or not cache_service.is_available():
+            return
+        try:
+            self._pubsub = cache_service.redis_client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(SETTINGS_CHANNEL)
+        except Exception as e:
+            print(f"Public settings subscribe error: {e}")
+            self._pubsub = None
+            return
+        self._listener = threading.Thread(target=self._listen, name="public-settings-listener", daemon=True)
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        """Close the notification subscription"""
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+        self._pubsub = None
+        self._listener = None
+
+
+# Global public settings service instance
+public_settings_service = PublicSettingsService()
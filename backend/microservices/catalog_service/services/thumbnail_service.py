@@ -0,0 +1,282 @@
+# Thumbnail Service - Cover image resize and on-disk thumbnail cache
+# Generates fixed-size WebP/JPEG covers in a process pool (never on the event loop)
+
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from config import settings
+
+
+# Fixed thumbnail sizes (width, height) - covers are 2:3
+THUMBNAIL_SIZES: Dict[str, Tuple[int, int]] = {
+    "sm": (160, 240),
+    "md": (320, 480),
+    "lg": (640, 960),
+}
+
+THUMBNAIL_FORMATS: Dict[str, str] = {
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+
+
+def _render_thumbnail(
+    source_url: str,
+    width: int,
+    height: int,
+    image_format: str,
+    quality: int,
+    timeout: int,
+    max_source_bytes: int,
+    dest_path: str
+) -> int:
+    """
+    Download, resize and encode a cover image (runs in a worker process)
+
+    Args:
+        source_url: Original cover URL
+        width: Target width
+        height: Target height
+        image_format: "webp" or "jpeg"
+        quality: Encoder quality (1-100)
+        timeout: Download timeout in seconds
+        max_source_bytes: Maximum accepted source size
+        dest_path: Final cache file path
+
+    Returns:
+        Size in bytes of the written thumbnail
+    """
+    # Imported here so the API process never pays for Pillow on the hot path
+    from PIL import Image, ImageOps
+
+    request = urllib.request.Request(source_url, headers={"User-Agent": "mundo-palavras-catalog"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        data = response.read(max_source_bytes + 1)
+    if len(data) > max_source_bytes:
+        raise ValueError("Imagem de origem excede o tamanho máximo")
+
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEG draft mode decodes at reduced scale, much cheaper for large covers
+        image.draft("RGB", (width, height))
+        image = ImageOps.exif_transpose(image)
+        thumbnail = ImageOps.fit(image, (width, height), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    if image_format == "webp":
+        if thumbnail.mode not in ("RGB", "RGBA"):
+            thumbnail = thumbnail.convert("RGBA")
+        thumbnail.save(buffer, "WEBP", quality=quality, method=4)
+    else:
+        thumbnail.convert("RGB").save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+
+    # Atomic publish: readers never see a partially written file
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp_path, dest_path)
+    return len(buffer.getvalue())
+
+
+class ThumbnailService:
+    """Service for cover thumbnails with a size-bounded LRU disk cache"""
+
+    def __init__(self):
+        self.cache_dir = settings.thumbnail_cache_dir
+        self.max_bytes = settings.thumbnail_cache_max_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._cached_bytes: Optional[int] = None
+        # Accounting runs in the default thread pool: one scan/update at a time
+        self._cache_lock = threading.RLock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def source_version(source_url: str) -> str:
+        """
+        Short digest of the source URL, used as cache-busting version
+
+        Args:
+            source_url: Original cover URL
+
+        Returns:
+            12-character hex digest
+        """
+        return hashlib.sha256(source_url.encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def build_url(book_id: int, source_url: Optional[str], size: str = "md") -> Optional[str]:
+        """
+        Build the versioned thumbnail URL referenced by book responses
+
+        Args:
+            book_id: Book ID
+            source_url: Original cover URL (Livro.imagem_url)
+            size: Thumbnail size key
+
+        Returns:
+            Relative thumbnail URL or None if the book has no cover
+        """
+        if not source_url:
+            return None
+        version = ThumbnailService.source_version(source_url)
+        return f"{settings.api_prefix}/livros/{book_id}/thumbnail?size={size}&v={version}"
+
+    def _cache_key(self, source_url: str, size: str, image_format: str) -> str:
+        """Content address of a thumbnail: sha256 of (source, size, format)"""
+        raw = f"{source_url}\n{size}\n{image_format}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _cache_path(self, key: str, image_format: str) -> str:
+        """Sharded cache path for a key"""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{image_format}")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the worker pool lazily (after uvicorn forks its workers)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=settings.thumbnail_workers)
+        return self._executor
+
+    def _scan_cache(self):
+        """List (mtime, size, path) of every cached thumbnail"""
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self) -> None:
+        """
+        Evict least recently used thumbnails down to 90% of the size limit
+
+        Recency is the file mtime (bumped on every hit), so eviction stays
+        coherent across worker processes sharing the cache directory.
+        """
+        with self._cache_lock:
+            entries = self._scan_cache()
+            total = sum(size for _, size, _ in entries)
+            low_water = int(self.max_bytes * 0.9)
+            if total > self.max_bytes:
+                for _, size, path in sorted(entries):
+                    if total <= low_water:
+                        break
+                    try:
+                        os.remove(path)
+                        total -= size
+                    except FileNotFoundError:
+                        continue
+            self._cached_bytes = total
+
+    def _account(self, written: int) -> None:
+        """Track cache growth and evict when over the limit"""
+        with self._cache_lock:
+            if self._cached_bytes is None:
+                self._evict()
+                return
+            self._cached_bytes += written
+            if self._cached_bytes > self.max_bytes:
+                self._evict()
+
+    async def get_thumbnail(self, source_url: str, size: str, image_format: str) -> Tuple[str, str]:
+        """
+        Get a thumbnail file path, generating it on cache miss
+
+        Args:
+            source_url: Original cover URL
+            size: Thumbnail size key (see THUMBNAIL_SIZES)
+            image_format: "webp" or "jpeg"
+
+        Returns:
+            Tuple of (file path, ETag)
+
+        Raises:
+            HTTPException: If size/format is invalid or generation fails
+        """
+        if size not in THUMBNAIL_SIZES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tamanho inválido: {size}"
+            )
+        if image_format not in THUMBNAIL_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Formato inválido: {image_format}"
+            )
+        if not source_url.startswith(("http://", "https://")):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Livro sem imagem de capa"
+            )
+
+        key = self._cache_key(source_url, size, image_format)
+        path = self._cache_path(key, image_format)
+        etag = f'"{key[:32]}"'
+
+        if os.path.exists(path):
+            # Cache hit: bump recency for LRU eviction
+            try:
+                os.utime(path)
+                return path, etag
+            except FileNotFoundError:
+                pass  # Evicted concurrently, regenerate
+
+        # Coalesce concurrent requests for the same thumbnail
+        pending = self._in_flight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._generate(source_url, size, image_format, path))
+            self._in_flight[key] = pending
+            pending.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        await asyncio.shield(pending)
+        return path, etag
+
+    async def _generate(self, source_url: str, size: str, image_format: str, path: str) -> None:
+        """Render a thumbnail in the process pool and account its size"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        width, height = THUMBNAIL_SIZES[size]
+        loop = asyncio.get_running_loop()
+        try:
+            written = await loop.run_in_executor(
+                self._get_executor(),
+                _render_thumbnail,
+                source_url,
+                width,
+                height,
+                image_format,
+                settings.thumbnail_quality,
+                settings.thumbnail_fetch_timeout,
+                settings.thumbnail_max_source_bytes,
+                path
+            )
+        except Exception as e:
+            print(f"Thumbnail generation error ({source_url}, {size}, {image_format}): {e}")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Não foi possível gerar a miniatura da capa"
+            ) from e
+        # Directory scan on eviction is blocking I/O, keep it off the loop
+        await loop.run_in_executor(None, self._account, written)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global thumbnail service instance
+thumbnail_service = ThumbnailService()
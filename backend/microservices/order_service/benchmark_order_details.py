@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Benchmark do enriquecimento de detalhes do pedido
+
+Compara a busca de usuário, endereço e pagamento em sequência (comportamento
+anterior) com a busca concorrente sob prazo único de OrderService
+(_fetch_order_details). Um servidor stub em processo responde pelos três
+serviços, com latência injetada por serviço; nenhum banco é necessário
+(os pedidos são montados em memória).
+
+Uso:
+    python benchmark_order_details.py [--orders 200] [--concurrency 20]
+    python benchmark_order_details.py --auth-latency 0.05 --shipping-latency 0.1 --payment-latency 0.3
+
+    # um serviço lento além do prazo: o campo volta marcado como parcial
+    python benchmark_order_details.py --payment-latency 5 --deadline 1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+API_PREFIX = "/api/v1"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentil por interpolação linear"""
+    ordered = sorted(samples)
+    pos = (len(ordered) - 1) * pct / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+# ========== Serviços stub ==========
+
+class DependencyStubHandler(BaseHTTPRequestHandler):
+    """Responde como auth, shipping e payment (prefixo /{serviço}), com latência injetada"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, como os serviços reais
+    latencies: Dict[str, float] = {}
+    jitter: float = 0.0
+
+    ROUTES = {
+        "auth": re.compile(rf"^{API_PREFIX}/users/(\d+)$"),
+        "shipping": re.compile(rf"^{API_PREFIX}/enderecos/(\d+)$"),
+        "payment": re.compile(rf"^{API_PREFIX}/pagamento/pedido/(\d+)/status$"),
+    }
+
+    def _body(self, service: str, resource_id: int) -> dict:
+        """Resposta fixa de cada serviço"""
+        if service == "auth":
+            return {"id": resource_id, "nome": f"Usuário {resource_id}", "email": f"u{resource_id}@exemplo.com", "telefone": None}
+        if service == "shipping":
+            return {"id": resource_id, "logradouro": "Rua Exemplo", "numero": "100", "cidade": "São Paulo", "estado": "SP", "cep": "01000-000"}
+        return {"pagamentos": [{"forma_pagamento": "pix", "status": "confirmado", "valor": 59.9, "data_processamento": None}]}
+
+    def do_GET(self):
+        service, _, path = self.path.lstrip("/").partition("/")
+        route = self.ROUTES.get(service)
+        match = route.match("/" + path.split("?")[0]) if route else None
+        if not match:
+            self.send_error(404)
+            return
+
+        time.sleep(self.latencies.get(service, 0.0) + random.uniform(0, self.jitter))
+        body = json.dumps(self._body(service, int(match.group(1)))).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port: int, latencies: Dict[str, float], jitter: float) -> ThreadingHTTPServer:
+    """Servir os serviços stub em uma thread"""
+    DependencyStubHandler.latencies = latencies
+    DependencyStubHandler.jitter = jitter
+    server = ThreadingHTTPServer(("127.0.0.1", port), DependencyStubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ========== Benchmark ==========
+
+async def sequential_details(service, order) -> Dict[str, object]:
+    """Comportamento anterior: as três buscas uma após a outra, sem prazo"""
+    return {
+        "usuario_info": await service._fetch_user_details(order.usuario_id),
+        "endereco_entrega": await service._fetch_address_details(order.endereco_entrega_id, order.usuario_id),
+        "pagamento_info": await service._fetch_payment_details(order.id),
+    }
+
+
+async def run_mode(name: str, fetch, orders: list, concurrency: int) -> dict:
+    """Enriquecer todos os pedidos com até `concurrency` em andamento"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    partial_fields: Dict[str, int] = {}
+
+    async def one(order) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            details = await fetch(order)
+            latencies.append(time.perf_counter() - started)
+            for field in details.get("partial", []):
+                partial_fields[field] = partial_fields.get(field, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(order) for order in orders))
+    elapsed = time.perf_counter() - started
+    return {
+        "modo": name,
+        "n": len(latencies),
+        "pedidos_s": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "max": max(latencies) * 1000,
+        "parciais": partial_fields,
+    }
+
+
+def report(results: List[dict]) -> None:
+    """Tabela por modo (latências em ms)"""
+    print(f"\n{'modo':<12} {'n':>6} {'ped/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  parciais")
+    for r in results:
+        parciais = ", ".join(f"{field}={count}" for field, count in sorted(r["parciais"].items())) or "-"
+        print(
+            f"{r['modo']:<12} {r['n']:>6} {r['pedidos_s']:>8.1f} {r['p50']:>8.1f} "
+            f"{r['p95']:>8.1f} {r['p99']:>8.1f} {r['max']:>8.1f}  {parciais}"
+        )
+
+
+async def benchmark(args: argparse.Namespace) -> List[dict]:
+    """Executar os dois modos com os mesmos pedidos em memória"""
+    # Importado depois de apontar as URLs para o stub (settings lê o ambiente)
+    sys.path.insert(0, SERVICE_DIR)
+    from config import settings
+    from models import Pedido, StatusPedido
+    from services.http_clients import service_clients
+    from services.order_service import OrderService
+
+    settings.order_details_deadline = args.deadline
+    service_clients.start()
+    service = OrderService(db=None)
+    orders = [
+        Pedido(
+            id=i,
+            usuario_id=1 + i % 500,
+            endereco_entrega_id=1 + i % 700,
+            numero_pedido=f"MP-BENCH-{i:06d}",
+            status=StatusPedido.CONFIRMADO,
+            valor_total=Decimal("59.90"),
+            valor_frete=Decimal("10.00"),
+            itens=[]
+        )
+        for i in range(1, args.orders + 1)
+    ]
+
+    try:
+        # Aquecimento: abre as conexões dos pools
+        await run_mode("aquecimento", service._fetch_order_details, orders[:args.concurrency], args.concurrency)
+        return [
+            await run_mode("sequencial", lambda order: sequential_details(service, order), orders, args.concurrency),
+            await run_mode("concorrente", service._fetch_order_details, orders, args.concurrency),
+        ]
+    finally:
+        await service_clients.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do enriquecimento de detalhes do pedido")
+    parser.add_argument("--orders", type=int, default=200, help="Pedidos enriquecidos por modo")
+    parser.add_argument("--concurrency", type=int, default=20, help="Pedidos em andamento ao mesmo tempo")
+    parser.add_argument("--auth-latency", type=float, default=0.08, help="Latência do auth (s)")
+    parser.add_argument("--shipping-latency", type=float, default=0.12, help="Latência do endereço/shipping (s)")
+    parser.add_argument("--payment-latency", type=float, default=0.2, help="Latência do payment (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Latência extra aleatória até este valor (s)")
+    parser.add_argument("--deadline", type=float, default=2.0, help="ORDER_DETAILS_DEADLINE (s)")
+    parser.add_argument("--stub-port", type=int, default=18090)
+    args = parser.parse_args()
+
+    latencies = {"auth": args.auth_latency, "shipping": args.shipping_latency, "payment": args.payment_latency}
+    server = start_stub(args.stub_port, latencies, args.jitter)
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    os.environ.update({
+        "AUTH_SERVICE_URL": f"{stub_url}/auth{API_PREFIX}",
+        "SHIPPING_SERVICE_URL": f"{stub_url}/shipping{API_PREFIX}",
+        "PAYMENT_SERVICE_URL": f"{stub_url}/payment{API_PREFIX}",
+        # Prazo por chamada acima da latência injetada: só o prazo geral corta
+        "AUTH_SERVICE_TIMEOUT": str(max(5.0, args.auth_latency * 2)),
+        "SHIPPING_SERVICE_TIMEOUT": str(max(5.0, args.shipping_latency * 2)),
+        "PAYMENT_SERVICE_TIMEOUT": str(max(5.0, args.payment_latency * 2)),
+    })
+
+    print(
+        f"Latência injetada: auth={args.auth_latency}s shipping={args.shipping_latency}s "
+        f"payment={args.payment_latency}s (+até {args.jitter}s); prazo {args.deadline}s"
+    )
+    try:
+        results = asyncio.run(benchmark(args))
+    finally:
+        server.shutdown()
+
+    report(results)
+    sequential, concurrent = results
+    print(f"\np50 concorrente / sequencial: {concurrent['p50'] / sequential['p50']:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -35,6 +35,20 @@ class Settings(BaseSettings):
     payment_service_url: str = "http://payment-service:8005/api/v1"
     shipping_service_url: str = "http://shipping-service:8004/api/v1"
     
+    # Outbound HTTP clients (one keep-alive pool per downstream service)
+    auth_service_timeout: float = 5.0  # seconds
+    catalog_service_timeout: float = 5.0
+    cart_service_timeout: float = 5.0
+    payment_service_timeout: float = 5.0
+    shipping_service_timeout: float = 5.0
+    http_max_connections: int = 50  # per downstream service
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0  # seconds an idle connection is kept
+    http_pool_timeout: float = 1.0  # seconds to wait for a free connection
+    
+    # Order detail enrichment (user, address and payment fetched concurrently)
+    order_details_deadline: float = 2.0  # seconds; fields not ready by then are marked partial
+    
     # Order Number Configuration
     order_number_prefix: str = "MP"  # Mundo em Palavras
     
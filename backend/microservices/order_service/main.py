@@ -3,12 +3,15 @@
 # Implementa arquitetura limpa com separação de responsabilidades
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from config import settings
 from database import create_tables
 from routes import router
+from services.http_clients import service_clients
+from metrics import metrics_service
 
 
 # Create FastAPI application
@@ -38,6 +41,8 @@ async def startup_event():
     """Initialize application on startup"""
     # Create database tables
     create_tables()
+    # Open the pooled clients for downstream services
+    service_clients.start()
     print("Order Service started successfully!")
 
 
@@ -45,6 +50,7 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on application shutdown"""
     print("Order Service shutting down...")
+    await service_clients.close()
 
 
 @app.get("/")
@@ -57,6 +63,12 @@ async def root():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (per worker process)"""
+    return PlainTextResponse(metrics_service.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -74,6 +74,8 @@ class OrderResponse(BaseModel):
     usuario_info: Optional[dict] = None
     endereco_entrega: Optional[dict] = None
     pagamento_info: Optional[dict] = None
+    # Detail fields left out because their service missed the deadline
+    partial: List[str] = []
     
     class Config:
         from_attributes = True
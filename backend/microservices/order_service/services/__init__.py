@@ -3,5 +3,6 @@
 
 from .order_service import OrderService
 from .order_number_service import order_number_service
+from .http_clients import service_clients
 
-__all__ = ["OrderService", "order_number_service"]
+__all__ = ["OrderService", "order_number_service", "service_clients"]
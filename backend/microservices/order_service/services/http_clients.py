@@ -0,0 +1,114 @@
+# HTTP Clients - Long-lived pooled clients for downstream services
+# One httpx.AsyncClient per service, created at startup and closed at shutdown (keep-alive, no handshake per call)
+
+import time
+from typing import Dict, Tuple
+
+import httpx
+
+from config import settings
+from metrics import HTTP_REQUESTS, HTTP_REQUEST_SECONDS, HTTP_IN_FLIGHT, HTTP_POOL_LIMIT, HTTP_POOL_TIMEOUTS
+
+
+def _service_settings() -> Dict[str, Tuple[str, float]]:
+    """Base URL and timeout of each downstream service"""
+    return {
+        "auth": (settings.auth_service_url, settings.auth_service_timeout),
+        "catalog": (settings.catalog_service_url, settings.catalog_service_timeout),
+        "cart": (settings.cart_service_url, settings.cart_service_timeout),
+        "payment": (settings.payment_service_url, settings.payment_service_timeout),
+        "shipping": (settings.shipping_service_url, settings.shipping_service_timeout),
+    }
+
+
+class ServiceClients:
+    """Registry of pooled HTTP clients, one per downstream service"""
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    def _create(self, service: str) -> httpx.AsyncClient:
+        """Create the pooled client for a service"""
+        base_url, timeout = _service_settings()[service]
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry
+        )
+        HTTP_POOL_LIMIT.set(settings.http_max_connections, service=service)
+        HTTP_IN_FLIGHT.set(0, service=service)
+        return httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, pool=settings.http_pool_timeout),
+            limits=limits
+        )
+
+    def start(self) -> None:
+        """Create every client (inside the worker's event loop)"""
+        for service in _service_settings():
+            if service not in self._clients:
+                self._clients[service] = self._create(service)
+
+    def client(self, service: str) -> httpx.AsyncClient:
+        """Get the client for a service, creating it if startup has not run (scripts, tests)"""
+        client = self._clients.get(service)
+        if client is None:
+            client = self._clients[service] = self._create(service)
+        return client
+
+    async def request(self, service: str, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the service's pool, recording duration and pool usage
+
+        Args:
+            service: Downstream service name (auth, catalog, cart, payment, shipping)
+            method: HTTP method
+            path: Path relative to the service base URL
+            **kwargs: Passed to httpx (params, json, timeout...)
+
+        Returns:
+            HTTP response
+
+        Raises:
+            httpx.HTTPError: On connection errors, timeouts or pool exhaustion
+        """
+        client = self.client(service)
+        self._in_flight[service] = self._in_flight.get(service, 0) + 1
+        HTTP_IN_FLIGHT.set(self._in_flight[service], service=service)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await client.request(method, path, **kwargs)
+            outcome = str(response.status_code)
+            return response
+        except httpx.PoolTimeout:
+            outcome = "pool_timeout"
+            HTTP_POOL_TIMEOUTS.inc(service=service)
+            raise
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            raise
+        finally:
+            self._in_flight[service] -= 1
+            HTTP_IN_FLIGHT.set(self._in_flight[service], service=service)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, service=service)
+            HTTP_REQUESTS.inc(service=service, outcome=outcome)
+
+    async def get(self, service: str, path: str, **kwargs) -> httpx.Response:
+        """GET through the service's pool (see request)"""
+        return await self.request(service, "GET", path, **kwargs)
+
+    async def post(self, service: str, path: str, **kwargs) -> httpx.Response:
+        """POST through the service's pool (see request)"""
+        return await self.request(service, "POST", path, **kwargs)
+
+    async def close(self) -> None:
+        """Close every client and its pooled connections"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+# Global downstream clients instance
+service_clients = ServiceClients()
@@ -5,13 +5,15 @@ from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
-import httpx
 import asyncio
+import time
 
 from models import Pedido, ItemPedido, StatusPedido
 from repositories.order_repository import OrderRepository
 from services.order_number_service import order_number_service
+from services.http_clients import service_clients
 from config import settings
+from metrics import ORDER_DETAILS_SECONDS, ORDER_DETAILS_PARTIAL
 
 
 class OrderService:
@@ -83,33 +85,77 @@ class OrderService:
         
         # Add external details if requested
         if include_details:
-            # Fetch user details
-            user_details = await self._fetch_user_details(order.usuario_id)
-            if user_details:
-                order_dict["usuario_info"] = {
-                    "nome": user_details.get("nome"),
-                    "email": user_details.get("email"),
-                    # inclui telefone quando disponível (exibido no admin)
-                    "telefone": user_details.get("telefone"),
-                }
-            
-            # Fetch address details
-            address_details = await self._fetch_address_details(order.endereco_entrega_id, order.usuario_id)
-            if address_details:
-                order_dict["endereco_entrega"] = address_details
-            
-            # Fetch payment details
-            payment_details = await self._fetch_payment_details(order.id)
-            if payment_details:
-                order_dict["pagamento_info"] = {
-                    "metodo_pagamento": payment_details.get("forma_pagamento"),
-                    "status": payment_details.get("status"),
-                    "valor": payment_details.get("valor"),
-                    "data_processamento": payment_details.get("data_processamento")
-                }
+            order_dict.update(await self._fetch_order_details(order))
         
         return order_dict
     
+    async def _fetch_order_details(self, order: Pedido) -> Dict[str, Any]:
+        """
+        Fetch user, address and payment details concurrently under one deadline
+        
+        Lookups still running after settings.order_details_deadline are
+        cancelled and their fields listed in "partial".
+        
+        Args:
+            order: Pedido instance
+            
+        Returns:
+            Detail fields that completed in time, plus the "partial" list
+        """
+        lookups = {
+            "usuario_info": asyncio.ensure_future(self._fetch_user_details(order.usuario_id)),
+            "endereco_entrega": asyncio.ensure_future(
+                self._fetch_address_details(order.endereco_entrega_id, order.usuario_id)
+            ),
+            "pagamento_info": asyncio.ensure_future(self._fetch_payment_details(order.id)),
+        }
+        
+        started = time.perf_counter()
+        try:
+            _, pending = await asyncio.wait(lookups.values(), timeout=settings.order_details_deadline)
+        finally:
+            # Also runs if the request itself is cancelled
+            for task in lookups.values():
+                task.cancel()
+        ORDER_DETAILS_SECONDS.observe(time.perf_counter() - started)
+        
+        details: Dict[str, Any] = {"partial": []}
+        for field, task in lookups.items():
+            if task in pending:
+                details["partial"].append(field)
+                ORDER_DETAILS_PARTIAL.inc(field=field)
+        
+        user_details = self._lookup_result(lookups["usuario_info"])
+        if user_details:
+            details["usuario_info"] = {
+                "nome": user_details.get("nome"),
+                "email": user_details.get("email"),
+                # inclui telefone quando disponível (exibido no admin)
+                "telefone": user_details.get("telefone"),
+            }
+        
+        address_details = self._lookup_result(lookups["endereco_entrega"])
+        if address_details:
+            details["endereco_entrega"] = address_details
+        
+        payment_details = self._lookup_result(lookups["pagamento_info"])
+        if payment_details:
+            details["pagamento_info"] = {
+                "metodo_pagamento": payment_details.get("forma_pagamento"),
+                "status": payment_details.get("status"),
+                "valor": payment_details.get("valor"),
+                "data_processamento": payment_details.get("data_processamento")
+            }
+        
+        return details
+    
+    @staticmethod
+    def _lookup_result(task: asyncio.Future) -> Optional[Dict[str, Any]]:
+        """Result of a finished lookup, or None if it was cancelled or failed"""
+        if not task.done() or task.cancelled() or task.exception() is not None:
+            return None
+        return task.result()
+    
     async def _fetch_book_details(self, livro_id: int) -> Optional[Dict[str, Any]]:
         """
         Fetch book details from catalog service
@@ -121,13 +167,9 @@ class OrderService:
             Book details dictionary or None
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{settings.catalog_service_url}/livros/{livro_id}",
-                    timeout=5.0
-                )
-                if response.status_code == 200:
-                    return response.json()
+            response = await service_clients.get("catalog", f"/livros/{livro_id}")
+            if response.status_code == 200:
+                return response.json()
         except Exception as e:
             print(f"Error fetching book details: {e}")
         return None
@@ -143,13 +185,9 @@ class OrderService:
             User details dictionary or None
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{settings.auth_service_url}/users/{usuario_id}",
-                    timeout=5.0
-                )
-                if response.status_code == 200:
-                    return response.json()
+            response = await service_clients.get("auth", f"/users/{usuario_id}")
+            if response.status_code == 200:
+                return response.json()
         except Exception as e:
             print(f"Error fetching user details: {e}")
         return None
@@ -166,14 +204,13 @@ class OrderService:
             Address details dictionary or None
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{settings.shipping_service_url}/enderecos/{endereco_id}",
-                    params={"usuario_id": usuario_id},
-                    timeout=5.0
-                )
-                if response.status_code == 200:
-                    return response.json()
+            response = await service_clients.get(
+                "shipping",
+                f"/enderecos/{endereco_id}",
+                params={"usuario_id": usuario_id}
+            )
+            if response.status_code == 200:
+                return response.json()
         except Exception as e:
             print(f"Error fetching address details: {e}")
         return None
@@ -189,17 +226,13 @@ class OrderService:
             Payment details dictionary or None
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{settings.payment_service_url}/pagamento/pedido/{pedido_id}/status",
-                    timeout=5.0
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    # Return the first payment if available
-                    pagamentos = data.get("pagamentos", [])
-                    if pagamentos:
-                        return pagamentos[0]
+            response = await service_clients.get("payment", f"/pagamento/pedido/{pedido_id}/status")
+            if response.status_code == 200:
+                data = response.json()
+                # Return the first payment if available
+                pagamentos = data.get("pagamentos", [])
+                if pagamentos:
+                    return pagamentos[0]
         except Exception as e:
             print(f"Error fetching payment details: {e}")
         return None
@@ -215,14 +248,10 @@ class OrderService:
             List of cart items
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{settings.cart_service_url}/carrinho/{usuario_id}",
-                    timeout=5.0
-                )
-                if response.status_code == 200:
-                    cart_data = response.json()
-                    return cart_data.get("items", [])
+            response = await service_clients.get("cart", f"/carrinho/{usuario_id}")
+            if response.status_code == 200:
+                cart_data = response.json()
+                return cart_data.get("items", [])
         except Exception as e:
             print(f"Error fetching cart items: {e}")
             raise HTTPException(
@@ -242,14 +271,10 @@ class OrderService:
             True if payment is confirmed, False otherwise
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{settings.payment_service_url}/pagamentos/{pagamento_id}",
-                    timeout=5.0
-                )
-                if response.status_code == 200:
-                    payment_data = response.json()
-                    return payment_data.get("status") == "confirmado"
+            response = await service_clients.get("payment", f"/pagamentos/{pagamento_id}")
+            if response.status_code == 200:
+                payment_data = response.json()
+                return payment_data.get("status") == "confirmado"
         except Exception as e:
             print(f"Error verifying payment: {e}")
         return False
@@ -266,14 +291,13 @@ class OrderService:
             Shipping details dictionary
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{settings.shipping_service_url}/frete/calcular",
-                    json={"endereco_id": endereco_id, "peso_total": peso_total},
-                    timeout=5.0
-                )
-                if response.status_code == 200:
-                    return response.json()
+            response = await service_clients.post(
+                "shipping",
+                "/frete/calcular",
+                json={"endereco_id": endereco_id, "peso_total": peso_total}
+            )
+            if response.status_code == 200:
+                return response.json()
         except Exception as e:
             print(f"Error calculating shipping: {e}")
         return {"valor": 0, "prazo_dias": 7}